@@ -2,6 +2,7 @@ import secrets
 from datetime import datetime, timedelta, timezone
 
 import jwt
+from asgiref.sync import async_to_sync
 from django.conf import settings
 from ninja.security import HttpBearer
 
@@ -103,7 +104,7 @@ def refresh_tokens(refresh_token_str: str) -> tuple[str, str]:
     revoke_refresh_token(refresh_token_str)
 
     # Create new tokens
-    return create_tokens(user)
+    return async_to_sync(create_tokens)(user)
 
 
 class JWTAuth(HttpBearer):
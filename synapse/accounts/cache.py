@@ -1,8 +1,16 @@
 import hashlib
+import time
 
 from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.core.cache import cache
+from django.db import transaction
+from monitoring.metrics import (
+    CACHE_REQUESTS,
+    PASSWORD_CHECKS_FINISHED,
+    PASSWORD_CHECKS_STARTED,
+    registry,
+)
 
 from .models import User
 
@@ -26,12 +34,19 @@ async def check_password_cached(user: User, password: str) -> bool:
     try:
         cached = await sync_to_async(cache.get)(cache_key)
         if cached is not None:
+            registry.inc(CACHE_REQUESTS, {"cache": "password", "result": "hit"})
             return True
     except Exception:
         pass
+    registry.inc(CACHE_REQUESTS, {"cache": "password", "result": "miss"})
 
-    # Cache miss: run the expensive bcrypt check
-    is_correct = await sync_to_async(user.check_password)(password)
+    # Cache miss: run the expensive bcrypt check. Checks queue for the single
+    # sync thread, so started - finished is the bcrypt queue depth.
+    registry.inc(PASSWORD_CHECKS_STARTED)
+    try:
+        is_correct = await sync_to_async(user.check_password)(password)
+    finally:
+        registry.inc(PASSWORD_CHECKS_FINISHED)
 
     if is_correct:
         try:
@@ -40,3 +55,52 @@ async def check_password_cached(user: User, password: str) -> bool:
             pass
 
     return is_correct
+
+
+def _ledger_version_key(user_id) -> str:
+    return f"ledger_ver:{user_id}"
+
+
+def _version_seed() -> int:
+    # Seeding from the wall clock keeps versions monotonic even if Redis is
+    # flushed, so a client can never hold an ETag from before the reset.
+    return int(time.time() * 1000)
+
+
+def get_ledger_version(user_id) -> int | None:
+    """
+    Return the user's current ledger version, or None if Redis is unavailable.
+
+    The version is a per-user counter bumped by every write in the ledger,
+    currency and subscription routers. It backs the ETag on cacheable reads.
+    """
+    key = _ledger_version_key(user_id)
+    try:
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, _version_seed(), None)
+            version = cache.get(key)
+        return version
+    except Exception:
+        return None
+
+
+def bump_ledger_version(user_id) -> None:
+    """
+    Increment the user's ledger version once the current transaction commits.
+
+    Deferring to on_commit stops a concurrent read from pairing the new
+    version with data that is not yet visible.
+    """
+    key = _ledger_version_key(user_id)
+
+    def _bump():
+        try:
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.add(key, _version_seed(), None)
+        except Exception:
+            pass
+
+    transaction.on_commit(_bump)
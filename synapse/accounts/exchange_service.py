@@ -1,39 +1,74 @@
 import logging
+from bisect import bisect_right
+from datetime import date, timedelta
 from decimal import Decimal
 
 import httpx
+from django.conf import settings
+from django.db.models.fields.json import KeyTextTransform
 
 from synapse.constants import CURRENCIES
 
-from .models import ExchangeRate
+from .models import AppPreference, ExchangeRate, ExchangeRateHistory
 
 logger = logging.getLogger(__name__)
 
 API_BASE = "https://cdn.jsdelivr.net/npm/@fawazahmed0/currency-api@latest/v1/currencies"
 FALLBACK_BASE = "https://latest.currency-api.pages.dev/v1/currencies"
 
+# Dated snapshots of the same API; history starts on 2024-03-02
+HISTORY_API_BASE = "https://cdn.jsdelivr.net/npm/@fawazahmed0/currency-api@{date}/v1/currencies"
+HISTORY_FALLBACK_BASE = "https://{date}.currency-api.pages.dev/v1/currencies"
+
+# How far back an as_of lookup looks for the last published rate
+HISTORY_LOOKBACK_DAYS = 7
+
+
+def _fetch(client, base, urls):
+    """GET the first of `urls` that answers and return its JSON, or None."""
+    try:
+        resp = client.get(urls[0])
+        if resp.status_code != 200:
+            resp = client.get(urls[1])
+        resp.raise_for_status()
+    except httpx.HTTPError as e:
+        logger.warning("Failed to fetch rates for %s: %s", base, e)
+        return None
+    return resp.json()
+
+
+def _supported_rates(base, data) -> dict[str, str]:
+    """{TARGET: rate} for the supported currencies in an upstream response."""
+    rates = data.get(base.lower(), {})
+    return {
+        code: str(rates[code.lower()])
+        for code, _ in CURRENCIES
+        if code != base and rates.get(code.lower()) is not None
+    }
+
 
 def fetch_and_update_rates():
-    """Fetch latest exchange rates for all supported currencies and upsert into DB."""
+    """
+    Fetch latest exchange rates for all supported currencies, upsert them
+    into DB and record them as the history for their publication date.
+    """
     currency_codes = [code for code, _ in CURRENCIES]
     updated = 0
 
     with httpx.Client(timeout=15) as client:
         for base in currency_codes:
             base_lower = base.lower()
-            url = f"{API_BASE}/{base_lower}.json"
-
-            try:
-                resp = client.get(url)
-                if resp.status_code != 200:
-                    resp = client.get(f"{FALLBACK_BASE}/{base_lower}.json")
-                resp.raise_for_status()
-            except httpx.HTTPError as e:
-                logger.warning("Failed to fetch rates for %s: %s", base, e)
+            data = _fetch(client, base, [f"{API_BASE}/{base_lower}.json", f"{FALLBACK_BASE}/{base_lower}.json"])
+            if data is None:
                 continue
 
-            data = resp.json()
             rates = data.get(base_lower, {})
+            if data.get("date"):
+                ExchangeRateHistory.objects.update_or_create(
+                    base_currency=base,
+                    date=date.fromisoformat(data["date"]),
+                    defaults={"rates": _supported_rates(base, data)},
+                )
 
             for target in currency_codes:
                 if target == base:
@@ -54,10 +89,94 @@ def fetch_and_update_rates():
     return updated
 
 
-def get_rate(from_currency: str, to_currency: str) -> Decimal | None:
-    """Get the exchange rate between two currencies from the DB."""
+def load_rate_history(date_from: date, date_to: date, bases=None) -> int:
+    """
+    Bulk-load daily rates for `bases` (default: every supported currency)
+    from the dated upstream snapshots. Days already stored are skipped, so
+    re-running only fetches what is missing. Returns the rows stored.
+    """
+    bases = list(bases or [code for code, _ in CURRENCIES])
+    existing = set(
+        ExchangeRateHistory.objects.filter(
+            base_currency__in=bases, date__gte=date_from, date__lte=date_to,
+        ).values_list("base_currency", "date")
+    )
+    stored = 0
+    with httpx.Client(timeout=15) as client:
+        day = date_from
+        while day <= date_to:
+            rows = []
+            for base in bases:
+                if (base, day) in existing:
+                    continue
+                base_lower = base.lower()
+                data = _fetch(client, base, [
+                    f"{HISTORY_API_BASE.format(date=day.isoformat())}/{base_lower}.json",
+                    f"{HISTORY_FALLBACK_BASE.format(date=day.isoformat())}/{base_lower}.json",
+                ])
+                if data is not None:
+                    rows.append(ExchangeRateHistory(base_currency=base, date=day, rates=_supported_rates(base, data)))
+            # One insert per day keeps a long backfill restartable
+            ExchangeRateHistory.objects.bulk_create(rows, ignore_conflicts=True)
+            stored += len(rows)
+            day += timedelta(days=1)
+    logger.info("Loaded %d days of exchange rate history", stored)
+    return stored
+
+
+class RateHistory:
+    """
+    Point-in-time rates from a set of currencies into one target, loaded
+    with a single query for a date range and looked up in memory.
+    """
+
+    def __init__(self, to_currency: str, series: dict[str, tuple[list[date], list[Decimal]]]):
+        self.to_currency = to_currency
+        self.series = series
+
+    def rate(self, from_currency: str, as_of: date) -> Decimal | None:
+        """Rate published on `as_of`, or the last one within HISTORY_LOOKBACK_DAYS before it."""
+        if from_currency == self.to_currency:
+            return Decimal("1")
+        days, rates = self.series.get(from_currency, ((), ()))
+        index = bisect_right(days, as_of) - 1
+        if index < 0 or (as_of - days[index]).days > HISTORY_LOOKBACK_DAYS:
+            return None
+        return rates[index]
+
+
+def get_rate_history(from_currencies, to_currency: str, date_from: date, date_to: date) -> RateHistory:
+    """Load every stored rate from `from_currencies` into `to_currency` for the range."""
+    rows = (
+        ExchangeRateHistory.objects.filter(
+            base_currency__in=set(from_currencies) - {to_currency},
+            date__gte=date_from - timedelta(days=HISTORY_LOOKBACK_DAYS),
+            date__lte=date_to,
+        )
+        # Only the one target is read out of each row's JSON
+        .annotate(rate=KeyTextTransform(to_currency, "rates"))
+        .filter(rate__isnull=False)
+        .order_by("base_currency", "date")
+        .values_list("base_currency", "date", "rate")
+    )
+    series: dict[str, tuple[list, list]] = {}
+    for base, day, rate in rows:
+        days, rates = series.setdefault(base, ([], []))
+        days.append(day)
+        rates.append(Decimal(rate))
+    return RateHistory(to_currency, series)
+
+
+def get_rate(from_currency: str, to_currency: str, as_of: date | None = None) -> Decimal | None:
+    """Get the exchange rate between two currencies from the DB.
+
+    With `as_of`, return the rate in effect on that day from the stored
+    history instead of the latest rate.
+    """
     if from_currency == to_currency:
         return Decimal("1")
+    if as_of is not None:
+        return get_rate_history([from_currency], to_currency, as_of, as_of).rate(from_currency, as_of)
     try:
         er = ExchangeRate.objects.get(
             base_currency=from_currency,
@@ -68,6 +187,33 @@ def get_rate(from_currency: str, to_currency: str) -> Decimal | None:
         return None
 
 
+def get_main_currency(user) -> str:
+    """The user's primary currency, which reports and summaries convert into."""
+    pref = AppPreference.objects.select_related("main_currency").filter(user=user).first()
+    return pref.main_currency.currency if pref else settings.DEFAULT_CURRENCY
+
+
+def get_rates(from_currencies, to_currency: str, as_of: date | None = None) -> dict[str, Decimal]:
+    """Get rates from each of `from_currencies` to `to_currency` in one query.
+
+    Currencies with no stored rate are missing from the result. With
+    `as_of`, the rates in effect on that day are used.
+    """
+    from_currencies = set(from_currencies)
+    if as_of is not None:
+        history = get_rate_history(from_currencies, to_currency, as_of, as_of)
+        rates = {currency: history.rate(currency, as_of) for currency in from_currencies}
+        return {currency: rate for currency, rate in rates.items() if rate is not None}
+    rates = {to_currency: Decimal("1")} if to_currency in from_currencies else {}
+    rates.update(
+        ExchangeRate.objects.filter(
+            base_currency__in=from_currencies - {to_currency},
+            target_currency=to_currency,
+        ).values_list("base_currency", "rate")
+    )
+    return rates
+
+
 def convert_amount(
     amount: Decimal, from_currency: str, to_currency: str
 ) -> tuple[Decimal, Decimal] | None:
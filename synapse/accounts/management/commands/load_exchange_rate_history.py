@@ -0,0 +1,37 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from accounts.exchange_service import load_rate_history
+from synapse.constants import CURRENCIES
+
+
+class Command(BaseCommand):
+    help = "Backfill daily exchange rates for a date range from fawazahmed0/exchange-api. Stored days are skipped."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from", dest="date_from", type=date.fromisoformat, required=True)
+        parser.add_argument(
+            "--to", dest="date_to", type=date.fromisoformat, default=None,
+            help="Last day to load (default: yesterday).",
+        )
+        parser.add_argument(
+            "--base", action="append", default=None,
+            help="Base currency to load; repeat for several (default: all supported).",
+        )
+
+    def handle(self, *args, **options):
+        date_from = options["date_from"]
+        date_to = options["date_to"] or timezone.localdate() - timedelta(days=1)
+        if date_from > date_to:
+            raise CommandError("--from must not be after --to")
+        supported = {code for code, _ in CURRENCIES}
+        bases = [base.upper() for base in options["base"] or []]
+        unknown = set(bases) - supported
+        if unknown:
+            raise CommandError(f"Unsupported currency: {', '.join(sorted(unknown))}")
+
+        self.stdout.write(f"Loading exchange rate history {date_from} to {date_to}...")
+        count = load_rate_history(date_from, date_to, bases or None)
+        self.stdout.write(self.style.SUCCESS(f"Stored {count} days of rates."))
@@ -0,0 +1,27 @@
+# Generated by Django 6.1.2 on 2026-10-19 16:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_exchangerate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExchangeRateHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('base_currency', models.CharField(max_length=3)),
+                ('date', models.DateField()),
+                ('rates', models.JSONField(help_text='{target currency: rate as a decimal string}')),
+                ('fetched_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'exchange_rate_history',
+                'unique_together': {('base_currency', 'date')},
+            },
+        ),
+    ]
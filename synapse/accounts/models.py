@@ -147,3 +147,23 @@ class ExchangeRate(models.Model):
 
     def __str__(self):
         return f"{self.base_currency} -> {self.target_currency}: {self.rate}"
+
+
+class ExchangeRateHistory(models.Model):
+    """
+    Daily exchange rates from one base currency to every supported target,
+    as published upstream for that date. One row per base and day keeps the
+    whole history to a few thousand rows per currency.
+    """
+
+    base_currency = models.CharField(max_length=3)
+    date = models.DateField()
+    rates = models.JSONField(help_text="{target currency: rate as a decimal string}")
+    fetched_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "exchange_rate_history"
+        unique_together = ("base_currency", "date")
+
+    def __str__(self):
+        return f"{self.base_currency} on {self.date}"
@@ -1,7 +1,8 @@
 from django.db import transaction
 
 from accounts.auth import JWTAuth
-from accounts.exchange_service import fetch_and_update_rates
+from accounts.cache import bump_ledger_version
+from accounts.tasks import refresh_exchange_rates
 from accounts.models import AppPreference, ExchangeRate, SubCurrency
 from accounts.schemas import (
     AddSubCurrencyRequest,
@@ -12,9 +13,11 @@ from accounts.schemas import (
     UpdateExchangeRateRequest,
     UserCurrenciesResponse,
 )
-from ledger.models import Account, Transaction
+from ledger.models import Account, ArchivedRollup, ArchivedTransactionChunk, BudgetSpend, Transaction
 from ninja import Router
+from subscriptions.cache import invalidate_summaries
 from subscriptions.models import Subscription
+from sync.models import Tombstone
 from synapse.constants import ALL_FIAT_CURRENCIES, CURRENCIES
 
 router = Router(tags=["Currencies"])
@@ -104,6 +107,7 @@ def add_sub_currency(request, payload: AddSubCurrencyRequest):
         unit_position=payload.unit_position,
     )
     pref.sub_currencies.add(sc)
+    bump_ledger_version(user.pk)
 
     return 201, SubCurrencyResponse.from_sub_currency(sc)
 
@@ -130,7 +134,9 @@ def delete_sub_currency(request, subcurrency_id: int):
         return 400, ErrorResponse(detail="Sub-currency not found")
 
     pref.sub_currencies.remove(sc)
+    Tombstone.objects.create(user=user, entity="sub_currency", object_id=sc.pk)
     sc.delete()
+    bump_ledger_version(user.pk)
 
     return 200, {"detail": "Sub-currency removed"}
 
@@ -151,20 +157,24 @@ def update_sub_currency_rate(request, subcurrency_id: int, payload: UpdateExchan
 
     sc.exchange_rate = payload.exchange_rate
     sc.save(update_fields=["exchange_rate"])
+    bump_ledger_version(user.pk)
 
     return 200, SubCurrencyResponse.from_sub_currency(sc)
 
 
 @router.post(
     "/refresh-rates",
-    response={200: list[ExchangeRateResponse], 400: ErrorResponse},
+    response={202: list[ExchangeRateResponse], 400: ErrorResponse},
     auth=JWTAuth(),
-    description="Refresh exchange rates from external API and return updated rates.",
+    description=(
+        "Queue a refresh of exchange rates from the external API and return the "
+        "currently stored rates. Updated rates are available once the refresh completes."
+    ),
 )
 def refresh_rates(request):
     user = request.auth
 
-    fetch_and_update_rates()
+    refresh_exchange_rates.enqueue(unique=True)
 
     try:
         pref = AppPreference.objects.select_related("main_currency").prefetch_related(
@@ -182,14 +192,14 @@ def refresh_rates(request):
         target_currency__in=currency_codes,
     )
 
-    return 200, [ExchangeRateResponse.from_exchange_rate(r) for r in rates]
+    return 202, [ExchangeRateResponse.from_exchange_rate(r) for r in rates]
 
 
 @router.post(
     "/change-primary",
     response={200: UserCurrenciesResponse, 400: ErrorResponse},
     auth=JWTAuth(),
-    description="Change the primary currency. WARNING: This deletes all user transactions, accounts, subscriptions, and sub-currencies.",
+    description="Change the primary currency. WARNING: This deletes all user transactions, accounts, subscriptions, and sub-currencies, and resets budget progress.",
 )
 def change_primary_currency(request, payload: ChangePrimaryCurrencyRequest):
     user = request.auth
@@ -208,6 +218,9 @@ def change_primary_currency(request, payload: ChangePrimaryCurrencyRequest):
     with transaction.atomic():
         # Delete all user financial data
         Transaction.objects.filter(user=user).delete()
+        ArchivedTransactionChunk.objects.filter(user=user).delete()
+        ArchivedRollup.objects.filter(user=user).delete()
+        BudgetSpend.objects.filter(user=user).delete()
         Account.objects.filter(user=user).delete()
         Subscription.objects.filter(user=user).delete()
 
@@ -226,5 +239,11 @@ def change_primary_currency(request, payload: ChangePrimaryCurrencyRequest):
 
         pref.sub_currencies.add(new_main)
 
+        # Tell sync clients to drop everything rather than tombstoning each row
+        Tombstone.objects.create(user=user, entity="all", object_id=0)
+        transaction.on_commit(lambda: invalidate_summaries([user.pk]))
+
+    bump_ledger_version(user.pk)
+
     main_resp = SubCurrencyResponse.from_sub_currency(new_main, is_main=True)
     return 200, UserCurrenciesResponse(main_currency=main_resp, sub_currencies=[])
@@ -0,0 +1,9 @@
+from taskqueue.registry import task
+
+from .exchange_service import fetch_and_update_rates
+
+
+@task(concurrency=1, retry_delay=60)
+def refresh_exchange_rates():
+    """Fetch the latest exchange rates; queued by POST /currencies/refresh-rates and the schedule."""
+    fetch_and_update_rates()
@@ -1,4 +1,5 @@
 import pytest
+from asgiref.sync import async_to_sync
 from accounts.models import User, AppPreference, SubCurrency
 
 
@@ -56,5 +57,5 @@ def user_tokens(user):
     """Create and return tokens for the test user."""
     from accounts.auth import create_tokens
 
-    access_token, refresh_token = create_tokens(user)
+    access_token, refresh_token = async_to_sync(create_tokens)(user)
     return {"access_token": access_token, "refresh_token": refresh_token}
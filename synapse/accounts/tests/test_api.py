@@ -283,11 +283,12 @@ class TestLogoutAllEndpoint:
 
     def test_logout_all_success(self, client, user, auth_headers):
         """Test successful logout from all devices."""
+        from asgiref.sync import async_to_sync
         from accounts.auth import create_refresh_token
 
         # Create multiple refresh tokens
-        create_refresh_token(user)
-        create_refresh_token(user)
+        async_to_sync(create_refresh_token)(user)
+        async_to_sync(create_refresh_token)(user)
 
         response = client.post(
             "/api/auth/logout-all",
@@ -300,10 +301,11 @@ class TestLogoutAllEndpoint:
 
     def test_logout_all_revokes_all_tokens(self, client, user, auth_headers):
         """Test that logout-all revokes all refresh tokens."""
+        from asgiref.sync import async_to_sync
         from accounts.auth import create_refresh_token
 
-        create_refresh_token(user)
-        create_refresh_token(user)
+        async_to_sync(create_refresh_token)(user)
+        async_to_sync(create_refresh_token)(user)
 
         client.post(
             "/api/auth/logout-all",
@@ -1,6 +1,7 @@
 from datetime import datetime, timedelta, timezone
 
 import pytest
+from asgiref.sync import async_to_sync
 
 from accounts.auth import (
     AuthenticationError,
@@ -57,7 +58,7 @@ class TestRefreshToken:
 
     def test_create_refresh_token(self, user):
         """Test creating a refresh token."""
-        token = create_refresh_token(user)
+        token = async_to_sync(create_refresh_token)(user)
 
         assert token is not None
         assert isinstance(token, str)
@@ -65,7 +66,7 @@ class TestRefreshToken:
 
     def test_verify_refresh_token(self, user):
         """Test verifying a valid refresh token."""
-        token = create_refresh_token(user)
+        token = async_to_sync(create_refresh_token)(user)
         verified_user = verify_refresh_token(token)
 
         assert verified_user.pk == user.id
@@ -77,7 +78,7 @@ class TestRefreshToken:
 
     def test_verify_revoked_refresh_token(self, user):
         """Test that revoked refresh token raises AuthenticationError."""
-        token = create_refresh_token(user)
+        token = async_to_sync(create_refresh_token)(user)
         revoke_refresh_token(token)
 
         with pytest.raises(AuthenticationError, match="expired or revoked"):
@@ -101,7 +102,7 @@ class TestTokenOperations:
 
     def test_create_tokens(self, user):
         """Test creating both access and refresh tokens."""
-        access_token, refresh_token = create_tokens(user)
+        access_token, refresh_token = async_to_sync(create_tokens)(user)
 
         assert access_token is not None
         assert refresh_token is not None
@@ -110,7 +111,7 @@ class TestTokenOperations:
 
     def test_refresh_tokens_rotates_token(self, user):
         """Test that refreshing tokens rotates the refresh token."""
-        _, old_refresh_token = create_tokens(user)
+        _, old_refresh_token = async_to_sync(create_tokens)(user)
 
         new_access_token, new_refresh_token = refresh_tokens(old_refresh_token)
 
@@ -124,7 +125,7 @@ class TestTokenOperations:
 
     def test_revoke_refresh_token(self, user):
         """Test revoking a refresh token."""
-        token = create_refresh_token(user)
+        token = async_to_sync(create_refresh_token)(user)
         result = revoke_refresh_token(token)
 
         assert result is True
@@ -138,9 +139,9 @@ class TestTokenOperations:
     def test_revoke_all_user_tokens(self, user):
         """Test revoking all refresh tokens for a user."""
         # Create multiple tokens
-        create_refresh_token(user)
-        create_refresh_token(user)
-        create_refresh_token(user)
+        async_to_sync(create_refresh_token)(user)
+        async_to_sync(create_refresh_token)(user)
+        async_to_sync(create_refresh_token)(user)
 
         count = revoke_all_user_tokens(user)
 
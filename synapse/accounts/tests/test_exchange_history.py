@@ -0,0 +1,84 @@
+import re
+from datetime import date
+from decimal import Decimal
+
+import httpx
+import pytest
+from django.core.management import call_command
+
+from accounts import exchange_service
+from accounts.exchange_service import get_rate, get_rate_history, get_rates, load_rate_history
+from accounts.models import ExchangeRate, ExchangeRateHistory
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Serve /{base}.json from a dated (or latest) snapshot, recording each request."""
+    requests = []
+
+    def handler(request):
+        requests.append(str(request.url))
+        base = request.url.path.rsplit("/", 1)[-1].removesuffix(".json")
+        dated = re.search(r"\d{4}-\d{2}-\d{2}", str(request.url))
+        snapshot = dated.group() if dated else "2026-10-18"
+        day = int(snapshot[-2:])
+        return httpx.Response(200, json={
+            "date": snapshot,
+            base: {"usd": 1 + day / 100, "eur": 0.9, "btc": 0.00001},
+        })
+
+    real_client = httpx.Client
+    monkeypatch.setattr(
+        exchange_service.httpx, "Client",
+        lambda **kwargs: real_client(transport=httpx.MockTransport(handler), **kwargs),
+    )
+    return requests
+
+
+@pytest.mark.django_db
+class TestExchangeRateHistory:
+    def test_load_rate_history(self, upstream):
+        stored = load_rate_history(date(2026, 3, 1), date(2026, 3, 3), bases=["EUR"])
+        assert stored == 3
+        row = ExchangeRateHistory.objects.get(base_currency="EUR", date=date(2026, 3, 2))
+        # Only supported targets other than the base are kept
+        assert row.rates == {"USD": "1.02"}
+
+    def test_load_skips_stored_days(self, upstream):
+        ExchangeRateHistory.objects.create(base_currency="EUR", date=date(2026, 3, 2), rates={"USD": "9"})
+        assert load_rate_history(date(2026, 3, 1), date(2026, 3, 3), bases=["EUR"]) == 2
+        assert len(upstream) == 2
+        assert ExchangeRateHistory.objects.get(date=date(2026, 3, 2)).rates == {"USD": "9"}
+
+    def test_refresh_records_history(self, upstream):
+        exchange_service.fetch_and_update_rates()
+        assert ExchangeRate.objects.get(base_currency="EUR", target_currency="USD").rate == Decimal("1.18")
+        assert ExchangeRateHistory.objects.get(base_currency="EUR", date=date(2026, 10, 18)).rates["USD"] == "1.18"
+
+    def test_as_of_lookup(self):
+        ExchangeRate.objects.create(base_currency="EUR", target_currency="USD", rate=Decimal("1.5"))
+        ExchangeRateHistory.objects.create(base_currency="EUR", date=date(2026, 3, 2), rates={"USD": "1.02"})
+        ExchangeRateHistory.objects.create(base_currency="EUR", date=date(2026, 3, 5), rates={"USD": "1.05"})
+
+        assert get_rate("EUR", "USD", as_of=date(2026, 3, 4)) == Decimal("1.02")
+        assert get_rate("EUR", "USD", as_of=date(2026, 3, 5)) == Decimal("1.05")
+        assert get_rate("EUR", "USD", as_of=date(2026, 3, 1)) is None
+        # Nothing published within the lookback window
+        assert get_rate("EUR", "USD", as_of=date(2026, 4, 1)) is None
+        assert get_rate("EUR", "USD") == Decimal("1.5")
+        assert get_rates(["EUR", "GBP", "USD"], "USD", as_of=date(2026, 3, 3)) == {
+            "EUR": Decimal("1.02"), "USD": Decimal("1"),
+        }
+
+    def test_rate_history_is_one_query(self, django_assert_num_queries):
+        for day in (1, 2, 3):
+            ExchangeRateHistory.objects.create(base_currency="EUR", date=date(2026, 3, day), rates={"USD": f"1.0{day}"})
+            ExchangeRateHistory.objects.create(base_currency="GBP", date=date(2026, 3, day), rates={"USD": f"1.2{day}"})
+        with django_assert_num_queries(1):
+            history = get_rate_history(["EUR", "GBP"], "USD", date(2026, 3, 1), date(2026, 3, 3))
+        assert history.rate("EUR", date(2026, 3, 2)) == Decimal("1.02")
+        assert history.rate("GBP", date(2026, 3, 9)) == Decimal("1.23")
+
+    def test_command(self, upstream):
+        call_command("load_exchange_rate_history", "--from", "2026-03-01", "--to", "2026-03-02", "--base", "gbp")
+        assert set(ExchangeRateHistory.objects.values_list("base_currency", flat=True)) == {"GBP"}
@@ -0,0 +1,107 @@
+"""
+Contention benchmark: concurrent expense writes to one hot account, with
+LEDGER_BALANCE_MODE "inline" (UPDATE of the account row) vs "deltas"
+(append to account_balance_deltas).
+
+Each write runs in its own transaction, which is then held open for
+--hold-ms to stand in for the rest of a request under RLSMiddleware. In
+inline mode the account row lock is held for that whole time, so writers
+queue behind each other; in deltas mode they don't.
+
+Needs the Postgres database from settings — SQLite has no row locks.
+Usage (from synapse/):
+    python -m benchmarks.bench_balance_contention --workers 1 2 4 8 --seconds 5
+"""
+import argparse
+import os
+import threading
+import time
+import uuid
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "synapse.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from accounts.middleware import rls_context  # noqa: E402
+from accounts.models import User  # noqa: E402
+from django.conf import settings  # noqa: E402
+from django.db import connection, connections, transaction  # noqa: E402
+from django.test.utils import override_settings  # noqa: E402
+
+from ledger.balances import compact_balance_deltas  # noqa: E402
+from ledger.models import Account, Category  # noqa: E402
+from ledger.services import build_entry, post_transaction  # noqa: E402
+
+PAYLOAD = SimpleNamespace(amount=Decimal("1.00"), currency=None, note="bench", date=date.today())
+
+
+def setup():
+    user = User.objects.create_user(email=f"bench-{uuid.uuid4().hex[:8]}@example.com", password=None)
+    with transaction.atomic(), rls_context(user.pk):
+        account = Account.objects.create(user=user, name="Hot", account_type="checking", currency="USD")
+        category = Category.objects.create(user=user, name="Bench", category_type="expense")
+    return user, account, category
+
+
+def writer(user, account, category, deadline, hold, counts, index):
+    done = 0
+    try:
+        while time.monotonic() < deadline:
+            with transaction.atomic(), rls_context(user.pk):
+                post_transaction(build_entry(user, "expense", PAYLOAD, account, category))
+                if hold:
+                    with connection.cursor() as cursor:
+                        cursor.execute("SELECT pg_sleep(%s)", [hold])
+            done += 1
+    finally:
+        counts[index] = done
+        connections.close_all()
+
+
+def run(mode, workers, seconds, hold):
+    user, account, category = setup()
+    counts = [0] * workers
+    with override_settings(LEDGER_BALANCE_MODE=mode):
+        deadline = time.monotonic() + seconds
+        threads = [
+            threading.Thread(target=writer, args=(user, account, category, deadline, hold, counts, i))
+            for i in range(workers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    # account_balance_deltas is under RLS; compact over the superuser connection like the task does
+    compact_balance_deltas(using="superuser" if "superuser" in settings.DATABASES else "default")
+    with transaction.atomic(), rls_context(user.pk):
+        balance = Account.objects.get(pk=account.pk).balance
+        assert balance == -sum(counts), f"{mode}: balance {balance} after {sum(counts)} writes"
+        user.delete()
+    return sum(counts) / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--hold-ms", type=float, default=5, help="Time each write transaction stays open.")
+    args = parser.parse_args()
+    if connection.vendor != "postgresql":
+        raise SystemExit("This benchmark needs the Postgres database.")
+
+    hold = args.hold_ms / 1000
+    print(f"{'workers':>8}{'inline (writes/s)':>20}{'deltas (writes/s)':>20}{'speedup':>10}")
+    for workers in args.workers:
+        inline = run("inline", workers, args.seconds, hold)
+        deltas = run("deltas", workers, args.seconds, hold)
+        print(f"{workers:>8}{inline:>20.1f}{deltas:>20.1f}{deltas / inline:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
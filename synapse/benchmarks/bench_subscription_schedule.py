@@ -0,0 +1,55 @@
+"""
+Microbenchmark: closed-form next due date vs the original per-period loop.
+
+Usage (from synapse/):
+    python -m benchmarks.bench_subscription_schedule
+"""
+import timeit
+from datetime import date, timedelta
+
+from dateutil.relativedelta import relativedelta
+
+from subscriptions.schedule import compute_next_due_date
+
+TODAY = date(2026, 3, 1)
+
+CASES = [
+    ("weekly, started 2000", date(2000, 1, 3), "weekly", None),
+    ("monthly, started 2000", date(2000, 1, 31), "monthly", None),
+    ("yearly, started 1990", date(1990, 6, 15), "yearly", None),
+    ("custom 3d, started 2010", date(2010, 1, 1), "custom", 3),
+]
+
+
+def legacy_next_due_date(start_date, frequency, custom_interval_days, today):
+    current = start_date
+    if current > today:
+        return current
+    while current <= today:
+        if frequency == "weekly":
+            current += timedelta(weeks=1)
+        elif frequency == "monthly":
+            current += relativedelta(months=1)
+        elif frequency == "yearly":
+            current += relativedelta(years=1)
+        elif frequency == "custom" and custom_interval_days:
+            current += timedelta(days=custom_interval_days)
+        else:
+            break
+    return current
+
+
+def main(number=2000):
+    print(f"{'case':<26}{'legacy (us)':>14}{'closed form (us)':>20}{'speedup':>10}")
+    for label, start, frequency, custom in CASES:
+        legacy = timeit.timeit(
+            lambda: legacy_next_due_date(start, frequency, custom, TODAY), number=number,
+        ) / number * 1e6
+        closed = timeit.timeit(
+            lambda: compute_next_due_date(start, frequency, custom, today=TODAY), number=number,
+        ) / number * 1e6
+        print(f"{label:<26}{legacy:>14.2f}{closed:>20.2f}{legacy / closed:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
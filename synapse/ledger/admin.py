@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Account, Category, Tag, Transaction
+from .models import Account, ArchivedTransactionChunk, Budget, Category, Tag, Transaction
 
 
 @admin.register(Account)
@@ -29,3 +29,19 @@ class TransactionAdmin(admin.ModelAdmin):
     list_filter = ('transaction_type', 'date')
     search_fields = ('note', 'user__email')
     raw_id_fields = ('account', 'to_account', 'category')
+
+
+@admin.register(ArchivedTransactionChunk)
+class ArchivedTransactionChunkAdmin(admin.ModelAdmin):
+    list_display = ('user', 'month', 'row_count', 'archived_at')
+    search_fields = ('user__email',)
+    exclude = ('data',)
+    readonly_fields = ('user', 'month', 'row_count', 'archived_at')
+
+
+@admin.register(Budget)
+class BudgetAdmin(admin.ModelAdmin):
+    list_display = ('category', 'period', 'amount', 'currency', 'user')
+    list_filter = ('period', 'currency')
+    search_fields = ('category__name', 'user__email')
+    raw_id_fields = ('category',)
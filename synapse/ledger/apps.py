@@ -1,5 +1,12 @@
 from django.apps import AppConfig
+from django.db.models.signals import pre_delete
 
 
 class LedgerConfig(AppConfig):
     name = 'ledger'
+
+    def ready(self):
+        from .balances import carry_incoming_transfers
+        from .models import Account
+
+        pre_delete.connect(carry_incoming_transfers, sender=Account, dispatch_uid="ledger.carry_incoming_transfers")
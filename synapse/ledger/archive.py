@@ -0,0 +1,341 @@
+"""
+Cold storage for old transactions.
+
+archive_transactions() moves every transaction dated before the archive
+horizon (LEDGER_ARCHIVE_AFTER_DAYS ago, rounded down to a month) out of
+`transactions` into one ArchivedTransactionChunk per user and month, and
+records per-month totals by type and category, and by type and tag, in
+ArchivedRollup. A chunk holds its rows column-wise — one JSON list per
+field — compressed with zlib, so a month of history is a single small row
+instead of hundreds of heap tuples and index entries.
+
+The read side (archived_transactions, archived_category_totals,
+archived_tag_totals) is used by the transaction endpoints so archived
+ranges are still served: rollups answer totals for whole months, and only
+the months at the edges of a date range are decompressed. Archived rows are
+read-only; balances already include them (their net effect moves into
+Account.opening_balance, their count and last date into
+Account.archived_count and archived_last_date), and no sync tombstones are
+written, so clients keep them.
+"""
+import json
+import zlib
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, TruncMonth
+from django.utils import timezone
+
+from .balances import carry_forward, net_by_account
+from .models import Account, ArchivedRollup, ArchivedTransactionChunk, Category, Tag, Transaction
+from .partitions import add_months, month_start
+
+CHUNK_FORMAT = 1
+
+FIELDS = (
+    'id', 'transaction_type', 'amount', 'currency', 'original_amount', 'exchange_rate', 'to_amount',
+    'account_id', 'to_account_id', 'category_id', 'note', 'date', 'created_at', 'updated_at',
+)
+_DECIMALS = ('amount', 'original_amount', 'exchange_rate', 'to_amount')
+_DATETIMES = ('created_at', 'updated_at')
+
+
+def archive_horizon(today=None) -> date:
+    """First day of the oldest month that stays in the hot table."""
+    days = getattr(settings, "LEDGER_ARCHIVE_AFTER_DAYS", 730)
+    return month_start((today or timezone.localdate()) - timedelta(days=days))
+
+
+# ── Chunk encoding ───────────────────────────────────────────────────────────
+
+def _encode_value(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def encode_chunk(rows: list[dict]) -> bytes:
+    columns = {
+        field: [_encode_value(row[field]) for row in rows]
+        for field in (*FIELDS, 'tag_ids')
+    }
+    payload = json.dumps({"format": CHUNK_FORMAT, "columns": columns}, separators=(",", ":"))
+    return zlib.compress(payload.encode("utf-8"), 9)
+
+
+def decode_chunk(data) -> list[dict]:
+    columns = json.loads(zlib.decompress(bytes(data)))["columns"]
+    # Chunks archived before to_amount existed
+    columns.setdefault('to_amount', [None] * len(columns['id']))
+    for field in _DECIMALS:
+        columns[field] = [Decimal(v) if v is not None else None for v in columns[field]]
+    for field in _DATETIMES:
+        columns[field] = [datetime.fromisoformat(v) for v in columns[field]]
+    columns['date'] = [date.fromisoformat(v) for v in columns['date']]
+    names = list(columns)
+    return [dict(zip(names, values)) for values in zip(*columns.values())]
+
+
+# ── Archiving ────────────────────────────────────────────────────────────────
+
+def _rollups(user_id, month, rows):
+    totals = defaultdict(lambda: [Decimal(0), 0])
+    for row in rows:
+        for key in ((row['category_id'], None), *((None, tag_id) for tag_id in row['tag_ids'])):
+            bucket = totals[(row['transaction_type'], *key)]
+            bucket[0] += row['amount']
+            bucket[1] += 1
+    return [
+        ArchivedRollup(
+            user_id=user_id, month=month, transaction_type=transaction_type,
+            category_id=category_id, tag_id=tag_id, total=total, count=count,
+        )
+        for (transaction_type, category_id, tag_id), (total, count) in totals.items()
+    ]
+
+
+def account_activity(rows) -> dict:
+    """{account_id: (count, last date)} of rows, counting transfers on both accounts."""
+    activity = {}
+    for row in rows:
+        for account_id in {row['account_id'], row['to_account_id']} - {None}:
+            count, last = activity.get(account_id, (0, row['date']))
+            activity[account_id] = (count + 1, max(last, row['date']))
+    return activity
+
+
+def _carry_activity(rows, using):
+    """Add archived rows to Account.archived_count and archived_last_date."""
+    for account_id, (count, last) in sorted(account_activity(rows).items()):
+        Account.objects.using(using).filter(id=account_id).update(
+            archived_count=F('archived_count') + count,
+            archived_last_date=Greatest(Coalesce('archived_last_date', Value(last)), Value(last)),
+        )
+
+
+def archive_user_month(user_id, month, using="default") -> int:
+    """
+    Move one user's transactions for `month` into its archive chunk and
+    return how many rows moved. Rows backdated into an already archived
+    month are merged into the existing chunk.
+    """
+    hot = Transaction.objects.using(using).filter(
+        user_id=user_id, date__gte=month, date__lt=add_months(month, 1),
+    )
+    with transaction.atomic(using=using):
+        rows = list(hot.select_for_update().order_by().values(*FIELDS))
+        if not rows:
+            return 0
+        ids = [row['id'] for row in rows]
+        tag_ids = defaultdict(list)
+        through = Transaction.tags.through.objects.using(using)
+        for transaction_id, tag_id in through.filter(transaction_id__in=ids).values_list(
+            'transaction_id', 'tag_id',
+        ):
+            tag_ids[transaction_id].append(tag_id)
+        for row in rows:
+            row['tag_ids'] = tag_ids[row['id']]
+        # Balances keep these rows' effect; opening_balance now accounts for it
+        carry_forward(net_by_account(rows), using)
+        _carry_activity(rows, using)
+
+        chunk = (
+            ArchivedTransactionChunk.objects.using(using)
+            .select_for_update()
+            .filter(user_id=user_id, month=month)
+            .first()
+        )
+        if chunk is None:
+            chunk = ArchivedTransactionChunk(user_id=user_id, month=month)
+        else:
+            rows = decode_chunk(chunk.data) + rows
+        chunk.data = encode_chunk(rows)
+        chunk.row_count = len(rows)
+        chunk.save(using=using)
+
+        ArchivedRollup.objects.using(using).filter(user_id=user_id, month=month).delete()
+        ArchivedRollup.objects.using(using).bulk_create(_rollups(user_id, month, rows))
+
+        # A plain delete: no balance reversal and no sync tombstone
+        through.filter(transaction_id__in=ids).delete()
+        Transaction.objects.using(using).filter(id__in=ids).delete()
+    return len(ids)
+
+
+def archive_transactions(before=None, using="default") -> tuple[int, int]:
+    """Archive everything dated before `before` (default: the horizon). Returns (chunks, rows)."""
+    before = month_start(before or archive_horizon())
+    pending = (
+        Transaction.objects.using(using)
+        .filter(date__lt=before)
+        .annotate(month=TruncMonth('date'))
+        .values_list('user_id', 'month')
+        .distinct()
+        .order_by('user_id', 'month')
+    )
+    chunks = rows = 0
+    for user_id, month in list(pending):
+        moved = archive_user_month(user_id, month, using=using)
+        if moved:
+            chunks += 1
+            rows += moved
+    return chunks, rows
+
+
+# ── Serving ──────────────────────────────────────────────────────────────────
+
+def _chunks(user, date_from=None, date_to=None):
+    qs = ArchivedTransactionChunk.objects.filter(user=user)
+    if date_from:
+        qs = qs.filter(month__gte=month_start(date_from))
+    if date_to:
+        qs = qs.filter(month__lte=date_to)
+    return qs
+
+
+def _rows(chunks, transaction_type=None, account_id=None, date_from=None, date_to=None):
+    for chunk in chunks:
+        for row in decode_chunk(chunk.data):
+            if transaction_type and row['transaction_type'] != transaction_type:
+                continue
+            if account_id and row['account_id'] != account_id:
+                continue
+            if date_from and row['date'] < date_from:
+                continue
+            if date_to and row['date'] > date_to:
+                continue
+            yield row
+
+
+def _with_tags(txn, tags):
+    """Make txn.tags.all() return `tags` without touching the database."""
+    prefetched = Tag.objects.all()
+    prefetched._result_cache = tags
+    prefetched._prefetch_done = True
+    txn._prefetched_objects_cache = {'tags': prefetched}
+    return txn
+
+
+def tags_match(row_tag_ids, tag_ids, match_all=False) -> bool:
+    """Whether a row tagged with `row_tag_ids` passes a tag filter."""
+    wanted = set(tag_ids)
+    return wanted.issubset(row_tag_ids) if match_all else not wanted.isdisjoint(row_tag_ids)
+
+
+def archived_transactions(
+    user, transaction_type=None, account_id=None, category_id=None, date_from=None, date_to=None,
+    tag_ids=None, match_all=False,
+) -> list[Transaction]:
+    """
+    Archived transactions matching the list filters, as unsaved Transaction
+    instances ready for TransactionResponse.from_transaction. Rows of
+    deleted accounts are dropped and deleted categories, destination
+    accounts and tags are cleared, as the live foreign keys would do.
+    """
+    rows = list(_rows(_chunks(user, date_from, date_to), transaction_type, account_id, date_from, date_to))
+    if tag_ids:
+        rows = [row for row in rows if tags_match(row['tag_ids'], tag_ids, match_all)]
+    if not rows:
+        return []
+
+    accounts = Account.objects.filter(user=user).in_bulk()
+    categories = Category.objects.filter(user=user).in_bulk()
+    tags = Tag.objects.filter(user=user).in_bulk()
+
+    result = []
+    for row in rows:
+        account = accounts.get(row['account_id'])
+        category = categories.get(row['category_id'])
+        if account is None or (category_id and (category is None or category.id != category_id)):
+            continue
+        txn = Transaction(
+            user=user,
+            **{field: row[field] for field in FIELDS if not field.endswith('_id')},
+        )
+        txn.account = account
+        txn.to_account = accounts.get(row['to_account_id'])
+        txn.category = category
+        result.append(_with_tags(txn, [tags[t] for t in row['tag_ids'] if t in tags]))
+    return result
+
+
+def _split_range(user, transaction_type, date_from=None, date_to=None):
+    """
+    Split the archived months in a range into rollups for the months wholly
+    inside it and the chunks of the partially covered months at its edges.
+    Returns (rollups, edge_chunks), or None when nothing is archived there.
+    """
+    chunks = list(_chunks(user, date_from, date_to).only('month'))
+    if not chunks:
+        return None
+
+    full_from = month_start(date_from) if date_from else None
+    if date_from and date_from.day != 1:
+        full_from = add_months(full_from, 1)
+    full_until = month_start(date_to + timedelta(days=1)) if date_to else None
+
+    def whole(month):
+        return (full_from is None or month >= full_from) and (full_until is None or month < full_until)
+
+    rollups = ArchivedRollup.objects.filter(user=user, transaction_type=transaction_type)
+    if full_from:
+        rollups = rollups.filter(month__gte=full_from)
+    if full_until:
+        rollups = rollups.filter(month__lt=full_until)
+
+    partial = [chunk.pk for chunk in chunks if not whole(chunk.month)]
+    edge_chunks = ArchivedTransactionChunk.objects.filter(pk__in=partial) if partial else []
+    return rollups, edge_chunks
+
+
+def archived_category_totals(user, transaction_type, date_from=None, date_to=None) -> dict:
+    """
+    {category_id: total} over archived transactions of `transaction_type`.
+    Months wholly inside the range come from ArchivedRollup; partially
+    covered months are summed from their chunk.
+    """
+    split = _split_range(user, transaction_type, date_from, date_to)
+    if split is None:
+        return {}
+    rollups, edge_chunks = split
+
+    totals = defaultdict(Decimal)
+    for row in rollups.filter(tag_id__isnull=True).values('category_id').annotate(sum=Sum('total')):
+        totals[row['category_id']] += row['sum']
+    for row in _rows(edge_chunks, transaction_type, None, date_from, date_to):
+        totals[row['category_id']] += row['amount']
+    return dict(totals)
+
+
+def archived_tag_totals(user, transaction_type, date_from=None, date_to=None) -> dict:
+    """
+    {tag_id: (total, count)} over archived transactions of
+    `transaction_type`, read like archived_category_totals.
+    """
+    split = _split_range(user, transaction_type, date_from, date_to)
+    if split is None:
+        return {}
+    rollups, edge_chunks = split
+
+    totals = defaultdict(lambda: [Decimal(0), 0])
+    for row in rollups.filter(tag_id__isnull=False).values('tag_id').annotate(
+        sum=Sum('total'), count_sum=Sum('count'),
+    ):
+        totals[row['tag_id']][0] += row['sum']
+        totals[row['tag_id']][1] += row['count_sum']
+    for row in _rows(edge_chunks, transaction_type, None, date_from, date_to):
+        for tag_id in row['tag_ids']:
+            totals[tag_id][0] += row['amount']
+            totals[tag_id][1] += 1
+    return {tag_id: tuple(value) for tag_id, value in totals.items()}
+
+
+def archived_rows(user, transaction_type=None, date_from=None, date_to=None):
+    """Raw archived rows (dicts of FIELDS plus tag_ids) in the date range, chunk by chunk."""
+    return _rows(_chunks(user, date_from, date_to), transaction_type, None, date_from, date_to)
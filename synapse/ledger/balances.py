@@ -0,0 +1,271 @@
+"""
+Balance deltas and reconciliation.
+
+Account.balance is maintained incrementally by apply_balance_deltas. With
+LEDGER_BALANCE_MODE = "deltas" writers append AccountBalanceDelta rows
+instead of updating the account, and compact_balance_deltas() folds them
+into the account row in the background; until then the current balance
+is balance + pending deltas (Account.objects.with_pending_balance()).
+
+Every
+account also carries opening_balance, the part of its balance that rows in
+`transactions` do not explain: the balance it was created with, plus the
+net effect of archived transactions (added by archive_user_month) and of
+transfers in from deleted accounts (added when the source account is
+deleted, as the cascade removes those rows). So for every account
+
+    balance + pending deltas == opening_balance + net effect of its live transactions
+
+and reconcile_balances() checks that for a range of accounts in one SQL
+statement: the expected balance is a pair of correlated aggregates over
+the account_id and to_account_id indexes, compared in the WHERE clause, so
+only drifted accounts come back. A transfer whose destination was nulled
+by SET_NULL counts only against its source, as balance_deltas() does.
+"""
+import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from accounts.cache import bump_ledger_version
+from django.db import connections, transaction
+from django.db.models import Case, DecimalField, F, Max, Min, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Account, AccountBalanceDelta, Transaction, pending_balance
+
+logger = logging.getLogger(__name__)
+
+MONEY = DecimalField(max_digits=15, decimal_places=2)
+
+
+def _net(rows, group_by, amount):
+    return Subquery(
+        rows.order_by().values(group_by).annotate(net=Sum(amount, output_field=MONEY)).values('net'),
+        output_field=MONEY,
+    )
+
+
+def expected_balance(using="default"):
+    """Expression for an account's balance recomputed from opening_balance and the ledger."""
+    transactions = Transaction.objects.using(using)
+    outgoing = _net(
+        transactions.filter(account=OuterRef('pk')),
+        'account',
+        Case(When(transaction_type='income', then=F('amount')), default=-F('amount'), output_field=MONEY),
+    )
+    incoming = _net(
+        transactions.filter(to_account=OuterRef('pk'), transaction_type='transfer'),
+        'to_account',
+        Coalesce('to_amount', 'amount'),
+    )
+    return (
+        F('opening_balance')
+        + Coalesce(outgoing, Value(Decimal(0)), output_field=MONEY)
+        + Coalesce(incoming, Value(Decimal(0)), output_field=MONEY)
+    )
+
+
+def net_by_account(rows) -> dict:
+    """{account_id: net effect} of transaction rows (dicts with the Transaction columns)."""
+    net = defaultdict(Decimal)
+    for row in rows:
+        if row['transaction_type'] == 'income':
+            net[row['account_id']] += row['amount']
+        else:
+            net[row['account_id']] -= row['amount']
+        if row['transaction_type'] == 'transfer' and row['to_account_id']:
+            to_amount = row.get('to_amount')
+            net[row['to_account_id']] += row['amount'] if to_amount is None else to_amount
+    return dict(net)
+
+
+def carry_forward(net, using="default"):
+    """Move {account_id: amount} of balance out of the ledger into opening_balance."""
+    for account_id in sorted(net):
+        if net[account_id]:
+            Account.objects.using(using).filter(id=account_id).update(
+                opening_balance=F('opening_balance') + net[account_id],
+            )
+
+
+def carry_incoming_transfers(sender, instance, using, **kwargs):
+    """
+    pre_delete receiver for Account. Deleting an account cascades to its
+    transactions, including transfers it sent to other accounts; those
+    accounts keep the money, so it moves into their opening_balance.
+    """
+    incoming = (
+        Transaction.objects.using(using)
+        .filter(account=instance, transaction_type='transfer', to_account__isnull=False)
+        .exclude(to_account=instance)
+        .values('to_account_id')
+        .annotate(total=Sum(Coalesce('to_amount', 'amount')))
+        .order_by()
+    )
+    carry_forward({row['to_account_id']: row['total'] for row in incoming}, using)
+
+
+# ── Compaction ───────────────────────────────────────────────────────────────
+
+COMPACT_SQL = """
+    WITH moved AS (
+        DELETE FROM account_balance_deltas WHERE account_id = ANY(%s)
+        RETURNING account_id, amount, created_at
+    ), totals AS (
+        SELECT account_id, sum(amount) AS amount, max(created_at) AS last_at
+        FROM moved GROUP BY account_id
+    )
+    UPDATE financial_accounts AS account
+    SET balance = account.balance + totals.amount,
+        updated_at = GREATEST(account.updated_at, totals.last_at)
+    FROM totals WHERE account.id = totals.account_id
+"""
+
+
+def compact_accounts(account_ids, using="default") -> int:
+    """
+    Fold every pending delta of `account_ids` into Account.balance and
+    return the number of accounts updated. On Postgres the rows deleted
+    are exactly the rows summed (DELETE ... RETURNING), so deltas committed
+    while it runs are left for the next pass rather than lost. updated_at
+    moves up to the newest delta, which is when sync clients last saw the
+    balance change.
+    """
+    connection = connections[using]
+    with transaction.atomic(using=using):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(COMPACT_SQL, [sorted(account_ids)])
+                return cursor.rowcount
+
+        deltas = list(
+            AccountBalanceDelta.objects.using(using)
+            .select_for_update()
+            .filter(account_id__in=account_ids)
+            .values_list('id', 'account_id', 'amount', 'created_at')
+        )
+        totals = defaultdict(lambda: [Decimal(0), None])
+        for _, account_id, amount, created_at in deltas:
+            totals[account_id][0] += amount
+            totals[account_id][1] = max(filter(None, (totals[account_id][1], created_at)))
+        for account_id, (amount, last_at) in sorted(totals.items()):
+            account = Account.objects.using(using).filter(id=account_id)
+            account.update(balance=F('balance') + amount)
+            account.filter(updated_at__lt=last_at).update(updated_at=last_at)
+        AccountBalanceDelta.objects.using(using).filter(id__in=[row[0] for row in deltas]).delete()
+        return len(totals)
+
+
+def compact_balance_deltas(using="default", batch_size=1000) -> int:
+    """Compact pending deltas of every account, `batch_size` accounts per transaction."""
+    compacted = 0
+    last_id = 0
+    while True:
+        account_ids = list(
+            AccountBalanceDelta.objects.using(using)
+            .filter(account_id__gt=last_id)
+            .order_by('account_id')
+            .values_list('account_id', flat=True)
+            .distinct()[:batch_size]
+        )
+        if not account_ids:
+            return compacted
+        compacted += compact_accounts(account_ids, using)
+        last_id = account_ids[-1]
+
+
+# ── Reconciliation ───────────────────────────────────────────────────────────
+
+def find_drift(accounts):
+    """(id, user_id, balance, expected) for every account in `accounts` whose balance drifted."""
+    using = accounts.db
+    return list(
+        accounts.annotate(current=F('balance') + pending_balance(), expected=expected_balance(using))
+        .exclude(current=F('expected'))
+        .order_by('id')
+        .values_list('id', 'user_id', 'current', 'expected')
+    )
+
+
+def repair(account_ids, using="default") -> set:
+    """
+    Reset the balances of `account_ids` to their recomputed value and
+    return the affected user ids. The accounts are locked first, so
+    writers that already moved their balance have committed and new ones
+    wait until the rewrite commits.
+    """
+    with transaction.atomic(using=using):
+        locked = Account.objects.using(using).select_for_update().filter(id__in=account_ids).order_by('id')
+        user_ids = set(locked.values_list('user_id', flat=True))
+        # One statement, so transactions and their deltas are read from the same snapshot
+        Account.objects.using(using).filter(id__in=account_ids).update(
+            balance=expected_balance(using) - pending_balance(), updated_at=timezone.now(),
+        )
+    return user_ids
+
+
+def reconcile_range(low, high, using="default", fix=False, user_id=None) -> tuple[int, list]:
+    """Check accounts with low <= id < high. Returns (checked, drifted rows)."""
+    accounts = Account.objects.using(using).filter(id__gte=low, id__lt=high)
+    if user_id is not None:
+        accounts = accounts.filter(user_id=user_id)
+    checked = accounts.count()
+    drifted = find_drift(accounts)
+    if fix and drifted:
+        for affected in repair([row[0] for row in drifted], using):
+            bump_ledger_version(affected)
+    return checked, drifted
+
+
+def account_ranges(using="default", chunk_size=10000, user_id=None) -> list[tuple[int, int]]:
+    accounts = Account.objects.using(using)
+    if user_id is not None:
+        accounts = accounts.filter(user_id=user_id)
+    bounds = accounts.aggregate(low=Min('id'), high=Max('id'))
+    if bounds['low'] is None:
+        return []
+    return [
+        (low, min(low + chunk_size, bounds['high'] + 1))
+        for low in range(bounds['low'], bounds['high'] + 1, chunk_size)
+    ]
+
+
+def reconcile_balances(using="default", fix=False, chunk_size=10000, workers=1, user_id=None, progress=None):
+    """
+    Check every account (or one user's) in id ranges of `chunk_size`,
+    spread over `workers` threads, each with its own connection. Returns
+    (checked, drifted rows). `progress(checked, drifted)` is called after
+    each range.
+    """
+    ranges = account_ranges(using, chunk_size, user_id)
+    checked, drifted = 0, []
+
+    def collect(result):
+        nonlocal checked
+        checked += result[0]
+        drifted.extend(result[1])
+        if progress:
+            progress(checked, len(drifted))
+
+    if workers <= 1:
+        for low, high in ranges:
+            collect(reconcile_range(low, high, using, fix, user_id))
+    else:
+        def run(bounds):
+            try:
+                return reconcile_range(*bounds, using, fix, user_id)
+            finally:
+                # Each worker thread opened its own connection
+                connections[using].close()
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for result in pool.map(run, ranges):
+                collect(result)
+
+    for account_id, account_user_id, balance, expected in drifted:
+        logger.warning(
+            "Account %s (user %s) balance %s, ledger says %s", account_id, account_user_id, balance, expected,
+        )
+    return checked, sorted(drifted)
@@ -0,0 +1,238 @@
+"""
+Category budgets and their spent-so-far counters.
+
+Spending against a Budget is kept in BudgetSpend, one row per budget and
+period. post_transaction and remove_transaction (and the batch endpoint)
+adjust those rows in the same atomic block as the ledger write, so showing
+progress is a single indexed read instead of a sum over history. Expense
+amounts are converted from the account currency into the budget currency
+at the rate in effect on the transaction's date (the stored rate history,
+or the latest rate where there is none) and rounded per transaction. The
+converted amount is kept on the transaction (Transaction.budget_amounts),
+so deleting an expense takes back exactly what it added even if rates
+were loaded or moved in between, and reconcile_budgets rebuilds the
+counters from those same amounts.
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from accounts.exchange_service import get_rate, get_rate_history, get_rates
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q, Sum
+
+from .archive import archive_horizon
+from .models import Budget, BudgetSpend, Transaction
+from .periods import TRUNCATE, next_period, period_start
+
+logger = logging.getLogger(__name__)
+
+
+def period_end(start, period):
+    """Last day of the period beginning at `start`."""
+    return next_period(start, period) - timedelta(days=1)
+
+
+def budgets_by_category(user_id, category_ids) -> dict[int, list[Budget]]:
+    budgets = defaultdict(list)
+    if category_ids:
+        for budget in Budget.objects.filter(user_id=user_id, category_id__in=category_ids):
+            budgets[budget.category_id].append(budget)
+    return budgets
+
+
+def _rate(from_currency, to_currency, day, rate_cache):
+    """Rate on `day`, falling back to the latest rate where no history is stored."""
+    if from_currency == to_currency:
+        return Decimal(1)
+    key = (from_currency, to_currency, day)
+    if key not in rate_cache:
+        rate_cache[key] = get_rate(from_currency, to_currency, as_of=day) or get_rate(from_currency, to_currency)
+    return rate_cache[key]
+
+
+def convert(amount, rate):
+    """An expense's amount in budget currency, rounded as the counters store it."""
+    return (amount * rate).quantize(Decimal("0.01"))
+
+
+def spend_deltas(txn, budgets, rate_cache=None, reverse=False) -> dict:
+    """
+    Return {(user_id, budget_id, period_start): amount} for an expense,
+    given budgets_by_category() covering its category. Amounts converted
+    into another currency are stored in txn.budget_amounts, which the caller
+    saves with the transaction. With reverse=True, return the deltas that
+    undo it, taking back the stored amounts.
+    """
+    if txn.transaction_type != 'expense' or not budgets.get(txn.category_id):
+        return {}
+    rate_cache = {} if rate_cache is None else rate_cache
+    account_currency = txn.account.currency
+
+    deltas = {}
+    for budget in budgets[txn.category_id]:
+        stored = txn.budget_amounts.get(budget.currency)
+        if stored is not None:
+            amount = Decimal(stored)
+        else:
+            rate = _rate(account_currency, budget.currency, txn.date, rate_cache)
+            if rate is None:
+                logger.warning(
+                    "No %s to %s rate; budget %s left for reconcile_budgets",
+                    account_currency, budget.currency, budget.pk,
+                )
+                continue
+            amount = convert(txn.amount, rate)
+            if budget.currency != account_currency and not reverse:
+                txn.budget_amounts[budget.currency] = str(amount)
+        key = (budget.user_id, budget.pk, period_start(txn.date, budget.period))
+        deltas[key] = -amount if reverse else amount
+    return deltas
+
+
+def apply_spend_deltas(deltas):
+    """Add each delta to its counter row, creating it on first use.
+
+    Must be called inside transaction.atomic().
+    """
+    for user_id, budget_id, start in sorted(deltas):
+        amount = deltas[(user_id, budget_id, start)]
+        if not amount:
+            continue
+        counter = BudgetSpend.objects.filter(budget_id=budget_id, period_start=start)
+        if counter.update(spent=F('spent') + amount):
+            continue
+        try:
+            with transaction.atomic():
+                BudgetSpend.objects.create(
+                    user_id=user_id, budget_id=budget_id, period_start=start, spent=amount,
+                )
+        except IntegrityError:
+            # Another writer created the row first
+            counter.update(spent=F('spent') + amount)
+
+
+def record_spend(txn, reverse=False):
+    """Update the budget counters for one expense. Must be called inside transaction.atomic()."""
+    if txn.transaction_type == 'expense' and txn.category_id:
+        budgets = budgets_by_category(txn.user_id, [txn.category_id])
+        apply_spend_deltas(spend_deltas(txn, budgets, reverse=reverse))
+
+
+def ledger_spend(budgets, date_from=None, using="default") -> dict:
+    """
+    Sum expenses per (budget_id, period_start) straight from the ledger,
+    converted into each budget's currency exactly as spend_deltas() does:
+    the amount stored on the transaction, or else at the rate on its date,
+    rounded per transaction.
+    Expenses already in the budget currency are summed in the database.
+    Periods starting before `date_from` are left out.
+    """
+    budgets = list(budgets)
+    expected = defaultdict(Decimal)
+    by_period = defaultdict(list)
+    for budget in budgets:
+        by_period[budget.period].append(budget)
+
+    for period, group in by_period.items():
+        currencies = {b.pk: b.currency for b in group}
+        rows = Transaction.objects.using(using).filter(
+            transaction_type='expense', category__budgets__in=group,
+        )
+        if date_from:
+            rows = rows.filter(date__gte=date_from)
+        # Annotated so both halves reuse the one join to the budget
+        rows = rows.annotate(budget_currency=F('category__budgets__currency'))
+        same_currency = Q(account__currency=F('budget_currency'))
+
+        grouped = (
+            rows.filter(same_currency)
+            .values(budget_id=F('category__budgets__id'), start=TRUNCATE[period]('date'))
+            .annotate(total=Sum('amount'))
+            .order_by()
+        )
+        for row in grouped:
+            expected[(row['budget_id'], row['start'])] += row['total']
+
+        foreign = list(
+            rows.exclude(same_currency).values_list(
+                'category__budgets__id', TRUNCATE[period]('date'), 'date', 'account__currency', 'amount',
+                'budget_amounts',
+            )
+        )
+        unconverted = []
+        for row in foreign:
+            budget_id, start, stored = row[0], row[1], row[5]
+            if currencies[budget_id] in stored:
+                expected[(budget_id, start)] += Decimal(stored[currencies[budget_id]])
+            else:
+                unconverted.append(row)
+        if not unconverted:
+            continue
+        days = [row[2] for row in unconverted]
+        histories, latest = {}, {}
+        for target in set(currencies.values()):
+            sources = {row[3] for row in unconverted if currencies[row[0]] == target}
+            histories[target] = get_rate_history(sources, target, min(days), max(days))
+            latest[target] = get_rates(sources, target)
+        for budget_id, start, day, account_currency, amount, _ in unconverted:
+            target = currencies[budget_id]
+            rate = histories[target].rate(account_currency, day) or latest[target].get(account_currency)
+            if rate is not None:
+                expected[(budget_id, start)] += convert(amount, rate)
+    return expected
+
+
+def seed_current_spend(budget, today):
+    """Count what was already spent this period when a budget is created."""
+    start = period_start(today, budget.period)
+    spent = ledger_spend([budget], date_from=start).get((budget.pk, start), Decimal(0))
+    if spent:
+        BudgetSpend.objects.create(user_id=budget.user_id, budget=budget, period_start=start, spent=spent)
+    return spent
+
+
+def reconcile(using="default", user_id=None, fix=False) -> tuple[int, int]:
+    """
+    Compare every counter from the archive horizon on with the ledger and,
+    with fix=True, rewrite the ones that drifted. Periods starting before
+    the horizon are skipped because their transactions may be archived.
+    Returns (checked, drifted).
+    """
+    horizon = archive_horizon()
+    budgets = Budget.objects.using(using).all()
+    if user_id is not None:
+        budgets = budgets.filter(user_id=user_id)
+    budgets = {b.pk: b for b in budgets}
+    expected = {
+        # Weeks and years can start before the horizon; leave those alone too
+        key: spent for key, spent in ledger_spend(budgets.values(), horizon, using).items()
+        if key[1] >= horizon
+    }
+
+    counters = BudgetSpend.objects.using(using).filter(
+        budget_id__in=budgets, period_start__gte=horizon,
+    )
+    actual = {(c.budget_id, c.period_start): c for c in counters}
+
+    drifted = []
+    for key in expected.keys() | actual.keys():
+        counter = actual.get(key)
+        want = expected.get(key, Decimal(0))
+        if (counter.spent if counter else Decimal(0)) != want:
+            drifted.append((key, counter, want))
+
+    if fix and drifted:
+        with transaction.atomic(using=using):
+            for (budget_id, start), counter, want in drifted:
+                if counter is not None:
+                    counter.spent = want
+                    counter.save(using=using, update_fields=['spent'])
+                else:
+                    BudgetSpend.objects.using(using).create(
+                        user_id=budgets[budget_id].user_id, budget_id=budget_id,
+                        period_start=start, spent=want,
+                    )
+    return len(expected.keys() | actual.keys()), len(drifted)
+
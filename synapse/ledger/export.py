@@ -0,0 +1,224 @@
+"""
+Full-ledger export in CSV, JSON Lines or Parquet.
+
+Rows are read in batches of LEDGER_EXPORT_CHUNK_SIZE through
+QuerySet.iterator() (a server-side cursor on Postgres) and encoded one
+batch at a time, so memory stays flat however long the ledger is.
+Account, category and tag names come from per-user lookup tables loaded
+once up front rather than joins. Archived months are exported first,
+decompressed one chunk at a time.
+
+The response body is produced after the view — and RLSMiddleware's
+transaction — has returned, so the reader opens its own transaction and
+sets the RLS user again. stream_export() drives it from an async
+generator, which lets ASGI send each batch as it is encoded instead of
+buffering the whole body.
+"""
+import csv
+import io
+import json
+from decimal import Decimal
+from itertools import islice
+
+from accounts.middleware import rls_context
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+
+from .archive import FIELDS, decode_chunk
+from .models import Account, ArchivedTransactionChunk, Category, Tag, Transaction
+
+COLUMNS = (
+    'id', 'date', 'transaction_type', 'amount', 'account_currency', 'currency',
+    'original_amount', 'exchange_rate', 'account', 'to_account', 'to_amount', 'category', 'tags',
+    'note', 'created_at',
+)
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def iter_export_batches(user_id, chunk_size=None):
+    """Yield lists of export rows (dicts keyed by COLUMNS), oldest first."""
+    chunk_size = chunk_size or getattr(settings, "LEDGER_EXPORT_CHUNK_SIZE", 2000)
+    with transaction.atomic(), rls_context(user_id):
+        accounts = {a.id: a for a in Account.objects.filter(user_id=user_id).only('name', 'currency')}
+        categories = dict(Category.objects.filter(user_id=user_id).values_list('id', 'name'))
+        tags = dict(Tag.objects.filter(user_id=user_id).values_list('id', 'name'))
+
+        def export_row(row, tag_ids):
+            account = accounts.get(row['account_id'])
+            if account is None:
+                return None
+            to_account = accounts.get(row['to_account_id'])
+            return {
+                'id': row['id'],
+                'date': row['date'],
+                'transaction_type': row['transaction_type'],
+                'amount': row['amount'],
+                'account_currency': account.currency,
+                'currency': row['currency'],
+                'original_amount': row['original_amount'],
+                'exchange_rate': row['exchange_rate'],
+                'account': account.name,
+                'to_account': to_account.name if to_account else None,
+                'to_amount': row['to_amount'],
+                'category': categories.get(row['category_id']),
+                'tags': [tags[t] for t in tag_ids if t in tags],
+                'note': row['note'],
+                'created_at': row['created_at'],
+            }
+
+        chunks = ArchivedTransactionChunk.objects.filter(user_id=user_id).order_by('month')
+        for chunk_id in chunks.values_list('id', flat=True):
+            chunk = ArchivedTransactionChunk.objects.get(pk=chunk_id)
+            rows = sorted(decode_chunk(chunk.data), key=lambda r: (r['date'], r['id']))
+            for batch in _batches(rows, chunk_size):
+                yield [r for r in (export_row(row, row['tag_ids']) for row in batch) if r]
+
+        through = Transaction.tags.through.objects
+        hot = (
+            Transaction.objects.filter(user_id=user_id)
+            .order_by('date', 'id')
+            .values(*FIELDS)
+            .iterator(chunk_size=chunk_size)
+        )
+        for batch in _batches(hot, chunk_size):
+            tag_ids = {}
+            for transaction_id, tag_id in through.filter(
+                transaction_id__in=[row['id'] for row in batch],
+            ).values_list('transaction_id', 'tag_id'):
+                tag_ids.setdefault(transaction_id, []).append(tag_id)
+            yield [r for r in (export_row(row, tag_ids.get(row['id'], ())) for row in batch) if r]
+
+
+# ── Encoders: batches of rows in, bytes out ─────────────────────────────────
+
+def _plain(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def encode_csv(batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNS)
+    for batch in batches:
+        for row in batch:
+            writer.writerow([
+                ';'.join(row['tags']) if column == 'tags' else _plain(row[column])
+                for column in COLUMNS
+            ])
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def encode_jsonl(batches):
+    for batch in batches:
+        yield ''.join(
+            json.dumps({column: _plain(row[column]) for column in COLUMNS}) + '\n'
+            for row in batch
+        ).encode('utf-8')
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands back what was written since the last drain."""
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self) -> bytes:
+        data, self.parts = b''.join(self.parts), []
+        return data
+
+
+def encode_parquet(batches):
+    """One Parquet row group per batch. Requires pyarrow."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ('id', pa.int64()),
+        ('date', pa.date32()),
+        ('transaction_type', pa.string()),
+        ('amount', pa.decimal128(15, 2)),
+        ('account_currency', pa.string()),
+        ('currency', pa.string()),
+        ('original_amount', pa.decimal128(15, 2)),
+        ('exchange_rate', pa.decimal128(15, 7)),
+        ('account', pa.string()),
+        ('to_account', pa.string()),
+        ('to_amount', pa.decimal128(15, 2)),
+        ('category', pa.string()),
+        ('tags', pa.list_(pa.string())),
+        ('note', pa.string()),
+        ('created_at', pa.timestamp('us', tz='UTC')),
+    ])
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, schema, compression='zstd') as writer:
+        for batch in batches:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            yield sink.drain()
+    yield sink.drain()
+
+
+ENCODERS = {
+    'csv': encode_csv,
+    'jsonl': encode_jsonl,
+    'parquet': encode_parquet,
+}
+
+
+async def stream_export(user_id, export_format):
+    """Async generator of encoded export bytes for StreamingHttpResponse."""
+    batches = iter_export_batches(user_id)
+    chunks = ENCODERS[export_format](batches)
+
+    def close():
+        # Ends the reader's transaction if the client went away mid-stream
+        chunks.close()
+        batches.close()
+
+    # thread_sensitive keeps every step on the thread holding the open cursor
+    next_chunk = sync_to_async(lambda: next(chunks, None), thread_sensitive=True)
+    try:
+        while (chunk := await next_chunk()) is not None:
+            if chunk:
+                yield chunk
+    finally:
+        await sync_to_async(close, thread_sensitive=True)()
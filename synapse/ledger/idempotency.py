@@ -0,0 +1,130 @@
+import hashlib
+from datetime import timedelta
+from functools import wraps
+
+from accounts.schemas import ErrorResponse
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.http import JsonResponse
+from django.utils import timezone
+
+from .models import IdempotencyRecord
+
+IDEMPOTENCY_KEY_TTL = getattr(settings, "IDEMPOTENCY_KEY_TTL", 86400)
+
+
+KEY_REUSED = "Idempotency key was already used for a different request"
+
+
+def _cache_key(user_id, key: str) -> str:
+    # Client keys are arbitrary strings; hash them to keep Redis keys bounded.
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+    return f"idem:v2:{user_id}:{digest}"
+
+
+def request_hash(data: bytes) -> str:
+    """Fingerprint of a request body, stored with its idempotency record."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def same_request(record: IdempotencyRecord, route: str, body_hash: str) -> bool:
+    """Whether a stored key is being retried for the request it was recorded for."""
+    return record.route == route and record.request_hash == body_hash
+
+
+def lookup_response(user, key: str) -> IdempotencyRecord | None:
+    """
+    Return the stored record for an idempotency key, or None.
+
+    Checks Redis first and falls back to the idempotency_records table if
+    Redis misses or is down. Records older than IDEMPOTENCY_KEY_TTL are
+    expired in place so the key can be reused. A cached record is returned
+    unsaved, with only the fields needed to match and replay it.
+    """
+    cache_key = _cache_key(user.pk, key)
+    try:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return IdempotencyRecord(user=user, key=key, **cached)
+    except Exception:
+        pass
+
+    record = IdempotencyRecord.objects.filter(user=user, key=key).first()
+    if record is None:
+        return None
+    if record.created_at < timezone.now() - timedelta(seconds=IDEMPOTENCY_KEY_TTL):
+        record.delete()
+        return None
+
+    remember_response(record)
+    return record
+
+
+def remember_response(record: IdempotencyRecord) -> None:
+    """Cache a stored record in Redis, ignoring Redis errors."""
+    try:
+        cache.set(_cache_key(record.user_id, record.key), {
+            "route": record.route,
+            "request_hash": record.request_hash,
+            "status_code": record.status_code,
+            "response": record.response,
+        }, IDEMPOTENCY_KEY_TTL)
+    except Exception:
+        pass
+
+
+def _replay(record: IdempotencyRecord, route: str, body_hash: str):
+    if not same_request(record, route, body_hash):
+        return 422, ErrorResponse(detail=KEY_REUSED)
+    response = JsonResponse(record.response, status=record.status_code)
+    response["Idempotent-Replayed"] = "true"
+    return response
+
+
+def idempotent(view_func):
+    """
+    Honour an Idempotency-Key header on a ledger write endpoint.
+
+    A repeated key within IDEMPOTENCY_KEY_TTL returns the original response
+    without running the view. Successful responses are recorded in the same
+    database transaction as the write, so two concurrent requests with the
+    same key cannot both post. The record keeps the path and a hash of the
+    body; a key reused for another endpoint or payload (including a batch
+    mutation) gets a 422 instead of someone else's response.
+    """
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        key = request.headers.get("Idempotency-Key")
+        if not key:
+            return view_func(request, *args, **kwargs)
+        if len(key) > 255:
+            return 400, ErrorResponse(detail="Idempotency-Key must be at most 255 characters")
+
+        user = request.auth
+        route, body_hash = request.path, request_hash(request.body)
+        stored = lookup_response(user, key)
+        if stored is not None:
+            return _replay(stored, route, body_hash)
+
+        try:
+            with transaction.atomic():
+                status, body = view_func(request, *args, **kwargs)
+                if 200 <= status < 300:
+                    record = IdempotencyRecord.objects.create(
+                        user=user, key=key, route=route, request_hash=body_hash,
+                        status_code=status, response=body.model_dump(mode="json"),
+                    )
+        except IntegrityError:
+            # A concurrent request with the same key committed first
+            stored = lookup_response(user, key)
+            if stored is None:
+                raise
+            return _replay(stored, route, body_hash)
+
+        if 200 <= status < 300:
+            transaction.on_commit(lambda: remember_response(record))
+        return status, body
+
+    return wrapper
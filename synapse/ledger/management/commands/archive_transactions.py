@@ -0,0 +1,32 @@
+from datetime import date
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ledger.archive import archive_horizon, archive_transactions
+
+
+class Command(BaseCommand):
+    help = (
+        "Move transactions older than LEDGER_ARCHIVE_AFTER_DAYS into compressed "
+        "per-user monthly archive chunks with rollups."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database",
+            default="superuser" if "superuser" in settings.DATABASES else "default",
+            help="Database alias to use. Defaults to the superuser connection, which bypasses RLS.",
+        )
+        parser.add_argument(
+            "--before",
+            type=date.fromisoformat,
+            help="Archive months before this date (YYYY-MM-DD) instead of the configured horizon.",
+        )
+
+    def handle(self, *args, **options):
+        before = options["before"] or archive_horizon()
+        chunks, rows = archive_transactions(before, using=options["database"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {rows} transactions into {chunks} monthly chunks (before {before:%Y-%m})."
+        ))
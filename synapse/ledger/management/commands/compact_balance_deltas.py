@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ledger.balances import compact_balance_deltas
+
+
+class Command(BaseCommand):
+    help = (
+        "Fold pending account balance deltas (LEDGER_BALANCE_MODE = \"deltas\") "
+        "into the account balances. Also run it once after switching back to inline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database",
+            default="superuser" if "superuser" in settings.DATABASES else "default",
+            help="Database alias to use. Defaults to the superuser connection, which bypasses RLS.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of accounts compacted per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        compacted = compact_balance_deltas(using=options["database"], batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Compacted balance deltas of {compacted} accounts."))
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ledger.partitions import ensure_partitions
+
+
+class Command(BaseCommand):
+    help = "Create monthly partitions of the transactions table ahead of time (Postgres only)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database",
+            default="superuser" if "superuser" in settings.DATABASES else "default",
+            help="Database alias to use. Defaults to the superuser connection, which owns the table.",
+        )
+        parser.add_argument(
+            "--months-ahead",
+            type=int,
+            default=getattr(settings, "LEDGER_PARTITION_MONTHS_AHEAD", 3),
+            help="Make sure partitions exist up to this many months after the current one.",
+        )
+
+    def handle(self, *args, **options):
+        created = ensure_partitions(using=options["database"], months_ahead=options["months_ahead"])
+        for name in created:
+            self.stdout.write(f"Created {name}")
+        self.stdout.write(self.style.SUCCESS(f"Created {len(created)} transaction partitions."))
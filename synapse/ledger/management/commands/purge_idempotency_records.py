@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from ledger.idempotency import IDEMPOTENCY_KEY_TTL
+from ledger.models import IdempotencyRecord
+
+
+class Command(BaseCommand):
+    help = "Delete idempotency records older than IDEMPOTENCY_KEY_TTL."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database",
+            default="superuser" if "superuser" in settings.DATABASES else "default",
+            help="Database alias to use. Defaults to the superuser connection, which bypasses RLS.",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(seconds=IDEMPOTENCY_KEY_TTL)
+        deleted, _ = (
+            IdempotencyRecord.objects.using(options["database"])
+            .filter(created_at__lt=cutoff)
+            .delete()
+        )
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired idempotency records."))
@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ledger.balances import reconcile_balances
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute every account balance from its opening balance and the ledger, "
+        "report accounts that drifted and, with --fix, reset them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database",
+            default="superuser" if "superuser" in settings.DATABASES else "default",
+            help="Database alias to use. Defaults to the superuser connection, which bypasses RLS.",
+        )
+        parser.add_argument("--fix", action="store_true", help="Reset drifted balances to the recomputed value.")
+        parser.add_argument("--user", type=int, help="Only reconcile this user's accounts.")
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=10000,
+            help="Number of account ids checked per statement.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Number of account id ranges checked in parallel, each on its own connection.",
+        )
+
+    def handle(self, *args, **options):
+        def progress(checked, drifted):
+            self.stdout.write(f"Checked {checked} accounts, {drifted} drifted...")
+
+        checked, drifted = reconcile_balances(
+            using=options["database"],
+            fix=options["fix"],
+            chunk_size=options["chunk_size"],
+            workers=options["workers"],
+            user_id=options["user"],
+            progress=progress if options["verbosity"] > 1 else None,
+        )
+        for account_id, user_id, balance, expected in drifted:
+            self.stdout.write(
+                f"Account {account_id} (user {user_id}): balance {balance}, expected {expected} "
+                f"({expected - balance:+})"
+            )
+        action = "fixed" if options["fix"] else "found"
+        self.stdout.write(self.style.SUCCESS(
+            f"Checked {checked} accounts; {action} {len(drifted)} with drift."
+        ))
@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ledger.budgets import reconcile
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute budget spend counters from the ledger, report periods that drifted "
+        "and, with --fix, rewrite them. "
+        "Expenses in another currency count the amount stored when they were recorded, "
+        "or else are converted at the rate on their date."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database",
+            default="superuser" if "superuser" in settings.DATABASES else "default",
+            help="Database alias to use. Defaults to the superuser connection, which bypasses RLS.",
+        )
+        parser.add_argument("--fix", action="store_true", help="Rewrite drifted counters to the recomputed value.")
+        parser.add_argument("--user", type=int, help="Only reconcile this user's budgets.")
+
+    def handle(self, *args, **options):
+        checked, drifted = reconcile(
+            using=options["database"], user_id=options["user"], fix=options["fix"],
+        )
+        action = "fixed" if options["fix"] else "found"
+        self.stdout.write(self.style.SUCCESS(
+            f"Checked {checked} budget periods; {action} {drifted} with drift."
+        ))
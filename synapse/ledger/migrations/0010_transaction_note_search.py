@@ -0,0 +1,41 @@
+# Generated manually
+
+from django.db import connection, migrations
+
+
+def add_note_search(apps, schema_editor):
+    if connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute("""
+        ALTER TABLE transactions
+            ADD COLUMN note_search tsvector
+            GENERATED ALWAYS AS (to_tsvector('simple', coalesce(note, ''))) STORED
+    """)
+    schema_editor.execute(
+        "CREATE INDEX txn_note_search_idx ON transactions USING GIN (note_search)"
+    )
+    schema_editor.execute(
+        "CREATE INDEX txn_note_trgm_idx ON transactions USING GIN (note gin_trgm_ops)"
+    )
+
+
+def drop_note_search(apps, schema_editor):
+    if connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute("DROP INDEX IF EXISTS txn_note_trgm_idx")
+    schema_editor.execute("DROP INDEX IF EXISTS txn_note_search_idx")
+    schema_editor.execute("ALTER TABLE transactions DROP COLUMN IF EXISTS note_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ledger', '0009_transaction_txn_user_date_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_note_search, reverse_code=drop_note_search),
+    ]
@@ -0,0 +1,178 @@
+# Generated manually
+
+from datetime import date
+
+from django.db import migrations
+
+# Partitions created up front past the current month; later months are
+# added by ledger.partitions.ensure_partitions.
+MONTHS_AHEAD = 3
+
+RLS_POLICY = """
+    CREATE POLICY user_isolation_policy ON {table}
+        USING (user_id = current_setting('app.current_user_id', true)::int)
+"""
+
+
+def _enable_rls(schema_editor, table):
+    schema_editor.execute(f"ALTER TABLE {table} ENABLE ROW LEVEL SECURITY")
+    schema_editor.execute(f"ALTER TABLE {table} FORCE ROW LEVEL SECURITY")
+    schema_editor.execute(RLS_POLICY.format(table=table))
+
+
+def _add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _snapshot(cursor, table):
+    """Columns, secondary index definitions and outgoing FKs of `table`."""
+    cursor.execute(
+        """
+        SELECT column_name FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = %s AND is_generated = 'NEVER'
+        ORDER BY ordinal_position
+        """,
+        [table],
+    )
+    columns = ", ".join(f'"{row[0]}"' for row in cursor.fetchall())
+    cursor.execute(
+        "SELECT pg_get_indexdef(indexrelid) FROM pg_index "
+        "WHERE indrelid = %s::regclass AND NOT indisprimary",
+        [table],
+    )
+    indexes = [row[0] for row in cursor.fetchall()]
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = %s::regclass AND contype = 'f'",
+        [table],
+    )
+    foreign_keys = cursor.fetchall()
+    cursor.execute(
+        "SELECT GREATEST(coalesce(pg_sequence_last_value(pg_get_serial_sequence(%s, 'id')::regclass), 0), "
+        f"coalesce(max(id), 0)) FROM {table}",
+        [table],
+    )
+    last_id = cursor.fetchone()[0]
+    return columns, indexes, foreign_keys, last_id
+
+
+def _restore(schema_editor, indexes, foreign_keys):
+    for definition in indexes:
+        # Indexes on a partitioned table are reported as "ON ONLY <table>"
+        schema_editor.execute(definition.replace(" ON ONLY ", " ON ", 1))
+    for name, definition in foreign_keys:
+        schema_editor.execute(f"ALTER TABLE transactions ADD CONSTRAINT {name} {definition}")
+
+
+def partition_transactions(apps, schema_editor):
+    """
+    Rebuild `transactions` as a table range-partitioned by date.
+
+    The primary key becomes (id, date), as Postgres requires the partition
+    key in every unique constraint; ids still come from one sequence. For
+    the same reason transactions_tags can no longer hold a foreign key to
+    transactions(id) — Django deletes tag links itself when a transaction
+    is deleted. Existing rows are copied across, so this takes a lock on
+    the table for the duration of the copy.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        columns, indexes, foreign_keys, last_id = _snapshot(cursor, 'transactions')
+        cursor.execute(
+            "SELECT DISTINCT date_trunc('month', date)::date FROM transactions"
+        )
+        months = {row[0] for row in cursor.fetchall()}
+        cursor.execute(
+            "SELECT conrelid::regclass::text, conname FROM pg_constraint "
+            "WHERE confrelid = 'transactions'::regclass AND contype = 'f'"
+        )
+        incoming = cursor.fetchall()
+
+    current = date.today().replace(day=1)
+    months.update(_add_months(current, offset) for offset in range(MONTHS_AHEAD + 1))
+
+    for table, name in incoming:
+        schema_editor.execute(f"ALTER TABLE {table} DROP CONSTRAINT {name}")
+    schema_editor.execute("ALTER TABLE transactions RENAME TO transactions_unpartitioned")
+    # Frees the transactions_id_seq name for the new table's sequence
+    schema_editor.execute("ALTER TABLE transactions_unpartitioned ALTER COLUMN id DROP IDENTITY IF EXISTS")
+    schema_editor.execute("""
+        CREATE TABLE transactions (
+            LIKE transactions_unpartitioned
+            INCLUDING DEFAULTS INCLUDING GENERATED INCLUDING CONSTRAINTS INCLUDING STORAGE
+        ) PARTITION BY RANGE (date)
+    """)
+    schema_editor.execute("CREATE SEQUENCE transactions_id_seq AS bigint OWNED BY transactions.id")
+    schema_editor.execute(
+        "ALTER TABLE transactions ALTER COLUMN id SET DEFAULT nextval('transactions_id_seq')"
+    )
+    schema_editor.execute(
+        "SELECT setval('transactions_id_seq', %s, %s)", [max(last_id, 1), last_id > 0],
+    )
+
+    for month in sorted(months):
+        name = f"transactions_y{month.year}m{month.month:02d}"
+        schema_editor.execute(
+            f"CREATE TABLE {name} PARTITION OF transactions "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+        )
+        _enable_rls(schema_editor, name)
+    schema_editor.execute("CREATE TABLE transactions_default PARTITION OF transactions DEFAULT")
+    _enable_rls(schema_editor, "transactions_default")
+
+    schema_editor.execute(
+        f"INSERT INTO transactions ({columns}) SELECT {columns} FROM transactions_unpartitioned"
+    )
+    schema_editor.execute("DROP TABLE transactions_unpartitioned")
+
+    schema_editor.execute("ALTER TABLE transactions ADD PRIMARY KEY (id, date)")
+    _restore(schema_editor, indexes, foreign_keys)
+    _enable_rls(schema_editor, "transactions")
+
+
+def unpartition_transactions(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        columns, indexes, foreign_keys, last_id = _snapshot(cursor, 'transactions')
+
+    schema_editor.execute("ALTER TABLE transactions RENAME TO transactions_partitioned")
+    schema_editor.execute("""
+        CREATE TABLE transactions (
+            LIKE transactions_partitioned
+            INCLUDING GENERATED INCLUDING CONSTRAINTS INCLUDING STORAGE
+        )
+    """)
+    schema_editor.execute(
+        f"INSERT INTO transactions ({columns}) SELECT {columns} FROM transactions_partitioned"
+    )
+    # Drops every partition and the id sequence with it
+    schema_editor.execute("DROP TABLE transactions_partitioned CASCADE")
+
+    schema_editor.execute("ALTER TABLE transactions ADD PRIMARY KEY (id)")
+    schema_editor.execute("ALTER TABLE transactions ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY")
+    schema_editor.execute(
+        "SELECT setval(pg_get_serial_sequence('transactions', 'id'), %s, %s)",
+        [max(last_id, 1), last_id > 0],
+    )
+    _restore(schema_editor, indexes, foreign_keys)
+    schema_editor.execute("""
+        ALTER TABLE transactions_tags ADD CONSTRAINT transactions_tags_transaction_id_fk_transactions_id
+            FOREIGN KEY (transaction_id) REFERENCES transactions (id) DEFERRABLE INITIALLY DEFERRED
+    """)
+    _enable_rls(schema_editor, "transactions")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ledger', '0010_transaction_note_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_transactions, reverse_code=unpartition_transactions),
+    ]
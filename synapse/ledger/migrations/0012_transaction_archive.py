@@ -0,0 +1,48 @@
+# Generated by Django 6.1.2 on 2026-10-19 16:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ledger', '0011_partition_transactions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('transaction_type', models.CharField(choices=[('expense', 'Expense'), ('income', 'Income'), ('transfer', 'Transfer')], max_length=10)),
+                ('category_id', models.BigIntegerField(null=True)),
+                ('total', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('count', models.PositiveIntegerField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'transaction_archive_rollups',
+                'indexes': [models.Index(fields=['user', 'transaction_type', 'month'], name='archive_rollup_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedTransactionChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('row_count', models.PositiveIntegerField()),
+                ('data', models.BinaryField()),
+                ('archived_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_transaction_chunks', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'transaction_archive_chunks',
+                'ordering': ['-month'],
+                'unique_together': {('user', 'month')},
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated manually
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Index the tag side of the transaction/tag link table, so tag filters
+    and the spending-by-tag report read the transactions carrying a tag
+    straight from the index. The table's unique (transaction_id, tag_id)
+    constraint already covers lookups by transaction.
+    """
+
+    dependencies = [
+        ('ledger', '0015_enable_rls_budgets'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "CREATE INDEX transactions_tags_tag_txn_idx ON transactions_tags (tag_id, transaction_id)",
+            reverse_sql="DROP INDEX transactions_tags_tag_txn_idx",
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 6.1.2 on 2026-10-19 16:24
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Case, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+
+def backfill_opening_balance(apps, schema_editor):
+    """
+    Take current balances as correct and set opening_balance to whatever the
+    live transactions do not explain, in one UPDATE. Drift from before this
+    migration is folded in rather than reported.
+    """
+    Account = apps.get_model('ledger', 'Account')
+    Transaction = apps.get_model('ledger', 'Transaction')
+    using = schema_editor.connection.alias
+    money = models.DecimalField(max_digits=15, decimal_places=2)
+
+    def net(rows, group_by, amount):
+        return Coalesce(
+            Subquery(
+                rows.order_by().values(group_by).annotate(net=Sum(amount, output_field=money)).values('net'),
+                output_field=money,
+            ),
+            Value(Decimal(0)),
+            output_field=money,
+        )
+
+    transactions = Transaction.objects.using(using)
+    outgoing = net(
+        transactions.filter(account=OuterRef('pk')),
+        'account',
+        Case(When(transaction_type='income', then=F('amount')), default=-F('amount'), output_field=money),
+    )
+    incoming = net(
+        transactions.filter(to_account=OuterRef('pk'), transaction_type='transfer'), 'to_account', F('amount'),
+    )
+    Account.objects.using(using).update(opening_balance=F('balance') - outgoing - incoming)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ledger', '0016_transactions_tags_tag_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='account',
+            name='opening_balance',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=15),
+        ),
+        migrations.RunPython(backfill_opening_balance, reverse_code=migrations.RunPython.noop),
+    ]
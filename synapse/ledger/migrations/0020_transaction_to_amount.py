@@ -0,0 +1,18 @@
+# Generated by Django 6.1.2 on 2026-10-19 16:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ledger', '0019_enable_rls_account_balance_deltas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='to_amount',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text="Amount credited to to_account, in its currency, when that differs from the source account's.", max_digits=15, null=True),
+        ),
+    ]
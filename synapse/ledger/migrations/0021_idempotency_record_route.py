@@ -0,0 +1,23 @@
+# Generated by Django 6.1.2 on 2026-10-19 16:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ledger', '0020_transaction_to_amount'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='idempotencyrecord',
+            name='request_hash',
+            field=models.CharField(default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='idempotencyrecord',
+            name='route',
+            field=models.CharField(default='', max_length=255),
+        ),
+    ]
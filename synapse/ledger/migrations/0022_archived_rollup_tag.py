@@ -0,0 +1,54 @@
+# Generated by Django 6.1.2 on 2026-10-19 16:59
+
+import json
+import zlib
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def backfill_tag_rollups(apps, schema_editor):
+    """Add per-tag rollup rows for months archived before they existed."""
+    ArchivedRollup = apps.get_model('ledger', 'ArchivedRollup')
+    ArchivedTransactionChunk = apps.get_model('ledger', 'ArchivedTransactionChunk')
+    using = schema_editor.connection.alias
+
+    for chunk in ArchivedTransactionChunk.objects.using(using).iterator(chunk_size=100):
+        columns = json.loads(zlib.decompress(bytes(chunk.data)))['columns']
+        totals = defaultdict(lambda: [Decimal(0), 0])
+        for transaction_type, amount, tag_ids in zip(
+            columns['transaction_type'], columns['amount'], columns['tag_ids'],
+        ):
+            for tag_id in tag_ids:
+                bucket = totals[(transaction_type, tag_id)]
+                bucket[0] += Decimal(amount)
+                bucket[1] += 1
+        ArchivedRollup.objects.using(using).bulk_create([
+            ArchivedRollup(
+                user_id=chunk.user_id, month=chunk.month, transaction_type=transaction_type,
+                tag_id=tag_id, total=total, count=count,
+            )
+            for (transaction_type, tag_id), (total, count) in totals.items()
+        ])
+
+
+def drop_tag_rollups(apps, schema_editor):
+    ArchivedRollup = apps.get_model('ledger', 'ArchivedRollup')
+    ArchivedRollup.objects.using(schema_editor.connection.alias).filter(tag_id__isnull=False).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ledger', '0021_idempotency_record_route'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedrollup',
+            name='tag_id',
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.RunPython(backfill_tag_rollups, reverse_code=drop_tag_rollups),
+    ]
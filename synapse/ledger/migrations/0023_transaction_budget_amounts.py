@@ -0,0 +1,18 @@
+# Generated by Django 6.1.2 on 2026-10-19 17:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ledger', '0022_archived_rollup_tag'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='budget_amounts',
+            field=models.JSONField(blank=True, default=dict, help_text='Amount counted against budgets in other currencies, by budget currency, as a decimal string.'),
+        ),
+    ]
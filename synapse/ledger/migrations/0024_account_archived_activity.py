@@ -0,0 +1,50 @@
+# Generated by Django 6.1.2 on 2026-10-19 17:03
+
+import json
+import zlib
+from datetime import date
+
+from django.db import migrations, models
+
+
+def backfill_archived_activity(apps, schema_editor):
+    """Count the transactions already archived into each account's stats."""
+    Account = apps.get_model('ledger', 'Account')
+    ArchivedTransactionChunk = apps.get_model('ledger', 'ArchivedTransactionChunk')
+    using = schema_editor.connection.alias
+
+    activity = {}
+    for chunk in ArchivedTransactionChunk.objects.using(using).iterator(chunk_size=100):
+        columns = json.loads(zlib.decompress(bytes(chunk.data)))['columns']
+        for account_id, to_account_id, day in zip(
+            columns['account_id'], columns['to_account_id'], columns['date'],
+        ):
+            day = date.fromisoformat(day)
+            for touched in {account_id, to_account_id} - {None}:
+                count, last = activity.get(touched, (0, day))
+                activity[touched] = (count + 1, max(last, day))
+    for account_id, (count, last) in activity.items():
+        Account.objects.using(using).filter(id=account_id).update(
+            archived_count=count, archived_last_date=last,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ledger', '0023_transaction_budget_amounts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='account',
+            name='archived_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='account',
+            name='archived_last_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_archived_activity, reverse_code=migrations.RunPython.noop),
+    ]
@@ -1,5 +1,8 @@
+from decimal import Decimal
+
 from django.conf import settings
 from django.db import models
+from django.db.models.functions import Coalesce
 
 
 ACCOUNT_TYPES = (
@@ -15,6 +18,12 @@ CATEGORY_TYPES = (
     ('income', 'Income'),
 )
 
+BUDGET_PERIODS = (
+    ('week', 'Weekly'),
+    ('month', 'Monthly'),
+    ('year', 'Yearly'),
+)
+
 TRANSACTION_TYPES = (
     ('expense', 'Expense'),
     ('income', 'Income'),
@@ -22,6 +31,28 @@ TRANSACTION_TYPES = (
 )
 
 
+def pending_balance():
+    """
+    Expression for an account's balance deltas not yet compacted into
+    `balance` (LEDGER_BALANCE_MODE = "deltas"); 0 when there are none.
+    """
+    pending = (
+        AccountBalanceDelta.objects.filter(account=models.OuterRef('pk'))
+        .order_by()
+        .values('account')
+        .annotate(total=models.Sum('amount'))
+        .values('total')
+    )
+    money = models.DecimalField(max_digits=15, decimal_places=2)
+    return Coalesce(models.Subquery(pending, output_field=money), models.Value(Decimal(0)), output_field=money)
+
+
+class AccountQuerySet(models.QuerySet):
+    def with_pending_balance(self):
+        """Annotate `pending_balance`; balance + pending_balance is the current balance."""
+        return self.annotate(pending_balance=pending_balance())
+
+
 class Account(models.Model):
     """Financial account such as Checking, Savings, Credit Card, etc."""
 
@@ -33,6 +64,12 @@ class Account(models.Model):
     name = models.CharField(max_length=100)
     account_type = models.CharField(max_length=20, choices=ACCOUNT_TYPES)
     balance = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    # The part of `balance` not explained by rows in `transactions`: the
+    # starting balance plus archived history. See ledger/balances.py.
+    opening_balance = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    # Activity moved to the archive, kept for the account stats
+    archived_count = models.PositiveIntegerField(default=0)
+    archived_last_date = models.DateField(null=True, blank=True)
     currency = models.CharField(
         max_length=3, default=settings.DEFAULT_CURRENCY,
     )
@@ -41,8 +78,13 @@ class Account(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = AccountQuerySet.as_manager()
+
     class Meta:
         db_table = 'financial_accounts'
+        indexes = [
+            models.Index(fields=['user', 'updated_at'], name='account_user_updated_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.get_account_type_display()})"
@@ -63,10 +105,14 @@ class Category(models.Model):
     )
     is_archived = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = 'categories'
         verbose_name_plural = 'categories'
+        indexes = [
+            models.Index(fields=['user', 'updated_at'], name='category_user_updated_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.get_category_type_display()})"
@@ -82,9 +128,13 @@ class Tag(models.Model):
     )
     name = models.CharField(max_length=50)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = 'tags'
+        indexes = [
+            models.Index(fields=['user', 'updated_at'], name='tag_user_updated_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -130,6 +180,14 @@ class Transaction(models.Model):
         max_digits=15, decimal_places=7, null=True, blank=True,
         help_text="Exchange rate used at time of transaction.",
     )
+    to_amount = models.DecimalField(
+        max_digits=15, decimal_places=2, null=True, blank=True,
+        help_text="Amount credited to to_account, in its currency, when that differs from the source account's.",
+    )
+    budget_amounts = models.JSONField(
+        default=dict, blank=True,
+        help_text="Amount counted against budgets in other currencies, by budget currency, as a decimal string.",
+    )
     note = models.TextField(blank=True)
     date = models.DateField()
     tags = models.ManyToManyField(Tag, blank=True, related_name='transactions')
@@ -137,8 +195,174 @@ class Transaction(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
+        # Range-partitioned by date on Postgres, see ledger/partitions.py
         db_table = 'transactions'
         ordering = ['-date', '-created_at']
+        indexes = [
+            models.Index(fields=['user', 'updated_at'], name='txn_user_updated_idx'),
+            models.Index(fields=['user', '-date', '-id'], name='txn_user_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.get_transaction_type_display()}: {self.amount} on {self.date}"
+
+
+class Budget(models.Model):
+    """Spending limit for an expense category, renewed every week, month or year."""
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='budgets',
+    )
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        related_name='budgets',
+    )
+    period = models.CharField(max_length=5, choices=BUDGET_PERIODS, default='month')
+    amount = models.DecimalField(max_digits=15, decimal_places=2)
+    currency = models.CharField(
+        max_length=3, default=settings.DEFAULT_CURRENCY,
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'budgets'
+        unique_together = ('category', 'period')
+
+    def __str__(self):
+        return f"{self.category.name}: {self.amount} {self.currency} per {self.period}"
+
+
+class BudgetSpend(models.Model):
+    """
+    Spent-so-far counter for one budget period, kept up to date by every
+    expense write (see ledger/budgets.py).
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='budget_spend',
+    )
+    budget = models.ForeignKey(
+        Budget,
+        on_delete=models.CASCADE,
+        related_name='spend',
+    )
+    period_start = models.DateField()
+    spent = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+
+    class Meta:
+        db_table = 'budget_spend'
+        unique_together = ('budget', 'period_start')
+
+    def __str__(self):
+        return f"{self.budget_id} from {self.period_start}: {self.spent}"
+
+
+class ArchivedTransactionChunk(models.Model):
+    """
+    One user's transactions for one month, moved out of `transactions` by
+    archive_transactions. Rows are stored column-wise as zlib-compressed
+    JSON (see ledger/archive.py) and served read-only.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='archived_transaction_chunks',
+    )
+    month = models.DateField()
+    row_count = models.PositiveIntegerField()
+    data = models.BinaryField()
+    archived_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'transaction_archive_chunks'
+        ordering = ['-month']
+        unique_together = ('user', 'month')
+
+    def __str__(self):
+        return f"{self.month:%Y-%m} ({self.row_count} transactions)"
+
+
+class ArchivedRollup(models.Model):
+    """
+    Per-month totals of archived transactions by type and category, plus one
+    row per tag (tag_id set, category_id null) for the by-tag totals.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='archived_rollups',
+    )
+    month = models.DateField()
+    transaction_type = models.CharField(max_length=10, choices=TRANSACTION_TYPES)
+    # Not a foreign key: totals outlive the category, like the rows in the chunk
+    category_id = models.BigIntegerField(null=True)
+    tag_id = models.BigIntegerField(null=True)
+    total = models.DecimalField(max_digits=15, decimal_places=2)
+    count = models.PositiveIntegerField()
+
+    class Meta:
+        db_table = 'transaction_archive_rollups'
+        indexes = [
+            models.Index(fields=['user', 'transaction_type', 'month'], name='archive_rollup_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.month:%Y-%m} {self.transaction_type}: {self.total}"
+
+
+class AccountBalanceDelta(models.Model):
+    """
+    A balance change not yet folded into Account.balance. Written instead of
+    updating the account row when LEDGER_BALANCE_MODE is "deltas", and
+    compacted by ledger.balances.compact_balance_deltas.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='account_balance_deltas',
+    )
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='balance_deltas')
+    amount = models.DecimalField(max_digits=15, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'account_balance_deltas'
+        indexes = [
+            models.Index(fields=['account', 'created_at'], name='balance_delta_account_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.account_id}: {self.amount:+}"
+
+
+class IdempotencyRecord(models.Model):
+    """Stored result of a client write, keyed by its idempotency key, so retries replay it."""
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='idempotency_records',
+    )
+    key = models.CharField(max_length=255)
+    # Where the key was used and what was sent, so reuse elsewhere is rejected
+    route = models.CharField(max_length=255, default='')
+    request_hash = models.CharField(max_length=64, default='')
+    status_code = models.PositiveSmallIntegerField()
+    response = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'idempotency_records'
+        unique_together = ('user', 'key')
+
+    def __str__(self):
+        return f"{self.key} ({self.status_code})"
@@ -0,0 +1,139 @@
+"""
+Monthly range partitions for the transactions table (Postgres only).
+
+Migration 0011 turns `transactions` into a table partitioned by `date`,
+with one partition per month plus a DEFAULT partition that catches dates
+outside the created months. ensure_partitions() creates upcoming months
+ahead of time (scheduled daily as a task) so new rows land in their own
+partition; any rows already sitting in the default partition for that
+month are moved across. Every partition gets the same RLS policy as the
+parent, since queries against a partition directly do not go through the
+parent's policy.
+"""
+from datetime import date
+
+from django.conf import settings
+from django.db import connections, transaction
+
+PARENT = "transactions"
+DEFAULT_PARTITION = "transactions_default"
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT}_y{month.year}m{month.month:02d}"
+
+
+def enable_rls(cursor, table):
+    cursor.execute(f"ALTER TABLE {table} ENABLE ROW LEVEL SECURITY")
+    cursor.execute(f"ALTER TABLE {table} FORCE ROW LEVEL SECURITY")
+    cursor.execute(f"""
+        CREATE POLICY user_isolation_policy ON {table}
+            USING (user_id = current_setting('app.current_user_id', true)::int)
+    """)
+
+
+def is_partitioned(cursor) -> bool:
+    cursor.execute(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s))",
+        [PARENT],
+    )
+    return cursor.fetchone()[0]
+
+
+def existing_partitions(cursor) -> set[str]:
+    cursor.execute(
+        """
+        SELECT child.relname FROM pg_inherits
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE pg_inherits.inhparent = %s::regclass
+        """,
+        [PARENT],
+    )
+    return {row[0] for row in cursor.fetchall()}
+
+
+def _insertable_columns(cursor) -> str:
+    cursor.execute(
+        """
+        SELECT column_name FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = %s AND is_generated = 'NEVER'
+        ORDER BY ordinal_position
+        """,
+        [PARENT],
+    )
+    return ", ".join(f'"{row[0]}"' for row in cursor.fetchall())
+
+
+def create_partition(cursor, month: date, has_default=True) -> str:
+    """
+    Create the partition for `month`.
+
+    Postgres refuses to create a partition whose range already has rows in
+    the default partition, so those rows are moved into the new partition
+    while the default is briefly detached.
+    """
+    name = partition_name(month)
+    start, end = month.isoformat(), add_months(month, 1).isoformat()
+    moving = False
+    if has_default:
+        cursor.execute(
+            f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE date >= %s AND date < %s)",
+            [start, end],
+        )
+        moving = cursor.fetchone()[0]
+    if moving:
+        cursor.execute(f"ALTER TABLE {PARENT} DETACH PARTITION {DEFAULT_PARTITION}")
+
+    cursor.execute(
+        f"CREATE TABLE {name} PARTITION OF {PARENT} FOR VALUES FROM ('{start}') TO ('{end}')"
+    )
+    enable_rls(cursor, name)
+
+    if moving:
+        columns = _insertable_columns(cursor)
+        cursor.execute(
+            f"INSERT INTO {name} ({columns}) SELECT {columns} FROM {DEFAULT_PARTITION} "
+            "WHERE date >= %s AND date < %s",
+            [start, end],
+        )
+        cursor.execute(
+            f"DELETE FROM {DEFAULT_PARTITION} WHERE date >= %s AND date < %s", [start, end],
+        )
+        cursor.execute(f"ALTER TABLE {PARENT} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT")
+    return name
+
+
+def ensure_partitions(using="default", months_ahead=None, today=None) -> list[str]:
+    """
+    Create any missing partitions from the current month to `months_ahead`
+    months later and return their names. A no-op on other databases or
+    before the table has been partitioned.
+    """
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        return []
+    if months_ahead is None:
+        months_ahead = getattr(settings, "LEDGER_PARTITION_MONTHS_AHEAD", 3)
+    first = month_start(today or date.today())
+
+    created = []
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        if not is_partitioned(cursor):
+            return []
+        existing = existing_partitions(cursor)
+        for offset in range(months_ahead + 1):
+            month = add_months(first, offset)
+            if partition_name(month) not in existing:
+                created.append(
+                    create_partition(cursor, month, has_default=DEFAULT_PARTITION in existing)
+                )
+    return created
@@ -0,0 +1,27 @@
+"""Calendar periods shared by reports and budgets. Weeks start on Monday."""
+from datetime import date, timedelta
+
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek, TruncYear
+
+from .partitions import add_months
+
+# SQL equivalents of period_start, for GROUP BY
+TRUNCATE = {'day': TruncDay, 'week': TruncWeek, 'month': TruncMonth, 'year': TruncYear}
+
+
+def period_start(day: date, granularity: str) -> date:
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    if granularity == 'year':
+        return day.replace(month=1, day=1)
+    return day
+
+
+def next_period(start: date, granularity: str) -> date:
+    if granularity == 'month':
+        return add_months(start, 1)
+    if granularity == 'year':
+        return start.replace(year=start.year + 1)
+    return start + timedelta(days=7 if granularity == 'week' else 1)
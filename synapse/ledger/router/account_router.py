@@ -1,17 +1,61 @@
 from datetime import timedelta
-from typing import Optional
+from decimal import Decimal
+from typing import Literal, Optional
 
 from accounts.auth import JWTAuth
+from accounts.cache import bump_ledger_version
 from accounts.schemas import ErrorResponse
+from django.db.models import DateField, DecimalField, F, Func, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
 from django.utils import timezone
 from ninja import Router
 
-from ..models import Account
+from ..models import Account, Transaction
 from ..schemas import AccountResponse, CreateAccountRequest, UpdateAccountRequest
 
 router = Router(tags=["Accounts"])
 
 
+def _aggregate(qs, function, field, output_field):
+    """
+    Correlated scalar subquery applying an SQL aggregate to `qs`. Func
+    rather than Sum/Max/Count keeps Django from adding a GROUP BY, so the
+    subquery returns exactly one row per outer account.
+    """
+    return Subquery(
+        qs.order_by().values(result=Func(F(field), function=function, output_field=output_field)),
+        output_field=output_field,
+    )
+
+
+def _with_stats(qs, today):
+    """
+    Annotate accounts with the fields of AccountStatsResponse in the same
+    SELECT. Count and last activity add the archived history kept on the
+    account to the live rows.
+    """
+    touching = Transaction.objects.filter(Q(account=OuterRef('pk')) | Q(to_account=OuterRef('pk')))
+    month = Transaction.objects.filter(account=OuterRef('pk'), date__gte=today.replace(day=1), date__lte=today)
+    money = DecimalField(max_digits=15, decimal_places=2)
+    live_last = _aggregate(touching, 'MAX', 'date', DateField())
+    return qs.annotate(
+        # GREATEST returns NULL for any NULL argument outside Postgres
+        last_transaction_date=Greatest(
+            Coalesce(live_last, 'archived_last_date'), Coalesce('archived_last_date', live_last),
+            output_field=DateField(),
+        ),
+        transaction_count=_aggregate(touching, 'COUNT', 'id', IntegerField()) + F('archived_count'),
+        month_income=Coalesce(
+            _aggregate(month.filter(transaction_type='income'), 'SUM', 'amount', money),
+            Value(Decimal(0)), output_field=money,
+        ),
+        month_expense=Coalesce(
+            _aggregate(month.filter(transaction_type='expense'), 'SUM', 'amount', money),
+            Value(Decimal(0)), output_field=money,
+        ),
+    )
+
+
 @router.post(
     "/",
     response={201: AccountResponse, 400: ErrorResponse},
@@ -24,9 +68,11 @@ def create_account(request, payload: CreateAccountRequest):
         name=payload.name,
         account_type=payload.account_type,
         balance=payload.balance,
+        opening_balance=payload.balance,
         currency=payload.currency,
         icon=payload.icon,
     )
+    bump_ledger_version(request.auth.pk)
     return 201, AccountResponse.from_account(account)
 
 
@@ -34,10 +80,14 @@ def create_account(request, payload: CreateAccountRequest):
     "/",
     response={200: list[AccountResponse]},
     auth=JWTAuth(),
-    description="List all financial accounts for the current user.",
+    description=(
+        "List all financial accounts for the current user. "
+        "Pass include=stats to add last activity, month-to-date income and expense, "
+        "and transaction count to each account."
+    ),
 )
-def list_accounts(request, is_active: Optional[bool] = None):
-    qs = Account.objects.filter(user=request.auth)
+def list_accounts(request, is_active: Optional[bool] = None, include: Optional[Literal['stats']] = None):
+    qs = Account.objects.with_pending_balance().filter(user=request.auth)
     if is_active is not None:
         qs = qs.filter(is_active=is_active)
         # Only show accounts archived within the last 30 days
@@ -46,6 +96,8 @@ def list_accounts(request, is_active: Optional[bool] = None):
             qs = qs.filter(updated_at__gte=cutoff)
     else:
         qs = qs.filter(is_active=True)
+    if include == 'stats':
+        qs = _with_stats(qs, timezone.localdate())
     return 200, [AccountResponse.from_account(a) for a in qs]
 
 
@@ -57,7 +109,7 @@ def list_accounts(request, is_active: Optional[bool] = None):
 )
 def get_account(request, account_id: int):
     try:
-        account = Account.objects.get(id=account_id, user=request.auth)
+        account = Account.objects.with_pending_balance().get(id=account_id, user=request.auth)
     except Account.DoesNotExist:
         return 404, ErrorResponse(detail="Account not found")
     return 200, AccountResponse.from_account(account)
@@ -71,7 +123,7 @@ def get_account(request, account_id: int):
 )
 def update_account(request, account_id: int, payload: UpdateAccountRequest):
     try:
-        account = Account.objects.get(id=account_id, user=request.auth)
+        account = Account.objects.with_pending_balance().get(id=account_id, user=request.auth)
     except Account.DoesNotExist:
         return 404, ErrorResponse(detail="Account not found")
 
@@ -83,7 +135,8 @@ def update_account(request, account_id: int, payload: UpdateAccountRequest):
             update_fields.append(field)
 
     if update_fields:
-        account.save(update_fields=update_fields)
+        account.save(update_fields=update_fields + ["updated_at"])
+        bump_ledger_version(request.auth.pk)
 
     return 200, AccountResponse.from_account(account)
 
@@ -96,11 +149,12 @@ def update_account(request, account_id: int, payload: UpdateAccountRequest):
 )
 def archive_account(request, account_id: int):
     try:
-        account = Account.objects.get(id=account_id, user=request.auth)
+        account = Account.objects.with_pending_balance().get(id=account_id, user=request.auth)
     except Account.DoesNotExist:
         return 404, ErrorResponse(detail="Account not found")
     account.is_active = False
-    account.save(update_fields=["is_active"])
+    account.save(update_fields=["is_active", "updated_at"])
+    bump_ledger_version(request.auth.pk)
     return 200, AccountResponse.from_account(account)
 
 
@@ -112,9 +166,10 @@ def archive_account(request, account_id: int):
 )
 def restore_account(request, account_id: int):
     try:
-        account = Account.objects.get(id=account_id, user=request.auth)
+        account = Account.objects.with_pending_balance().get(id=account_id, user=request.auth)
     except Account.DoesNotExist:
         return 404, ErrorResponse(detail="Account not found")
     account.is_active = True
-    account.save(update_fields=["is_active"])
+    account.save(update_fields=["is_active", "updated_at"])
+    bump_ledger_version(request.auth.pk)
     return 200, AccountResponse.from_account(account)
@@ -0,0 +1,218 @@
+from datetime import timedelta
+
+from accounts.auth import JWTAuth
+from accounts.cache import bump_ledger_version
+from accounts.schemas import ErrorResponse
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from ninja import Router
+from sync.models import Tombstone
+
+from ..budgets import apply_spend_deltas, budgets_by_category, spend_deltas
+from ..idempotency import IDEMPOTENCY_KEY_TTL, KEY_REUSED, request_hash, same_request
+from ..models import Account, Category, IdempotencyRecord, Tag, Transaction
+from ..schemas import BatchRequest, BatchResponse, BatchResult, TransactionResponse
+from ..services import (
+    LedgerError,
+    apply_balance_deltas,
+    balance_deltas,
+    build_entry,
+    build_transfer,
+    merge_deltas,
+)
+
+router = Router(tags=["Batch"])
+
+LEDGER_BATCH_MAX_MUTATIONS = getattr(settings, "LEDGER_BATCH_MAX_MUTATIONS", 500)
+
+
+def _fingerprint(mutation) -> tuple[str, str]:
+    """(route, request hash) recorded with a mutation's idempotency key."""
+    return f"batch:{mutation.op}", request_hash(mutation.model_dump_json().encode("utf-8"))
+
+
+def _build(user, mutation, accounts, categories, rate_cache):
+    """Validate one create mutation against the prefetched rows and build its Transaction."""
+    if mutation.op == "transfer":
+        from_account = accounts.get(mutation.from_account_id)
+        if from_account is None:
+            raise LedgerError("Source account not found")
+        to_account = accounts.get(mutation.to_account_id)
+        if to_account is None:
+            raise LedgerError("Destination account not found")
+        return build_transfer(user, mutation, from_account, to_account, rate_cache)
+
+    account = accounts.get(mutation.account_id)
+    if account is None:
+        raise LedgerError("Account not found")
+    category = categories.get(mutation.category_id)
+    if category is None or category.category_type != mutation.op:
+        raise LedgerError(f"{mutation.op.capitalize()} category not found")
+    return build_entry(user, mutation.op, mutation, account, category, rate_cache)
+
+
+@router.post(
+    "",
+    response={200: BatchResponse, 400: ErrorResponse, 409: ErrorResponse},
+    auth=JWTAuth(),
+    description=(
+        "Apply an ordered list of queued expense, income, transfer and delete mutations "
+        "in one database transaction. Each mutation carries a client-generated "
+        "idempotency_key; keys already applied are replayed from the stored result, "
+        "and a key already used for a different mutation or endpoint gets status 422. "
+        "Balance changes are coalesced into one update per account. "
+        "Each result carries its own status — failed mutations do not block the rest."
+    ),
+)
+def apply_batch(request, payload: BatchRequest):
+    user = request.auth
+    mutations = payload.mutations
+
+    if len(mutations) > LEDGER_BATCH_MAX_MUTATIONS:
+        return 400, ErrorResponse(
+            detail=f"A batch may contain at most {LEDGER_BATCH_MAX_MUTATIONS} mutations"
+        )
+
+    keys = {m.idempotency_key for m in mutations}
+    IdempotencyRecord.objects.filter(
+        user=user, key__in=keys,
+        created_at__lt=timezone.now() - timedelta(seconds=IDEMPOTENCY_KEY_TTL),
+    ).delete()
+    stored = {r.key: r for r in IdempotencyRecord.objects.filter(user=user, key__in=keys)}
+
+    # Load every row the batch references with one query per table
+    account_ids, category_ids, tag_ids, delete_ids = set(), set(), set(), set()
+    for m in mutations:
+        if m.op == "delete":
+            delete_ids.add(m.transaction_id)
+            continue
+        if m.op == "transfer":
+            account_ids.update((m.from_account_id, m.to_account_id))
+        else:
+            account_ids.add(m.account_id)
+            category_ids.add(m.category_id)
+        tag_ids.update(m.tag_ids)
+
+    accounts = Account.objects.filter(user=user).in_bulk(account_ids)
+    categories = Category.objects.filter(user=user).in_bulk(category_ids)
+    owned_tag_ids = set(
+        Tag.objects.filter(user=user, id__in=tag_ids).values_list("id", flat=True)
+    )
+    deletable = Transaction.objects.filter(user=user).in_bulk(delete_ids)
+
+    results: list = [None] * len(mutations)
+    fingerprints = [_fingerprint(m) for m in mutations]
+    first_seen: dict[str, int] = {}
+    created: list[tuple[int, Transaction, list[int]]] = []
+    removed: list[tuple[int, Transaction]] = []
+    deltas: dict = {}
+    rate_cache: dict = {}
+
+    for i, m in enumerate(mutations):
+        key = m.idempotency_key
+        if key in stored:
+            record = stored[key]
+            if same_request(record, *fingerprints[i]):
+                results[i] = BatchResult(replayed=True, **record.response)
+            else:
+                results[i] = BatchResult(idempotency_key=key, status=422, detail=KEY_REUSED)
+            continue
+        if key in first_seen:
+            if fingerprints[first_seen[key]] != fingerprints[i]:
+                results[i] = BatchResult(idempotency_key=key, status=422, detail=KEY_REUSED)
+            continue  # repeated within this batch — filled in from the first occurrence below
+        first_seen[key] = i
+
+        if m.op == "delete":
+            txn = deletable.pop(m.transaction_id, None)
+            if txn is None:
+                results[i] = BatchResult(idempotency_key=key, status=404, detail="Transaction not found")
+                continue
+            merge_deltas(deltas, balance_deltas(txn, reverse=True))
+            removed.append((i, txn))
+            continue
+
+        try:
+            txn = _build(user, m, accounts, categories, rate_cache)
+        except LedgerError as e:
+            results[i] = BatchResult(idempotency_key=key, status=400, detail=str(e))
+            continue
+        merge_deltas(deltas, balance_deltas(txn))
+        created.append((i, txn, [t for t in dict.fromkeys(m.tag_ids) if t in owned_tag_ids]))
+
+    if created or removed:
+        budgets = budgets_by_category(
+            user.pk,
+            {txn.category_id for _, txn, _ in created} | {txn.category_id for _, txn in removed},
+        )
+        spend = {}
+        for _, txn, _ in created:
+            merge_deltas(spend, spend_deltas(txn, budgets, rate_cache))
+        for _, txn in removed:
+            merge_deltas(spend, spend_deltas(txn, budgets, rate_cache, reverse=True))
+
+        try:
+            with transaction.atomic():
+                apply_balance_deltas(deltas, user.pk)
+                apply_spend_deltas(spend)
+
+                Transaction.objects.bulk_create([txn for _, txn, _ in created])
+                TransactionTag = Transaction.tags.through
+                TransactionTag.objects.bulk_create([
+                    TransactionTag(transaction_id=txn.pk, tag_id=tag_id)
+                    for _, txn, txn_tag_ids in created
+                    for tag_id in txn_tag_ids
+                ])
+
+                Tombstone.objects.bulk_create([
+                    Tombstone(user=user, entity="transaction", object_id=txn.pk)
+                    for _, txn in removed
+                ])
+                Transaction.objects.filter(id__in=[txn.pk for _, txn in removed]).delete()
+
+                fresh = Transaction.objects.select_related(
+                    "account", "to_account", "category",
+                ).prefetch_related("tags").in_bulk([txn.pk for _, txn, _ in created])
+
+                for i, txn, _ in created:
+                    results[i] = BatchResult(
+                        idempotency_key=mutations[i].idempotency_key,
+                        status=201,
+                        transaction=TransactionResponse.from_transaction(fresh[txn.pk]),
+                    )
+                for i, _ in removed:
+                    results[i] = BatchResult(
+                        idempotency_key=mutations[i].idempotency_key,
+                        status=200,
+                        detail="Transaction deleted",
+                    )
+                written = [i for i, _, _ in created] + [i for i, _ in removed]
+                IdempotencyRecord.objects.bulk_create([
+                    _record(user, results[i], fingerprints[i]) for i in written
+                ])
+        except IntegrityError:
+            # Another request committed one of these keys first
+            return 409, ErrorResponse(detail="Batch is already being applied; retry to fetch its results")
+
+        bump_ledger_version(user.pk)
+
+    for i, m in enumerate(mutations):
+        if results[i] is None:
+            first = results[first_seen[m.idempotency_key]]
+            results[i] = first.model_copy(update={"replayed": True})
+
+    return 200, BatchResponse(results=results)
+
+
+def _record(user, result, fingerprint):
+    """Build the idempotency record that lets a retried key replay this result."""
+    route, body_hash = fingerprint
+    return IdempotencyRecord(
+        user=user,
+        key=result.idempotency_key,
+        route=route,
+        request_hash=body_hash,
+        status_code=result.status,
+        response=result.model_dump(mode="json", exclude={"replayed"}),
+    )
@@ -0,0 +1,135 @@
+from datetime import date
+from decimal import Decimal
+from typing import Optional
+
+from accounts.auth import JWTAuth
+from accounts.exchange_service import get_main_currency
+from accounts.schemas import ErrorResponse, MessageResponse
+from django.db import IntegrityError, transaction
+from django.db.models import Case, DateField, DecimalField, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from ninja import Router
+from synapse.constants import ALL_FIAT_CURRENCIES
+
+from ..budgets import period_end, seed_current_spend
+from ..models import BUDGET_PERIODS, Budget, BudgetSpend, Category
+from ..periods import period_start
+from ..schemas import BudgetResponse, CreateBudgetRequest, UpdateBudgetRequest
+
+router = Router(tags=["Budgets"])
+
+
+def _with_progress(qs, day):
+    """Annotate each budget with the counter for its period containing `day`, in the same query."""
+    current = Case(
+        *[When(period=period, then=Value(period_start(day, period))) for period, _ in BUDGET_PERIODS],
+        output_field=DateField(),
+    )
+    spent = BudgetSpend.objects.filter(
+        budget=OuterRef('pk'), period_start=OuterRef('current_start'),
+    ).values('spent')[:1]
+    return qs.select_related('category').annotate(
+        current_start=current,
+        spent=Coalesce(Subquery(spent), Value(Decimal(0)), output_field=DecimalField()),
+    )
+
+
+def _response(budget):
+    spent = Decimal(budget.spent).quantize(Decimal("0.01"))
+    return BudgetResponse(
+        id=budget.id,
+        category_id=budget.category_id,
+        category_name=budget.category.name,
+        category_icon=budget.category.icon or '',
+        period=budget.period,
+        amount=budget.amount,
+        currency=budget.currency,
+        period_start=budget.current_start,
+        period_end=period_end(budget.current_start, budget.period),
+        spent=spent,
+        remaining=budget.amount - spent,
+        progress=float(spent / budget.amount) if budget.amount else 0.0,
+    )
+
+
+@router.get(
+    "",
+    response={200: list[BudgetResponse]},
+    auth=JWTAuth(),
+    description=(
+        "List budgets with spending so far in the current week, month or year. "
+        "Pass `on` to see the periods containing another day."
+    ),
+)
+def list_budgets(request, on: Optional[date] = None):
+    day = on or timezone.localdate()
+    qs = _with_progress(Budget.objects.filter(user=request.auth), day).order_by('category__name', 'period')
+    return 200, [_response(b) for b in qs]
+
+
+@router.post(
+    "",
+    response={201: BudgetResponse, 400: ErrorResponse},
+    auth=JWTAuth(),
+    description=(
+        "Create a budget for an expense category. Spending already recorded "
+        "in the current period counts towards it."
+    ),
+)
+def create_budget(request, payload: CreateBudgetRequest):
+    user = request.auth
+    if payload.amount <= 0:
+        return 400, ErrorResponse(detail="Budget amount must be positive")
+    currency = payload.currency or get_main_currency(user)
+    if currency not in ALL_FIAT_CURRENCIES:
+        return 400, ErrorResponse(detail=f"Invalid currency: {currency}")
+
+    try:
+        category = Category.objects.get(id=payload.category_id, user=user, category_type='expense')
+    except Category.DoesNotExist:
+        return 400, ErrorResponse(detail="Expense category not found")
+
+    today = timezone.localdate()
+    try:
+        with transaction.atomic():
+            budget = Budget.objects.create(
+                user=user, category=category, period=payload.period,
+                amount=payload.amount, currency=currency,
+            )
+            seed_current_spend(budget, today)
+    except IntegrityError:
+        return 400, ErrorResponse(detail=f"This category already has a {payload.period}ly budget")
+
+    return 201, _response(_with_progress(Budget.objects.filter(pk=budget.pk), today).get())
+
+
+@router.put(
+    "/{budget_id}",
+    response={200: BudgetResponse, 400: ErrorResponse, 404: ErrorResponse},
+    auth=JWTAuth(),
+    description="Change a budget's amount.",
+)
+def update_budget(request, budget_id: int, payload: UpdateBudgetRequest):
+    if payload.amount <= 0:
+        return 400, ErrorResponse(detail="Budget amount must be positive")
+    updated = Budget.objects.filter(id=budget_id, user=request.auth).update(
+        amount=payload.amount, updated_at=timezone.now(),
+    )
+    if not updated:
+        return 404, ErrorResponse(detail="Budget not found")
+    budget = _with_progress(Budget.objects.filter(pk=budget_id), timezone.localdate()).get()
+    return 200, _response(budget)
+
+
+@router.delete(
+    "/{budget_id}",
+    response={200: MessageResponse, 404: ErrorResponse},
+    auth=JWTAuth(),
+    description="Delete a budget and its spending history.",
+)
+def delete_budget(request, budget_id: int):
+    deleted, _ = Budget.objects.filter(id=budget_id, user=request.auth).delete()
+    if not deleted:
+        return 404, ErrorResponse(detail="Budget not found")
+    return 200, MessageResponse(message="Budget deleted")
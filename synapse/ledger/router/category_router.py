@@ -1,6 +1,7 @@
 from typing import Optional
 
 from accounts.auth import JWTAuth
+from accounts.cache import bump_ledger_version
 from ninja import Router
 
 from accounts.schemas import ErrorResponse
@@ -24,6 +25,7 @@ def create_category(request, payload: CreateCategoryRequest):
         icon=payload.icon,
         category_type=payload.category_type,
     )
+    bump_ledger_version(request.auth.pk)
     return 201, CategoryResponse.from_category(category)
 
 
@@ -58,7 +60,8 @@ def archive_category(request, category_id: int):
     except Category.DoesNotExist:
         return 404, {"detail": "Category not found."}
     category.is_archived = True
-    category.save(update_fields=["is_archived"])
+    category.save(update_fields=["is_archived", "updated_at"])
+    bump_ledger_version(request.auth.pk)
     return 200, CategoryResponse.from_category(category)
 
 
@@ -74,5 +77,6 @@ def restore_category(request, category_id: int):
     except Category.DoesNotExist:
         return 404, {"detail": "Category not found."}
     category.is_archived = False
-    category.save(update_fields=["is_archived"])
+    category.save(update_fields=["is_archived", "updated_at"])
+    bump_ledger_version(request.auth.pk)
     return 200, CategoryResponse.from_category(category)
@@ -0,0 +1,37 @@
+from typing import Literal
+
+from accounts.auth import JWTAuth
+from accounts.schemas import ErrorResponse
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from ninja import Query, Router
+
+from ..export import CONTENT_TYPES, parquet_available, stream_export
+
+router = Router(tags=["Export"])
+
+
+@router.get(
+    "",
+    response={200: None, 400: ErrorResponse},
+    auth=JWTAuth(),
+    description=(
+        "Download every transaction, including archived history, as csv (default), "
+        "jsonl or parquet. Rows are oldest first and include account, category and tag "
+        "names and the original currency fields. The body is streamed as it is read."
+    ),
+)
+def export_ledger(
+    request,
+    export_format: Literal["csv", "jsonl", "parquet"] = Query("csv", alias="format"),
+):
+    if export_format == "parquet" and not parquet_available():
+        return 400, ErrorResponse(detail="Parquet export is not available on this server")
+
+    response = StreamingHttpResponse(
+        stream_export(request.auth.pk, export_format),
+        content_type=CONTENT_TYPES[export_format],
+    )
+    filename = f"synapse-ledger-{timezone.localdate():%Y-%m-%d}.{export_format}"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
@@ -1,7 +1,11 @@
 from ninja import Router
 
 from .account_router import router as account_router
+from .batch_router import router as batch_router
+from .budget_router import router as budget_router
 from .category_router import router as category_router
+from .export_router import router as export_router
+from .report_router import router as report_router
 from .tag_router import router as tag_router
 from .transaction_router import router as transaction_router
 
@@ -11,3 +15,7 @@ router.add_router("/accounts", account_router)
 router.add_router("/categories", category_router)
 router.add_router("/tags", tag_router)
 router.add_router("/transactions", transaction_router)
+router.add_router("/batch", batch_router)
+router.add_router("/budgets", budget_router)
+router.add_router("/export", export_router)
+router.add_router("/reports", report_router)
@@ -0,0 +1,130 @@
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Literal, Optional
+
+from accounts.auth import JWTAuth
+from accounts.exchange_service import get_main_currency, get_rate_history, get_rates
+from accounts.schemas import ErrorResponse
+from django.db.models import Sum
+from django.utils import timezone
+from ninja import Query, Router
+
+from .. import archive
+from ..models import Account, Transaction
+from ..partitions import add_months
+from ..periods import TRUNCATE, next_period, period_start
+from ..schemas import CashFlowPeriodResponse, CashFlowResponse
+
+router = Router(tags=["Reports"])
+
+CASH_FLOW_MAX_PERIODS = 366
+
+
+def _default_from(date_to: date, granularity: str) -> date:
+    """Twelve months, twelve weeks or thirty days ending with date_to."""
+    if granularity == 'month':
+        return add_months(date_to.replace(day=1), -11)
+    if granularity == 'week':
+        return period_start(date_to, 'week') - timedelta(weeks=11)
+    return date_to - timedelta(days=29)
+
+
+@router.get(
+    "/cash-flow",
+    response={200: CashFlowResponse, 400: ErrorResponse},
+    auth=JWTAuth(),
+    description=(
+        "Income, expense, net and transfer totals per day, week or month, converted "
+        "to the main currency at the rate in effect on each transaction's date "
+        "(the latest rate where no history is stored). Defaults to the last 12 months, 12 weeks or 30 days "
+        "up to today. Every period in the range is listed, including empty ones."
+    ),
+)
+def cash_flow(
+    request,
+    granularity: Literal['day', 'week', 'month'] = 'month',
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+):
+    user = request.auth
+    date_to = date_to or timezone.localdate()
+    date_from = date_from or _default_from(date_to, granularity)
+    if date_from > date_to:
+        return 400, ErrorResponse(detail="'from' must not be after 'to'")
+
+    periods = []
+    start = period_start(date_from, granularity)
+    while start <= date_to:
+        periods.append(start)
+        if len(periods) > CASH_FLOW_MAX_PERIODS:
+            return 400, ErrorResponse(
+                detail=f"Range covers more than {CASH_FLOW_MAX_PERIODS} periods; use a coarser granularity",
+            )
+        start = next_period(start, granularity)
+
+    # {(day, transaction_type, account currency): total}
+    totals = defaultdict(Decimal)
+    rows = (
+        Transaction.objects.filter(user=user, date__gte=date_from, date__lte=date_to)
+        .values('date', 'transaction_type', 'account__currency')
+        .annotate(total=Sum('amount'))
+        .order_by()
+    )
+    for row in rows:
+        totals[(row['date'], row['transaction_type'], row['account__currency'])] += row['total']
+
+    archived = list(archive.archived_rows(user, date_from=date_from, date_to=date_to))
+    if archived:
+        currencies = dict(Account.objects.filter(user=user).values_list('id', 'currency'))
+        for row in archived:
+            currency = currencies.get(row['account_id'])
+            if currency is not None:
+                totals[(row['date'], row['transaction_type'], currency)] += row['amount']
+
+    main_currency = get_main_currency(user)
+    currencies = {currency for _, _, currency in totals}
+    today = timezone.localdate()
+    # Every point-in-time rate the range needs, in one query
+    history = get_rate_history(currencies, main_currency, date_from, min(date_to, today))
+    latest = get_rates(currencies, main_currency)
+
+    # Each day is converted at its own rate, then rolled up into its period
+    converted = defaultdict(lambda: defaultdict(Decimal))
+    unconverted = set()
+    for (day, transaction_type, currency), total in totals.items():
+        rate = history.rate(currency, min(day, today)) or latest.get(currency)
+        if rate is None:
+            unconverted.add(currency)
+            continue
+        converted[period_start(day, granularity)][transaction_type] += total * rate
+
+    def money(value):
+        return value.quantize(Decimal("0.01"))
+
+    results = []
+    for period in periods:
+        by_type = converted.get(period, {})
+        income = money(by_type.get('income', Decimal(0)))
+        expense = money(by_type.get('expense', Decimal(0)))
+        results.append(CashFlowPeriodResponse(
+            period_start=period,
+            income=income,
+            expense=expense,
+            net=income - expense,
+            transfers=money(by_type.get('transfer', Decimal(0))),
+        ))
+
+    income = sum((p.income for p in results), Decimal(0))
+    expense = sum((p.expense for p in results), Decimal(0))
+    return 200, CashFlowResponse(
+        currency=main_currency,
+        granularity=granularity,
+        date_from=date_from,
+        date_to=date_to,
+        income=income,
+        expense=expense,
+        net=income - expense,
+        unconverted_currencies=sorted(unconverted),
+        periods=results,
+    )
@@ -1,4 +1,5 @@
 from accounts.auth import JWTAuth
+from accounts.cache import bump_ledger_version
 from ninja import Router
 
 from ..models import Tag
@@ -15,6 +16,7 @@ router = Router(tags=["Tags"])
 )
 def create_tag(request, payload: CreateTagRequest):
     tag = Tag.objects.create(user=request.auth, name=payload.name)
+    bump_ledger_version(request.auth.pk)
     return 201, TagResponse.from_tag(tag)
 
 
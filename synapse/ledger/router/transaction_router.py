@@ -1,13 +1,15 @@
 from datetime import date
-from typing import Optional
+from typing import Literal, Optional
 
 from accounts.auth import JWTAuth
-from accounts.exchange_service import convert_amount
+from accounts.cache import bump_ledger_version
 from accounts.schemas import ErrorResponse, MessageResponse
 from django.db import transaction
-from django.db.models import F, Sum
-from ninja import Router
+from django.db.models import Count, Q, Sum
+from ninja import Query, Router
 
+from .. import archive, search
+from ..idempotency import idempotent
 from ..models import Account, Category, Tag, Transaction
 from ..schemas import (
     CategorySpendingResponse,
@@ -15,18 +17,75 @@ from ..schemas import (
     CreateExpenseRequest,
     CreateIncomeRequest,
     CreateTransferRequest,
+    TagSpendingResponse,
+    TransactionPageResponse,
     TransactionResponse,
 )
+from ..services import (
+    LedgerError,
+    build_entry,
+    build_transfer,
+    post_transaction,
+    remove_transaction,
+)
 
 router = Router(tags=["Transactions"])
 
+SEARCH_MAX_LIMIT = 200
+
+TagMatch = Literal['any', 'all']
+
+TransactionTags = Transaction.tags.through
+
+
+def _tagged(tag_ids, match_all=False):
+    """
+    Subquery of transaction ids carrying any (or all) of `tag_ids`. It is
+    answered from the (tag_id, transaction_id) index on the link table, so
+    the cost follows the number of tagged rows rather than the history.
+    """
+    links = TransactionTags.objects.filter(tag_id__in=tag_ids)
+    if match_all:
+        links = (
+            links.values('transaction_id')
+            .annotate(matched=Count('tag_id', distinct=True))
+            .filter(matched=len(set(tag_ids)))
+        )
+    return links.values('transaction_id')
+
+
+def _apply_filters(
+    qs, transaction_type, account_id, category_id, date_from, date_to, tag_ids=None, tag_match='any',
+):
+    """Apply the optional list filters shared by list and search endpoints."""
+    if transaction_type:
+        qs = qs.filter(transaction_type=transaction_type)
+    if account_id:
+        qs = qs.filter(account_id=account_id)
+    if category_id:
+        qs = qs.filter(category_id=category_id)
+    if date_from:
+        qs = qs.filter(date__gte=date_from)
+    if date_to:
+        qs = qs.filter(date__lte=date_to)
+    if tag_ids:
+        qs = qs.filter(id__in=_tagged(tag_ids, tag_match == 'all'))
+    return qs
+
+
+def _decode_cursor(cursor: str) -> tuple[date, int]:
+    """Parse a keyset cursor of the form '<date>_<id>'. Raises ValueError if malformed."""
+    cursor_date, _, cursor_id = cursor.partition("_")
+    return date.fromisoformat(cursor_date), int(cursor_id)
+
 
 @router.post(
     "/expense",
-    response={201: TransactionResponse, 400: ErrorResponse},
+    response={201: TransactionResponse, 400: ErrorResponse, 422: ErrorResponse},
     auth=JWTAuth(),
     description="Record an expense — deducts amount from the specified account.",
 )
+@idempotent
 def create_expense(request, payload: CreateExpenseRequest):
     user = request.auth
 
@@ -42,51 +101,26 @@ def create_expense(request, payload: CreateExpenseRequest):
     except Category.DoesNotExist:
         return 400, ErrorResponse(detail="Expense category not found")
 
-    # Determine currency and conversion
-    txn_currency = payload.currency or account.currency
-    balance_amount = payload.amount
-    original_amount = None
-    exchange_rate_val = None
-
-    if txn_currency != account.currency:
-        result = convert_amount(payload.amount, txn_currency, account.currency)
-        if result is None:
-            return 400, ErrorResponse(
-                detail=f"Exchange rate not available for {txn_currency} to {account.currency}"
-            )
-        balance_amount, exchange_rate_val = result
-        original_amount = payload.amount
+    try:
+        txn = build_entry(user, 'expense', payload, account, category)
+    except LedgerError as e:
+        return 400, ErrorResponse(detail=str(e))
 
     with transaction.atomic():
-        Account.objects.filter(id=account.pk).update(
-            balance=F('balance') - balance_amount,
-        )
-        txn = Transaction.objects.create(
-            user=user,
-            transaction_type='expense',
-            amount=balance_amount,
-            currency=txn_currency,
-            original_amount=original_amount,
-            exchange_rate=exchange_rate_val,
-            account=account,
-            category=category,
-            note=payload.note,
-            date=payload.date,
-        )
-        if payload.tag_ids:
-            tags = Tag.objects.filter(id__in=payload.tag_ids, user=user)
-            txn.tags.set(tags)
+        post_transaction(txn, payload.tag_ids)
 
+    bump_ledger_version(user.pk)
     txn.refresh_from_db()
     return 201, TransactionResponse.from_transaction(txn)
 
 
 @router.post(
     "/income",
-    response={201: TransactionResponse, 400: ErrorResponse},
+    response={201: TransactionResponse, 400: ErrorResponse, 422: ErrorResponse},
     auth=JWTAuth(),
     description="Record income — adds amount to the specified account.",
 )
+@idempotent
 def create_income(request, payload: CreateIncomeRequest):
     user = request.auth
 
@@ -102,51 +136,26 @@ def create_income(request, payload: CreateIncomeRequest):
     except Category.DoesNotExist:
         return 400, ErrorResponse(detail="Income category not found")
 
-    # Determine currency and conversion
-    txn_currency = payload.currency or account.currency
-    balance_amount = payload.amount
-    original_amount = None
-    exchange_rate_val = None
-
-    if txn_currency != account.currency:
-        result = convert_amount(payload.amount, txn_currency, account.currency)
-        if result is None:
-            return 400, ErrorResponse(
-                detail=f"Exchange rate not available for {txn_currency} to {account.currency}"
-            )
-        balance_amount, exchange_rate_val = result
-        original_amount = payload.amount
+    try:
+        txn = build_entry(user, 'income', payload, account, category)
+    except LedgerError as e:
+        return 400, ErrorResponse(detail=str(e))
 
     with transaction.atomic():
-        Account.objects.filter(id=account.pk).update(
-            balance=F('balance') + balance_amount,
-        )
-        txn = Transaction.objects.create(
-            user=user,
-            transaction_type='income',
-            amount=balance_amount,
-            currency=txn_currency,
-            original_amount=original_amount,
-            exchange_rate=exchange_rate_val,
-            account=account,
-            category=category,
-            note=payload.note,
-            date=payload.date,
-        )
-        if payload.tag_ids:
-            tags = Tag.objects.filter(id__in=payload.tag_ids, user=user)
-            txn.tags.set(tags)
+        post_transaction(txn, payload.tag_ids)
 
+    bump_ledger_version(user.pk)
     txn.refresh_from_db()
     return 201, TransactionResponse.from_transaction(txn)
 
 
 @router.post(
     "/transfer",
-    response={201: TransactionResponse, 400: ErrorResponse},
+    response={201: TransactionResponse, 400: ErrorResponse, 422: ErrorResponse},
     auth=JWTAuth(),
     description="Transfer money between two accounts — deducts from source, adds to destination.",
 )
+@idempotent
 def create_transfer(request, payload: CreateTransferRequest):
     user = request.auth
 
@@ -160,29 +169,15 @@ def create_transfer(request, payload: CreateTransferRequest):
     except Account.DoesNotExist:
         return 400, ErrorResponse(detail="Destination account not found")
 
-    if from_account.pk == to_account.pk:
-        return 400, ErrorResponse(detail="Cannot transfer to the same account")
+    try:
+        txn = build_transfer(user, payload, from_account, to_account)
+    except LedgerError as e:
+        return 400, ErrorResponse(detail=str(e))
 
     with transaction.atomic():
-        Account.objects.filter(id=from_account.pk).update(
-            balance=F('balance') - payload.amount,
-        )
-        Account.objects.filter(id=to_account.pk).update(
-            balance=F('balance') + payload.amount,
-        )
-        txn = Transaction.objects.create(
-            user=user,
-            transaction_type='transfer',
-            amount=payload.amount,
-            account=from_account,
-            to_account=to_account,
-            note=payload.note,
-            date=payload.date,
-        )
-        if payload.tag_ids:
-            tags = Tag.objects.filter(id__in=payload.tag_ids, user=user)
-            txn.tags.set(tags)
+        post_transaction(txn, payload.tag_ids)
 
+    bump_ledger_version(user.pk)
     txn.refresh_from_db()
     return 201, TransactionResponse.from_transaction(txn)
 
@@ -194,7 +189,9 @@ def create_transfer(request, payload: CreateTransferRequest):
     description=(
         "List transactions for the current user. "
         "Filter by transaction_type (expense/income/transfer), "
-        "account_id, category_id, or date range (date_from, date_to)."
+        "account_id, category_id, date range (date_from, date_to), "
+        "or tags: repeat tag_ids and set tag_match to any (default) or all. "
+        "Archived months are included when date_from is given, or with include_archived=true."
     ),
 )
 def list_transactions(
@@ -204,23 +201,82 @@ def list_transactions(
     category_id: Optional[int] = None,
     date_from: Optional[date] = None,
     date_to: Optional[date] = None,
+    tag_ids: list[int] = Query(None),
+    tag_match: TagMatch = 'any',
+    include_archived: bool = False,
 ):
     qs = Transaction.objects.filter(user=request.auth).select_related(
         'account', 'to_account', 'category',
     ).prefetch_related('tags')
+    qs = _apply_filters(qs, transaction_type, account_id, category_id, date_from, date_to, tag_ids, tag_match)
+    results = list(qs)
+
+    # Without a start date every archive chunk would be decompressed; make that opt-in
+    archived = []
+    if date_from or include_archived:
+        archived = archive.archived_transactions(
+            request.auth, transaction_type, account_id, category_id, date_from, date_to,
+            tag_ids, tag_match == 'all',
+        )
+    if archived:
+        results = sorted(results + archived, key=lambda t: (t.date, t.created_at), reverse=True)
+
+    return 200, [TransactionResponse.from_transaction(t) for t in results]
 
-    if transaction_type:
-        qs = qs.filter(transaction_type=transaction_type)
-    if account_id:
-        qs = qs.filter(account_id=account_id)
-    if category_id:
-        qs = qs.filter(category_id=category_id)
-    if date_from:
-        qs = qs.filter(date__gte=date_from)
-    if date_to:
-        qs = qs.filter(date__lte=date_to)
 
-    return 200, [TransactionResponse.from_transaction(t) for t in qs]
+@router.get(
+    "/search",
+    response={200: TransactionPageResponse, 400: ErrorResponse},
+    auth=JWTAuth(),
+    description=(
+        "Search transaction notes. Matches whole words (websearch syntax) or substrings. "
+        "Accepts the same filters as the transaction list. "
+        "Results are newest first; pass next_cursor as cursor to fetch the next page."
+    ),
+)
+def search_transactions(
+    request,
+    q: str,
+    transaction_type: Optional[str] = None,
+    account_id: Optional[int] = None,
+    category_id: Optional[int] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    tag_ids: list[int] = Query(None),
+    tag_match: TagMatch = 'any',
+    cursor: Optional[str] = None,
+    limit: int = 50,
+):
+    q = q.strip()
+    if not q:
+        return 400, ErrorResponse(detail="Search query must not be empty")
+    limit = max(1, min(limit, SEARCH_MAX_LIMIT))
+
+    qs = Transaction.objects.filter(user=request.auth)
+    qs = _apply_filters(qs, transaction_type, account_id, category_id, date_from, date_to, tag_ids, tag_match)
+    qs = search.search_transactions(qs, q)
+
+    if cursor:
+        try:
+            cursor_date, cursor_id = _decode_cursor(cursor)
+        except ValueError:
+            return 400, ErrorResponse(detail="Invalid cursor")
+        qs = qs.filter(Q(date__lt=cursor_date) | Q(date=cursor_date, id__lt=cursor_id))
+
+    page = list(
+        qs.select_related('account', 'to_account', 'category')
+        .prefetch_related('tags')
+        .order_by('-date', '-id')[:limit + 1]
+    )
+    next_cursor = None
+    if len(page) > limit:
+        page = page[:limit]
+        next_cursor = f"{page[-1].date.isoformat()}_{page[-1].id}"
+
+    return 200, TransactionPageResponse(
+        results=[TransactionResponse.from_transaction(t) for t in page],
+        next_cursor=next_cursor,
+    )
 
 
 @router.get(
@@ -230,7 +286,8 @@ def list_transactions(
     description=(
         "Return total spending grouped by category, ordered highest to lowest. "
         "Filter by transaction_type (expense or income, defaults to expense). "
-        "Optionally filter by date range (date_from, date_to)."
+        "Optionally filter by date range (date_from, date_to). "
+        "Archived months are always included, read from their monthly rollups."
     ),
 )
 def spending_by_category(
@@ -255,8 +312,8 @@ def spending_by_category(
         .order_by('-total')
     )
 
-    return 200, [
-        CategorySpendingResponse(
+    results = {
+        r['category__id']: CategorySpendingResponse(
             category_id=r['category__id'],
             category_name=r['category__name'],
             category_icon=r['category__icon'] or '',
@@ -264,7 +321,70 @@ def spending_by_category(
         )
         for r in rows
         if r['category__id'] is not None
+    }
+
+    archived = archive.archived_category_totals(request.auth, transaction_type, date_from, date_to)
+    if not archived:
+        return 200, list(results.values())
+
+    # Archived totals may name categories with no spending left in the hot table
+    for category in Category.objects.filter(user=request.auth, id__in=set(archived) - set(results)):
+        results[category.id] = CategorySpendingResponse(
+            category_id=category.id,
+            category_name=category.name,
+            category_icon=category.icon or '',
+            total=0,
+        )
+    for category_id, total in archived.items():
+        if category_id in results:
+            results[category_id].total += total
+    return 200, sorted(results.values(), key=lambda r: r.total, reverse=True)
+
+
+@router.get(
+    "/spending-by-tag",
+    response={200: list[TagSpendingResponse]},
+    auth=JWTAuth(),
+    description=(
+        "Return total amount and transaction count per tag, ordered highest to lowest. "
+        "A transaction counts towards each of its tags. "
+        "Filter by transaction_type (defaults to expense) and date range (date_from, date_to). "
+        "Archived months are always included, read from their monthly rollups."
+    ),
+)
+def spending_by_tag(
+    request,
+    transaction_type: str = 'expense',
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+):
+    # Grouped over the link table, so untagged transactions are never read
+    links = TransactionTags.objects.filter(
+        transaction__user=request.auth,
+        transaction__transaction_type=transaction_type,
+    )
+    if date_from:
+        links = links.filter(transaction__date__gte=date_from)
+    if date_to:
+        links = links.filter(transaction__date__lte=date_to)
+
+    totals = {
+        r['tag_id']: [r['total'], r['count']]
+        for r in links.values('tag_id').annotate(total=Sum('transaction__amount'), count=Count('*')).order_by()
+    }
+    for tag_id, (total, count) in archive.archived_tag_totals(
+        request.auth, transaction_type, date_from, date_to,
+    ).items():
+        bucket = totals.setdefault(tag_id, [0, 0])
+        bucket[0] += total
+        bucket[1] += count
+
+    tags = Tag.objects.filter(user=request.auth).in_bulk(totals)
+    results = [
+        TagSpendingResponse(tag_id=tag.id, tag_name=tag.name, total=totals[tag.id][0], count=totals[tag.id][1])
+        for tag in tags.values()
     ]
+    return 200, sorted(results, key=lambda r: (-r.total, r.tag_name))
 
 
 @router.get(
@@ -276,6 +396,7 @@ def spending_by_category(
         "Each group contains the category name, icon, total amount, and all matching transactions. "
         "Filter by transaction_type (expense or income, defaults to expense). "
         "Optionally filter by date range (date_from, date_to). "
+        "Archived months are included when date_from is given, or with include_archived=true. "
         "Groups are ordered by total amount descending."
     ),
 )
@@ -284,6 +405,7 @@ def transactions_by_category(
     transaction_type: str = 'expense',
     date_from: Optional[date] = None,
     date_to: Optional[date] = None,
+    include_archived: bool = False,
 ):
     from collections import defaultdict
 
@@ -299,7 +421,16 @@ def transactions_by_category(
 
     groups: dict = defaultdict(lambda: {'category': None, 'total': 0, 'transactions': []})
 
-    for txn in qs.order_by('-date', '-created_at'):
+    txns = list(qs.order_by('-date', '-created_at'))
+    archived = []
+    if date_from or include_archived:
+        archived = archive.archived_transactions(
+            request.auth, transaction_type, date_from=date_from, date_to=date_to,
+        )
+    if archived:
+        txns = sorted(txns + archived, key=lambda t: (t.date, t.created_at), reverse=True)
+
+    for txn in txns:
         if txn.category is None:
             continue
         cid = txn.category.id
@@ -350,23 +481,7 @@ def delete_transaction(request, transaction_id: int):
         return 404, ErrorResponse(detail="Transaction not found")
 
     with transaction.atomic():
-        # Reverse balance changes
-        if txn.transaction_type == 'expense':
-            Account.objects.filter(id=txn.account.pk).update(
-                balance=F('balance') + txn.amount,
-            )
-        elif txn.transaction_type == 'income':
-            Account.objects.filter(id=txn.account.pk).update(
-                balance=F('balance') - txn.amount,
-            )
-        elif txn.transaction_type == 'transfer':
-            Account.objects.filter(id=txn.account.pk).update(
-                balance=F('balance') + txn.amount,
-            )
-            if txn.to_account.pk:
-                Account.objects.filter(id=txn.to_account.pk).update(
-                    balance=F('balance') - txn.amount,
-                )
-        txn.delete()
+        remove_transaction(txn)
 
+    bump_ledger_version(request.auth.pk)
     return 200, MessageResponse(message="Transaction deleted")
@@ -1,8 +1,9 @@
 from datetime import date
 from decimal import Decimal
-from typing import Optional
+from typing import Annotated, Literal, Optional, Union
 
 from ninja import Schema
+from pydantic import Field
 
 
 # ── Account Schemas ──────────────────────────────────────────────────────────
@@ -24,6 +25,14 @@ class UpdateAccountRequest(Schema):
     icon: Optional[str] = None
 
 
+class AccountStatsResponse(Schema):
+    """Recent activity on an account; amounts are in the account currency."""
+    last_transaction_date: Optional[date] = None
+    month_income: Decimal
+    month_expense: Decimal
+    transaction_count: int  # archived ones and transfers in included
+
+
 class AccountResponse(Schema):
     id: int
     name: str
@@ -32,17 +41,28 @@ class AccountResponse(Schema):
     currency: str
     icon: str
     is_active: bool
+    stats: Optional[AccountStatsResponse] = None
 
     @staticmethod
     def from_account(account):
+        stats = None
+        if hasattr(account, 'transaction_count'):
+            stats = AccountStatsResponse(
+                last_transaction_date=account.last_transaction_date,
+                month_income=account.month_income,
+                month_expense=account.month_expense,
+                transaction_count=account.transaction_count,
+            )
         return AccountResponse(
             id=account.id,
             name=account.name,
             account_type=account.account_type,
-            balance=account.balance,
+            # Accounts loaded with with_pending_balance() include uncompacted deltas
+            balance=account.balance + getattr(account, 'pending_balance', 0),
             currency=account.currency,
             icon=account.icon,
             is_active=account.is_active,
+            stats=stats,
         )
 
 
@@ -114,13 +134,14 @@ class CreateIncomeRequest(Schema):
 
 
 class CreateTransferRequest(Schema):
-    """Transfer money between two accounts."""
+    """Transfer money between two accounts, converting between their currencies if needed."""
     amount: Decimal
     from_account_id: int
     to_account_id: int
     date: date
     note: str = ""
     tag_ids: list[int] = []
+    currency: Optional[str] = None  # currency of amount; defaults to the source account's
 
 
 class CategorySpendingResponse(Schema):
@@ -131,6 +152,14 @@ class CategorySpendingResponse(Schema):
     total: Decimal
 
 
+class TagSpendingResponse(Schema):
+    """Total amount and number of transactions per tag within a date range."""
+    tag_id: int
+    tag_name: str
+    total: Decimal
+    count: int
+
+
 class TransactionResponse(Schema):
     id: int
     transaction_type: str
@@ -138,6 +167,7 @@ class TransactionResponse(Schema):
     currency: str
     original_amount: Optional[Decimal] = None
     exchange_rate: Optional[float] = None
+    to_amount: Optional[Decimal] = None  # credited to to_account, in its currency
     account: AccountResponse
     to_account: Optional[AccountResponse] = None
     category: Optional[CategoryResponse] = None
@@ -155,6 +185,7 @@ class TransactionResponse(Schema):
             currency=txn.currency,
             original_amount=txn.original_amount,
             exchange_rate=float(txn.exchange_rate) if txn.exchange_rate else None,
+            to_amount=txn.to_amount,
             account=AccountResponse.from_account(txn.account),
             to_account=(
                 AccountResponse.from_account(txn.to_account)
@@ -171,6 +202,12 @@ class TransactionResponse(Schema):
         )
 
 
+class TransactionPageResponse(Schema):
+    """One page of transactions. Pass next_cursor back as cursor for the next page."""
+    results: list[TransactionResponse]
+    next_cursor: Optional[str] = None
+
+
 class CategoryTransactionGroupResponse(Schema):
     """Expense transactions grouped by category — category summary plus all individual transactions."""
     category_id: int
@@ -178,3 +215,103 @@ class CategoryTransactionGroupResponse(Schema):
     category_icon: str
     total: Decimal
     transactions: list[TransactionResponse] = []
+
+
+# ── Budget Schemas ───────────────────────────────────────────────────────────
+
+class CreateBudgetRequest(Schema):
+    """Set a spending limit for an expense category."""
+    category_id: int
+    amount: Decimal
+    period: Literal["week", "month", "year"] = "month"
+    currency: Optional[str] = None  # defaults to the main currency
+
+
+class UpdateBudgetRequest(Schema):
+    amount: Decimal
+
+
+class BudgetResponse(Schema):
+    """A budget with its progress in the period containing the requested day."""
+    id: int
+    category_id: int
+    category_name: str
+    category_icon: str
+    period: str
+    amount: Decimal
+    currency: str
+    period_start: date
+    period_end: date
+    spent: Decimal
+    remaining: Decimal
+    progress: float  # spent / amount; above 1 when over budget
+
+
+# ── Report Schemas ───────────────────────────────────────────────────────────
+
+class CashFlowPeriodResponse(Schema):
+    """Totals for one day, week (starting Monday) or month, in the main currency."""
+    period_start: date
+    income: Decimal
+    expense: Decimal
+    net: Decimal
+    transfers: Decimal
+
+
+class CashFlowResponse(Schema):
+    currency: str
+    granularity: str
+    date_from: date
+    date_to: date
+    income: Decimal
+    expense: Decimal
+    net: Decimal
+    # Account currencies with no exchange rate to `currency`; left out of the totals
+    unconverted_currencies: list[str] = []
+    periods: list[CashFlowPeriodResponse]
+
+
+# ── Batch Schemas ────────────────────────────────────────────────────────────
+
+class BatchExpense(CreateExpenseRequest):
+    op: Literal["expense"]
+    idempotency_key: str = Field(..., min_length=1, max_length=255)
+
+
+class BatchIncome(CreateIncomeRequest):
+    op: Literal["income"]
+    idempotency_key: str = Field(..., min_length=1, max_length=255)
+
+
+class BatchTransfer(CreateTransferRequest):
+    op: Literal["transfer"]
+    idempotency_key: str = Field(..., min_length=1, max_length=255)
+
+
+class BatchDelete(Schema):
+    op: Literal["delete"]
+    idempotency_key: str = Field(..., min_length=1, max_length=255)
+    transaction_id: int
+
+
+BatchMutation = Annotated[
+    Union[BatchExpense, BatchIncome, BatchTransfer, BatchDelete],
+    Field(discriminator="op"),
+]
+
+
+class BatchRequest(Schema):
+    """Ordered list of queued offline writes, applied in one database transaction."""
+    mutations: list[BatchMutation]
+
+
+class BatchResult(Schema):
+    idempotency_key: str
+    status: int
+    transaction: Optional[TransactionResponse] = None
+    detail: Optional[str] = None
+    replayed: bool = False
+
+
+class BatchResponse(Schema):
+    results: list[BatchResult]
@@ -0,0 +1,30 @@
+from django.db import connection
+from django.db.models import BooleanField
+from django.db.models.expressions import RawSQL
+
+
+def _like_pattern(q: str) -> str:
+    escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def search_transactions(qs, q: str):
+    """
+    Filter a Transaction queryset to rows whose note matches `q`.
+
+    On PostgreSQL this matches whole words through the generated
+    `note_search` tsvector column and substrings through the pg_trgm index
+    on `note` (both GIN, see migration 0010), so neither condition scans
+    the table. Other backends fall back to a case-insensitive contains.
+    """
+    if connection.vendor != "postgresql":
+        return qs.filter(note__icontains=q)
+
+    return qs.filter(
+        RawSQL(
+            "(transactions.note_search @@ websearch_to_tsquery('simple', %s)"
+            " OR transactions.note ILIKE %s)",
+            [q, _like_pattern(q)],
+            output_field=BooleanField(),
+        )
+    )
@@ -0,0 +1,198 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from accounts.exchange_service import get_rate
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, DecimalField, F, Value, When
+from django.utils import timezone
+from sync.models import Tombstone
+
+from .budgets import record_spend
+from .models import Account, AccountBalanceDelta, Tag, Transaction
+
+
+class LedgerError(Exception):
+    """Raised when a ledger write is rejected. The message is safe to show the client."""
+
+    pass
+
+
+def resolve_amount(amount, currency, account, rate_cache=None):
+    """Work out what a transaction in `currency` does to `account`'s balance.
+
+    Returns (balance_amount, original_amount, exchange_rate). original_amount and
+    exchange_rate are None when no conversion was needed. Pass a dict as
+    rate_cache to reuse conversions across several calls (e.g. in a batch).
+    """
+    txn_currency = currency or account.currency
+    if txn_currency == account.currency:
+        return amount, None, None
+
+    pair = (txn_currency, account.currency)
+    if rate_cache is not None and pair in rate_cache:
+        rate = rate_cache[pair]
+    else:
+        rate = get_rate(*pair)
+        if rate_cache is not None:
+            rate_cache[pair] = rate
+
+    if rate is None:
+        raise LedgerError(
+            f"Exchange rate not available for {txn_currency} to {account.currency}"
+        )
+    return (amount * rate).quantize(Decimal("0.01")), amount, rate
+
+
+def build_entry(user, transaction_type, payload, account, category, rate_cache=None):
+    """Build an unsaved expense or income Transaction from a create payload."""
+    balance_amount, original_amount, exchange_rate = resolve_amount(
+        payload.amount, payload.currency, account, rate_cache,
+    )
+    return Transaction(
+        user=user,
+        transaction_type=transaction_type,
+        amount=balance_amount,
+        currency=payload.currency or account.currency,
+        original_amount=original_amount,
+        exchange_rate=exchange_rate,
+        account=account,
+        category=category,
+        note=payload.note,
+        date=payload.date,
+    )
+
+
+def build_transfer(user, payload, from_account, to_account, rate_cache=None):
+    """Build an unsaved transfer Transaction from a create payload.
+
+    `amount` is debited from the source account in its currency. When the
+    destination account uses another currency, the amount it is credited
+    is converted separately and stored as `to_amount`.
+    """
+    if from_account.pk == to_account.pk:
+        raise LedgerError("Cannot transfer to the same account")
+    currency = payload.currency or from_account.currency
+    amount, original_amount, exchange_rate = resolve_amount(
+        payload.amount, currency, from_account, rate_cache,
+    )
+    to_amount = None
+    if to_account.currency != from_account.currency:
+        to_amount, _, _ = resolve_amount(payload.amount, currency, to_account, rate_cache)
+    return Transaction(
+        user=user,
+        transaction_type='transfer',
+        amount=amount,
+        currency=currency,
+        original_amount=original_amount,
+        exchange_rate=exchange_rate,
+        to_amount=to_amount,
+        account=from_account,
+        to_account=to_account,
+        note=payload.note,
+        date=payload.date,
+    )
+
+
+def balance_deltas(txn, reverse=False):
+    """Return {account_id: delta} describing the transaction's effect on balances.
+
+    With reverse=True, return the deltas that undo it (used on delete).
+    """
+    deltas = defaultdict(Decimal)
+    if txn.transaction_type == 'expense':
+        deltas[txn.account_id] -= txn.amount
+    elif txn.transaction_type == 'income':
+        deltas[txn.account_id] += txn.amount
+    elif txn.transaction_type == 'transfer':
+        deltas[txn.account_id] -= txn.amount
+        # to_account may have been nulled by SET_NULL
+        if txn.to_account_id:
+            deltas[txn.to_account_id] += txn.amount if txn.to_amount is None else txn.to_amount
+    if reverse:
+        return {account_id: -delta for account_id, delta in deltas.items()}
+    return dict(deltas)
+
+
+def merge_deltas(target, deltas):
+    """Accumulate `deltas` into `target` in place."""
+    for account_id, delta in deltas.items():
+        target[account_id] = target.get(account_id, Decimal(0)) + delta
+    return target
+
+
+# Locks every account first, in id order, then updates them all at once.
+# Writers touching overlapping accounts (A->B and B->A transfers, batches)
+# wait for each other instead of deadlocking. A locking CTE is never
+# inlined, so its ORDER BY decides the lock order.
+APPLY_DELTAS_SQL = """
+    WITH locked AS (
+        SELECT id FROM financial_accounts
+        WHERE id = ANY(%s) ORDER BY id FOR NO KEY UPDATE
+    )
+    UPDATE financial_accounts AS account
+    SET balance = account.balance + delta.amount, updated_at = %s
+    FROM locked JOIN unnest(%s::bigint[], %s::numeric[]) AS delta(id, amount) USING (id)
+    WHERE account.id = locked.id
+"""
+
+
+def apply_balance_deltas(deltas, user_id):
+    """Apply {account_id: delta} to the account balances in a single UPDATE.
+
+    Rows are locked in id order so concurrent writers cannot deadlock. With
+    LEDGER_BALANCE_MODE = "deltas" the changes are appended to
+    AccountBalanceDelta instead, so writers to the same account never wait
+    on its row lock. Must be called inside transaction.atomic().
+    """
+    account_ids = sorted(account_id for account_id, delta in deltas.items() if delta)
+    if not account_ids:
+        return
+
+    if getattr(settings, "LEDGER_BALANCE_MODE", "inline") == "deltas":
+        AccountBalanceDelta.objects.bulk_create([
+            AccountBalanceDelta(user_id=user_id, account_id=account_id, amount=deltas[account_id])
+            for account_id in account_ids
+        ])
+        return
+
+    now = timezone.now()
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                APPLY_DELTAS_SQL,
+                [account_ids, now, account_ids, [deltas[account_id] for account_id in account_ids]],
+            )
+        return
+
+    Account.objects.filter(id__in=account_ids).update(
+        balance=F('balance') + Case(
+            *[When(id=account_id, then=Value(deltas[account_id])) for account_id in account_ids],
+            output_field=DecimalField(max_digits=15, decimal_places=2),
+        ),
+        updated_at=now,
+    )
+
+
+def post_transaction(txn, tag_ids=()):
+    """Save a built transaction, apply its balance and budget effect and attach tags.
+
+    Must be called inside transaction.atomic().
+    """
+    apply_balance_deltas(balance_deltas(txn), txn.user_id)
+    record_spend(txn)
+    txn.save()
+    if tag_ids:
+        tags = Tag.objects.filter(id__in=tag_ids, user=txn.user)
+        txn.tags.set(tags)
+
+
+def remove_transaction(txn):
+    """Delete a transaction, reverse its balance and budget effect and leave a sync tombstone.
+
+    Must be called inside transaction.atomic().
+    """
+    apply_balance_deltas(balance_deltas(txn, reverse=True), txn.user_id)
+    record_spend(txn, reverse=True)
+    Tombstone.objects.create(user_id=txn.user_id, entity='transaction', object_id=txn.pk)
+    txn.delete()
@@ -0,0 +1,28 @@
+from django.core.management import call_command
+from taskqueue.registry import task
+
+
+@task(concurrency=1)
+def purge_idempotency_records():
+    call_command("purge_idempotency_records")
+
+
+@task(concurrency=1, retry_delay=300)
+def create_transaction_partitions():
+    call_command("create_transaction_partitions")
+
+
+@task(concurrency=1, retry_delay=600)
+def archive_transactions():
+    call_command("archive_transactions")
+
+
+@task(concurrency=1)
+def reconcile_balances():
+    # Report only; drifted balances are logged and left for an operator to --fix
+    call_command("reconcile_balances")
+
+
+@task(concurrency=1)
+def compact_balance_deltas():
+    call_command("compact_balance_deltas")
@@ -2,10 +2,17 @@ import pytest
 from decimal import Decimal
 from accounts.auth import create_access_token
 from accounts.models import AppPreference, SubCurrency, User
+from django.core.cache import cache
 
 from ledger.models import Account, Category, Tag
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Keep cached ledger versions and idempotency keys from leaking between tests."""
+    cache.clear()
+
+
 @pytest.fixture
 def user(db):
     user_obj = User.objects.create_user(
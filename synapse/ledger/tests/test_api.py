@@ -1,9 +1,13 @@
 import pytest
 from decimal import Decimal
-from datetime import date
+from datetime import date, timedelta
+from django.db import connection
 from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 
-from ledger.models import Account, Transaction
+from ledger.archive import archive_transactions
+from ledger.models import Account, IdempotencyRecord, Tag, Transaction
 
 
 @pytest.fixture
@@ -32,6 +36,38 @@ class TestAccountEndpoints:
         response = client.get("/api/ledger/accounts/", **auth_headers)
         assert response.status_code == 200
         assert len(response.json()) == 2
+        assert response.json()[0]["stats"] is None
+
+    def test_list_accounts_with_stats(
+        self, client, auth_headers, user, checking_account, savings_account, expense_category, income_category,
+    ):
+        today = timezone.localdate()
+
+        def add(kind, amount, day, **extra):
+            Transaction.objects.create(
+                user=user, transaction_type=kind, amount=Decimal(amount), account=checking_account, date=day, **extra,
+            )
+
+        add("expense", "40.00", today, category=expense_category)
+        add("income", "900.00", today.replace(day=1), category=income_category)
+        add("expense", "15.00", today.replace(day=1) - timedelta(days=1), category=expense_category)
+        add("transfer", "100.00", today.replace(day=1), to_account=savings_account)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get("/api/ledger/accounts/?include=stats", **auth_headers)
+        assert response.status_code == 200
+        assert sum('"transactions"' in q["sql"] for q in queries.captured_queries) == 1
+
+        stats = {a["name"]: a["stats"] for a in response.json()}
+        checking = stats["Main Checking"]
+        assert checking["last_transaction_date"] == today.isoformat()
+        assert Decimal(checking["month_income"]) == Decimal("900.00")
+        assert Decimal(checking["month_expense"]) == Decimal("40.00")
+        assert checking["transaction_count"] == 4
+
+        savings = stats["High Yield Savings"]
+        assert savings["transaction_count"] == 1
+        assert Decimal(savings["month_income"]) == 0
 
     def test_get_account(self, client, auth_headers, checking_account):
         response = client.get(f"/api/ledger/accounts/{checking_account.id}", **auth_headers)
@@ -353,3 +389,351 @@ class TestTransactionListDetailDelete:
     def test_delete_not_found(self, client, auth_headers):
         response = client.delete("/api/ledger/transactions/99999", **auth_headers)
         assert response.status_code == 404
+
+
+# ── Conditional GET (ETag) ───────────────────────────────────────────────────
+
+@pytest.mark.django_db
+class TestLedgerETag:
+    def test_list_returns_etag(self, client, auth_headers, checking_account):
+        response = client.get("/api/ledger/accounts/", **auth_headers)
+        assert response.status_code == 200
+        assert response["ETag"].startswith('W/"')
+
+    def test_matching_etag_returns_304(self, client, auth_headers, checking_account):
+        etag = client.get("/api/ledger/accounts/", **auth_headers)["ETag"]
+        response = client.get("/api/ledger/accounts/", HTTP_IF_NONE_MATCH=etag, **auth_headers)
+        assert response.status_code == 304
+        assert response["ETag"] == etag
+
+    def test_write_invalidates_etag(
+        self, client, auth_headers, checking_account, expense_category,
+        django_capture_on_commit_callbacks,
+    ):
+        etag = client.get("/api/ledger/accounts/", **auth_headers)["ETag"]
+        with django_capture_on_commit_callbacks(execute=True):
+            client.post(
+                "/api/ledger/transactions/expense",
+                data={"amount": "10.00", "account_id": checking_account.id, "category_id": expense_category.id, "date": "2023-10-24"},
+                content_type="application/json",
+                **auth_headers,
+            )
+        response = client.get("/api/ledger/accounts/", HTTP_IF_NONE_MATCH=etag, **auth_headers)
+        assert response.status_code == 200
+        assert response["ETag"] != etag
+
+    def test_query_string_and_date_change_etag(self, client, auth_headers, checking_account, monkeypatch):
+        from django.utils import timezone
+
+        etag = client.get("/api/ledger/accounts/", **auth_headers)["ETag"]
+        response = client.get("/api/ledger/accounts/?include=stats", HTTP_IF_NONE_MATCH=etag, **auth_headers)
+        assert response.status_code == 200
+        stats_etag = response["ETag"]
+        assert stats_etag != etag
+
+        # Month-to-date stats roll over with the date even without writes
+        tomorrow = timezone.localdate() + timedelta(days=1)
+        monkeypatch.setattr(timezone, "localdate", lambda *args, **kwargs: tomorrow)
+        response = client.get("/api/ledger/accounts/?include=stats", HTTP_IF_NONE_MATCH=stats_etag, **auth_headers)
+        assert response.status_code == 200
+
+    def test_unauthenticated_request_has_no_etag(self, client):
+        response = client.get("/api/ledger/accounts/")
+        assert response.status_code == 401
+        assert not response.has_header("ETag")
+
+
+# ── Batch Writes ─────────────────────────────────────────────────────────────
+
+@pytest.mark.django_db
+class TestBatchEndpoint:
+    def _post(self, client, auth_headers, mutations):
+        return client.post(
+            "/api/ledger/batch",
+            data={"mutations": mutations},
+            content_type="application/json",
+            **auth_headers,
+        )
+
+    def test_rejects_keys_the_header_path_would(self, client, auth_headers, checking_account):
+        for key in ("", "k" * 256):
+            response = self._post(client, auth_headers, [
+                {"op": "expense", "idempotency_key": key, "amount": "1.00",
+                 "account_id": checking_account.id, "date": "2023-10-24"},
+            ])
+            assert response.status_code == 422
+        assert not Transaction.objects.exists()
+
+    def test_applies_mutations_in_one_request(
+        self, client, auth_headers, checking_account, savings_account, expense_category, income_category, tag,
+    ):
+        checking_initial = checking_account.balance
+        savings_initial = savings_account.balance
+        response = self._post(client, auth_headers, [
+            {"op": "expense", "idempotency_key": "k1", "amount": "40.00", "account_id": checking_account.id,
+             "category_id": expense_category.id, "date": "2023-10-24", "tag_ids": [tag.id]},
+            {"op": "income", "idempotency_key": "k2", "amount": "100.00", "account_id": checking_account.id,
+             "category_id": income_category.id, "date": "2023-10-24"},
+            {"op": "transfer", "idempotency_key": "k3", "amount": "10.00", "from_account_id": checking_account.id,
+             "to_account_id": savings_account.id, "date": "2023-10-24"},
+        ])
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert [r["status"] for r in results] == [201, 201, 201]
+        assert results[0]["transaction"]["tags"][0]["id"] == tag.id
+        assert Transaction.objects.count() == 3
+
+        checking_account.refresh_from_db()
+        savings_account.refresh_from_db()
+        assert checking_account.balance == checking_initial - Decimal("40.00") + Decimal("100.00") - Decimal("10.00")
+        assert savings_account.balance == savings_initial + Decimal("10.00")
+
+    def test_delete_reverses_balance(self, client, auth_headers, checking_account, expense_category):
+        balance_before = checking_account.balance
+        txn_id = client.post(
+            "/api/ledger/transactions/expense",
+            data={"amount": "75.00", "account_id": checking_account.id, "category_id": expense_category.id, "date": "2023-10-24"},
+            content_type="application/json",
+            **auth_headers,
+        ).json()["id"]
+
+        response = self._post(client, auth_headers, [
+            {"op": "delete", "idempotency_key": "d1", "transaction_id": txn_id},
+        ])
+        assert response.json()["results"][0]["status"] == 200
+        assert not Transaction.objects.filter(id=txn_id).exists()
+        checking_account.refresh_from_db()
+        assert checking_account.balance == balance_before
+
+    def test_replayed_keys_are_not_applied_twice(self, client, auth_headers, checking_account, expense_category):
+        mutation = {"op": "expense", "idempotency_key": "retry-me", "amount": "5.00",
+                    "account_id": checking_account.id, "category_id": expense_category.id, "date": "2023-10-24"}
+        first = self._post(client, auth_headers, [mutation, mutation]).json()["results"]
+        second = self._post(client, auth_headers, [mutation]).json()["results"]
+
+        assert Transaction.objects.count() == 1
+        assert first[1]["replayed"] is True
+        assert second[0]["replayed"] is True
+        assert second[0]["transaction"]["id"] == first[0]["transaction"]["id"]
+
+    def test_key_shared_with_header_requests(self, client, auth_headers, checking_account, expense_category):
+        expense = {"amount": "5.00", "account_id": checking_account.id,
+                   "category_id": expense_category.id, "date": "2023-10-24"}
+        header = client.post(
+            "/api/ledger/transactions/expense", data=expense, content_type="application/json",
+            HTTP_IDEMPOTENCY_KEY="shared", **auth_headers,
+        )
+        assert header.status_code == 201
+
+        response = self._post(client, auth_headers, [
+            {"op": "expense", "idempotency_key": "shared", **expense},
+            {"op": "expense", "idempotency_key": "batch-only", **expense},
+        ])
+        assert response.status_code == 200
+        assert [r["status"] for r in response.json()["results"]] == [422, 201]
+
+        replay = client.post(
+            "/api/ledger/transactions/expense", data=expense, content_type="application/json",
+            HTTP_IDEMPOTENCY_KEY="batch-only", **auth_headers,
+        )
+        assert replay.status_code == 422
+        assert Transaction.objects.count() == 2
+
+    def test_key_repeated_with_other_payload(self, client, auth_headers, checking_account, expense_category):
+        mutation = {"op": "expense", "idempotency_key": "twice", "amount": "5.00",
+                    "account_id": checking_account.id, "category_id": expense_category.id, "date": "2023-10-24"}
+        results = self._post(client, auth_headers, [mutation, {**mutation, "amount": "6.00"}]).json()["results"]
+        assert [r["status"] for r in results] == [201, 422]
+        retried = self._post(client, auth_headers, [{**mutation, "amount": "6.00"}]).json()["results"]
+        assert retried[0]["status"] == 422
+        assert Transaction.objects.count() == 1
+
+    def test_invalid_mutation_does_not_block_others(self, client, auth_headers, checking_account, expense_category, income_category):
+        response = self._post(client, auth_headers, [
+            {"op": "expense", "idempotency_key": "bad", "amount": "5.00", "account_id": checking_account.id,
+             "category_id": income_category.id, "date": "2023-10-24"},
+            {"op": "expense", "idempotency_key": "good", "amount": "5.00", "account_id": checking_account.id,
+             "category_id": expense_category.id, "date": "2023-10-24"},
+            {"op": "delete", "idempotency_key": "missing", "transaction_id": 99999},
+        ])
+        assert [r["status"] for r in response.json()["results"]] == [400, 201, 404]
+        assert Transaction.objects.count() == 1
+
+    def test_requires_auth(self, client):
+        response = client.post("/api/ledger/batch", data={"mutations": []}, content_type="application/json")
+        assert response.status_code == 401
+
+
+# ── Idempotency-Key Header ───────────────────────────────────────────────────
+
+@pytest.mark.django_db
+class TestIdempotencyKey:
+    def _expense(self, client, auth_headers, account, category, key, amount="20.00"):
+        return client.post(
+            "/api/ledger/transactions/expense",
+            data={"amount": amount, "account_id": account.id, "category_id": category.id, "date": "2023-10-24"},
+            content_type="application/json",
+            HTTP_IDEMPOTENCY_KEY=key,
+            **auth_headers,
+        )
+
+    def test_repeat_returns_original_response(self, client, auth_headers, checking_account, expense_category):
+        balance_before = checking_account.balance
+        first = self._expense(client, auth_headers, checking_account, expense_category, "abc")
+        second = self._expense(client, auth_headers, checking_account, expense_category, "abc")
+
+        assert first.status_code == second.status_code == 201
+        assert second["Idempotent-Replayed"] == "true"
+        assert second.json()["id"] == first.json()["id"]
+        assert Transaction.objects.count() == 1
+        checking_account.refresh_from_db()
+        assert checking_account.balance == balance_before - Decimal("20.00")
+
+    def test_falls_back_to_database_when_cache_is_empty(self, client, auth_headers, checking_account, expense_category):
+        from django.core.cache import cache
+
+        first = self._expense(client, auth_headers, checking_account, expense_category, "db-only")
+        cache.clear()
+        second = self._expense(client, auth_headers, checking_account, expense_category, "db-only")
+
+        assert second.json()["id"] == first.json()["id"]
+        assert Transaction.objects.count() == 1
+
+    def test_different_keys_post_separately(self, client, auth_headers, checking_account, expense_category):
+        self._expense(client, auth_headers, checking_account, expense_category, "one")
+        self._expense(client, auth_headers, checking_account, expense_category, "two")
+        assert Transaction.objects.count() == 2
+
+    def test_reuse_with_other_payload_is_rejected(self, client, auth_headers, checking_account, expense_category):
+        self._expense(client, auth_headers, checking_account, expense_category, "reused")
+        response = self._expense(client, auth_headers, checking_account, expense_category, "reused", amount="25.00")
+        assert response.status_code == 422
+        assert Transaction.objects.count() == 1
+
+    def test_reuse_on_other_endpoint_is_rejected(
+        self, client, auth_headers, checking_account, savings_account, expense_category,
+    ):
+        self._expense(client, auth_headers, checking_account, expense_category, "moved")
+        response = client.post(
+            "/api/ledger/transactions/transfer",
+            data={"amount": "20.00", "from_account_id": checking_account.id,
+                  "to_account_id": savings_account.id, "date": "2023-10-24"},
+            content_type="application/json",
+            HTTP_IDEMPOTENCY_KEY="moved",
+            **auth_headers,
+        )
+        assert response.status_code == 422
+        assert not Transaction.objects.filter(transaction_type="transfer").exists()
+
+    def test_failed_request_is_not_recorded(self, client, auth_headers, checking_account, income_category):
+        response = self._expense(client, auth_headers, checking_account, income_category, "fails")
+        assert response.status_code == 400
+        assert not IdempotencyRecord.objects.filter(key="fails").exists()
+
+
+# ── Transaction Search ───────────────────────────────────────────────────────
+
+@pytest.mark.django_db
+class TestTransactionSearch:
+    def _expense(self, user, account, category, note, day):
+        return Transaction.objects.create(
+            user=user, transaction_type="expense", amount=Decimal("10.00"),
+            account=account, category=category, note=note, date=date(2023, 10, day),
+        )
+
+    def test_matches_note_text(self, client, auth_headers, user, checking_account, expense_category):
+        self._expense(user, checking_account, expense_category, "Coffee with Sam", 1)
+        self._expense(user, checking_account, expense_category, "Groceries", 2)
+
+        response = client.get("/api/ledger/transactions/search?q=coffee", **auth_headers)
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert [t["note"] for t in results] == ["Coffee with Sam"]
+
+    def test_combines_with_filters(self, client, auth_headers, user, checking_account, savings_account, expense_category):
+        self._expense(user, checking_account, expense_category, "Book store", 1)
+        self._expense(user, savings_account, expense_category, "Book club", 2)
+
+        response = client.get(
+            f"/api/ledger/transactions/search?q=book&account_id={savings_account.id}", **auth_headers,
+        )
+        assert [t["note"] for t in response.json()["results"]] == ["Book club"]
+
+    def test_cursor_pagination(self, client, auth_headers, user, checking_account, expense_category):
+        for day in range(1, 6):
+            self._expense(user, checking_account, expense_category, f"Taxi ride {day}", day)
+
+        first = client.get("/api/ledger/transactions/search?q=taxi&limit=2", **auth_headers).json()
+        assert [t["note"] for t in first["results"]] == ["Taxi ride 5", "Taxi ride 4"]
+        assert first["next_cursor"]
+
+        seen = [t["id"] for t in first["results"]]
+        cursor = first["next_cursor"]
+        while cursor:
+            page = client.get(f"/api/ledger/transactions/search?q=taxi&limit=2&cursor={cursor}", **auth_headers).json()
+            seen += [t["id"] for t in page["results"]]
+            cursor = page["next_cursor"]
+        assert len(seen) == len(set(seen)) == 5
+
+    def test_empty_query_rejected(self, client, auth_headers):
+        response = client.get("/api/ledger/transactions/search?q=%20", **auth_headers)
+        assert response.status_code == 400
+
+    def test_invalid_cursor_rejected(self, client, auth_headers):
+        response = client.get("/api/ledger/transactions/search?q=x&cursor=nope", **auth_headers)
+        assert response.status_code == 400
+
+
+# ── Tag Filters ──────────────────────────────────────────────────────────────
+
+@pytest.mark.django_db
+class TestTagFilters:
+    @pytest.fixture
+    def tagged(self, user, checking_account, expense_category, tag):
+        travel = Tag.objects.create(user=user, name="Travel")
+
+        def add(note, amount, tags, day=1):
+            txn = Transaction.objects.create(
+                user=user, transaction_type="expense", amount=Decimal(amount),
+                account=checking_account, category=expense_category, note=note, date=date(2023, 10, day),
+            )
+            txn.tags.set(tags)
+
+        add("both", "30.00", [tag, travel], day=3)
+        add("savings only", "20.00", [tag], day=2)
+        add("untagged", "5.00", [], day=1)
+        return tag, travel
+
+    def test_any_and_all(self, client, auth_headers, tagged):
+        savings, travel = tagged
+        url = f"/api/ledger/transactions/?tag_ids={savings.id}&tag_ids={travel.id}"
+        response = client.get(url, **auth_headers)
+        assert [t["note"] for t in response.json()] == ["both", "savings only"]
+
+        response = client.get(f"{url}&tag_match=all", **auth_headers)
+        assert [t["note"] for t in response.json()] == ["both"]
+
+    def test_search_accepts_tag_filter(self, client, auth_headers, tagged):
+        _, travel = tagged
+        response = client.get(f"/api/ledger/transactions/search?q=only&tag_ids={travel.id}", **auth_headers)
+        assert response.json()["results"] == []
+
+    def test_spending_by_tag(self, client, auth_headers, tagged):
+        response = client.get("/api/ledger/transactions/spending-by-tag", **auth_headers)
+        assert response.status_code == 200
+        assert [(r["tag_name"], Decimal(r["total"]), r["count"]) for r in response.json()] == [
+            ("Savings", Decimal("50.00"), 2),
+            ("Travel", Decimal("30.00"), 1),
+        ]
+
+    def test_archived_rows_are_filtered_and_counted(self, client, auth_headers, tagged):
+        archive_transactions(date(2023, 11, 1))
+        savings, travel = tagged
+        response = client.get(
+            f"/api/ledger/transactions/?tag_ids={savings.id}&tag_ids={travel.id}&tag_match=all&include_archived=true",
+            **auth_headers,
+        )
+        assert [t["note"] for t in response.json()] == ["both"]
+
+        totals = client.get("/api/ledger/transactions/spending-by-tag", **auth_headers).json()
+        assert [r["count"] for r in totals] == [2, 1]
@@ -0,0 +1,165 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.test import Client
+
+from ledger.archive import archive_horizon, archive_transactions, decode_chunk, encode_chunk
+from ledger.models import ArchivedRollup, ArchivedTransactionChunk, Category, Transaction
+
+
+@pytest.fixture
+def history(user, checking_account, savings_account, expense_category, tag):
+    """Two old months and one recent one."""
+    def add(amount, day, **extra):
+        return Transaction.objects.create(
+            user=user, transaction_type=extra.pop("transaction_type", "expense"),
+            amount=Decimal(amount), account=checking_account, date=day,
+            category=extra.pop("category", expense_category), **extra,
+        )
+
+    tagged = add("10.00", date(2022, 1, 5), note="coffee")
+    tagged.tags.add(tag)
+    add("20.00", date(2022, 1, 20))
+    add("5.00", date(2022, 2, 10))
+    add("100.00", date(2022, 2, 11), transaction_type="transfer", category=None, to_account=savings_account)
+    add("7.50", date(2026, 9, 1))
+    return user
+
+
+def test_chunk_roundtrip():
+    row = {
+        "id": 1, "transaction_type": "expense", "amount": Decimal("1.10"), "currency": "USD",
+        "original_amount": None, "exchange_rate": Decimal("1.0500000"), "to_amount": None, "account_id": 2,
+        "to_account_id": None, "category_id": 3, "note": "x", "date": date(2022, 1, 1),
+        "created_at": "2022-01-01T00:00:00+00:00", "updated_at": "2022-01-01T00:00:00+00:00",
+        "tag_ids": [4],
+    }
+    decoded = decode_chunk(encode_chunk([row]))[0]
+    assert decoded["amount"] == Decimal("1.10")
+    assert decoded["exchange_rate"] == Decimal("1.0500000")
+    assert decoded["date"] == date(2022, 1, 1)
+    assert decoded["tag_ids"] == [4]
+
+
+def test_archive_horizon_rounds_to_month(settings):
+    settings.LEDGER_ARCHIVE_AFTER_DAYS = 365
+    assert archive_horizon(date(2026, 10, 19)) == date(2025, 10, 1)
+
+
+@pytest.mark.django_db
+class TestArchive:
+    def test_moves_old_months_and_keeps_balances(self, history, checking_account):
+        assert archive_transactions(date(2026, 1, 1)) == (2, 4)
+
+        assert list(Transaction.objects.values_list("date", flat=True)) == [date(2026, 9, 1)]
+        chunks = {c.month: c.row_count for c in ArchivedTransactionChunk.objects.all()}
+        assert chunks == {date(2022, 1, 1): 2, date(2022, 2, 1): 2}
+        january = ArchivedRollup.objects.get(month=date(2022, 1, 1), tag_id__isnull=True)
+        assert (january.total, january.count) == (Decimal("30.00"), 2)
+        checking_account.refresh_from_db()
+        assert checking_account.balance == Decimal("12450.80")
+
+    def test_account_stats_include_archived_months(self, history, auth_headers):
+        archive_transactions(date(2026, 1, 1))
+
+        response = Client().get("/api/ledger/accounts/?include=stats", **auth_headers)
+        stats = {a["name"]: a["stats"] for a in response.json()}
+        checking, savings = stats["Main Checking"], stats["High Yield Savings"]
+        assert (checking["transaction_count"], checking["last_transaction_date"]) == (5, "2026-09-01")
+        # Only archived activity left on this account
+        assert (savings["transaction_count"], savings["last_transaction_date"]) == (1, "2022-02-11")
+
+    def test_backdated_rows_merge_into_existing_chunk(self, history, checking_account):
+        archive_transactions(date(2026, 1, 1))
+        Transaction.objects.create(
+            user=history, transaction_type="expense", amount=Decimal("1.00"),
+            account=checking_account, date=date(2022, 1, 31),
+        )
+        assert archive_transactions(date(2026, 1, 1)) == (1, 1)
+        assert ArchivedTransactionChunk.objects.get(month=date(2022, 1, 1)).row_count == 3
+
+    def test_list_serves_archived_ranges(self, history, auth_headers, tag):
+        archive_transactions(date(2026, 1, 1))
+
+        response = Client().get("/api/ledger/transactions/", **auth_headers)
+        assert [t["date"] for t in response.json()] == ["2026-09-01"]
+
+        response = Client().get("/api/ledger/transactions/?include_archived=true", **auth_headers)
+        assert [t["date"] for t in response.json()] == [
+            "2026-09-01", "2022-02-11", "2022-02-10", "2022-01-20", "2022-01-05",
+        ]
+        oldest = response.json()[-1]
+        assert oldest["note"] == "coffee"
+        assert oldest["category"]["name"] == "Food"
+        assert oldest["tags"] == [{"id": tag.id, "name": tag.name}]
+
+        response = Client().get(
+            "/api/ledger/transactions/?date_from=2022-02-01&transaction_type=transfer", **auth_headers,
+        )
+        assert [t["amount"] for t in response.json()] == ["100.00"]
+        assert response.json()[0]["to_account"]["name"] == "High Yield Savings"
+
+    def test_spending_by_category_uses_rollups_and_edge_months(self, history, auth_headers, expense_category):
+        archive_transactions(date(2026, 1, 1))
+
+        response = Client().get("/api/ledger/transactions/spending-by-category", **auth_headers)
+        assert Decimal(response.json()[0]["total"]) == Decimal("42.50")
+
+        response = Client().get(
+            "/api/ledger/transactions/spending-by-category?date_from=2022-01-10&date_to=2022-02-28",
+            **auth_headers,
+        )
+        assert response.json() == [{
+            "category_id": expense_category.id, "category_name": "Food",
+            "category_icon": "food", "total": "25.00",
+        }]
+
+    def test_spending_by_tag_uses_rollups(self, history, auth_headers, tag, monkeypatch):
+        archive_transactions(date(2026, 1, 1))
+        tag_rollup = ArchivedRollup.objects.get(tag_id=tag.id)
+        assert (tag_rollup.category_id, tag_rollup.total, tag_rollup.count) == (None, Decimal("10.00"), 1)
+
+        def no_decoding(data):
+            raise AssertionError("whole archived months should come from rollups")
+
+        with monkeypatch.context() as patch:
+            patch.setattr("ledger.archive.decode_chunk", no_decoding)
+            response = Client().get("/api/ledger/transactions/spending-by-tag", **auth_headers)
+        [row] = response.json()
+        assert (row["tag_id"], Decimal(row["total"]), row["count"]) == (tag.id, Decimal("10.00"), 1)
+
+        response = Client().get(
+            "/api/ledger/transactions/spending-by-tag?date_from=2022-01-10", **auth_headers,
+        )
+        assert response.json() == []
+
+    def test_by_category_includes_archived(self, history, auth_headers):
+        archive_transactions(date(2026, 1, 1))
+        response = Client().get("/api/ledger/transactions/by-category?include_archived=true", **auth_headers)
+        assert len(response.json()[0]["transactions"]) == 4
+        response = Client().get("/api/ledger/transactions/by-category?date_from=2022-02-01", **auth_headers)
+        assert len(response.json()[0]["transactions"]) == 2
+
+    def test_deleted_category_clears_archived_rows(self, history, auth_headers, expense_category):
+        archive_transactions(date(2026, 1, 1))
+        Category.objects.filter(pk=expense_category.pk).delete()
+
+        response = Client().get("/api/ledger/transactions/?include_archived=true", **auth_headers)
+        assert all(t["category"] is None for t in response.json())
+        response = Client().get("/api/ledger/transactions/spending-by-category", **auth_headers)
+        assert response.json() == []
+
+    def test_sync_snapshot_includes_archived(self, history, auth_headers):
+        archive_transactions(date(2026, 1, 1))
+        response = Client().get("/api/sync", **auth_headers)
+        assert len(response.json()["transactions"]["created"]) == 1
+        response = Client().get("/api/sync?include_archived=true", **auth_headers)
+        assert len(response.json()["transactions"]["created"]) == 5
+
+    def test_command(self, history):
+        out = StringIO()
+        call_command("archive_transactions", database="default", before=date(2022, 2, 1), stdout=out)
+        assert "Archived 2 transactions into 1 monthly chunks" in out.getvalue()
@@ -0,0 +1,147 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.test import Client
+
+from ledger.archive import archive_transactions
+from ledger.balances import compact_balance_deltas, reconcile_balances
+from ledger.models import Account, AccountBalanceDelta, Transaction
+
+
+@pytest.fixture
+def client():
+    return Client()
+
+
+@pytest.fixture
+def accounts(client, auth_headers):
+    def create(name, balance):
+        response = client.post(
+            "/api/ledger/accounts/",
+            data={"name": name, "account_type": "checking", "balance": balance},
+            content_type="application/json",
+            **auth_headers,
+        )
+        return Account.objects.get(pk=response.json()["id"])
+
+    return create("Checking", "1000.00"), create("Savings", "250.00")
+
+
+def _post(client, auth_headers, path, **data):
+    response = client.post(
+        f"/api/ledger/transactions/{path}", data=data, content_type="application/json", **auth_headers,
+    )
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+@pytest.fixture
+def activity(client, auth_headers, accounts, expense_category, income_category):
+    checking, savings = accounts
+    _post(client, auth_headers, "expense", amount="40.00", account_id=checking.id,
+          category_id=expense_category.id, date="2023-01-10")
+    _post(client, auth_headers, "income", amount="500.00", account_id=checking.id,
+          category_id=income_category.id, date="2026-10-01")
+    transfer = _post(client, auth_headers, "transfer", amount="100.00", from_account_id=checking.id,
+                     to_account_id=savings.id, date="2026-10-02")
+    return checking, savings, transfer
+
+
+@pytest.mark.django_db
+class TestReconcileBalances:
+    def test_consistent_ledger_has_no_drift(self, activity):
+        assert reconcile_balances(chunk_size=1) == (2, [])
+
+    def test_reports_and_fixes_drift(self, activity):
+        checking, savings, _ = activity
+        Account.objects.filter(pk=savings.pk).update(balance=Decimal("999.99"))
+
+        checked, drifted = reconcile_balances()
+        assert checked == 2
+        assert drifted == [(savings.pk, savings.user_id, Decimal("999.99"), Decimal("350.00"))]
+        savings.refresh_from_db()
+        assert savings.balance == Decimal("999.99")
+
+        call_command("reconcile_balances", database="default", fix=True)
+        savings.refresh_from_db()
+        assert savings.balance == Decimal("350.00")
+        assert reconcile_balances() == (2, [])
+
+    def test_transfer_to_deleted_account(self, client, auth_headers, activity):
+        checking, savings, transfer = activity
+        savings.delete()
+        assert Transaction.objects.get(pk=transfer).to_account_id is None
+
+        client.delete(f"/api/ledger/transactions/{transfer}", **auth_headers)
+        checking.refresh_from_db()
+        assert checking.balance == Decimal("1460.00")
+        assert reconcile_balances() == (1, [])
+
+    def test_transfer_from_deleted_account(self, activity):
+        checking, savings, _ = activity
+        checking.delete()
+        savings.refresh_from_db()
+        assert savings.balance == Decimal("350.00")
+        assert reconcile_balances() == (1, [])
+
+    def test_archived_transactions_stay_reconciled(self, activity):
+        assert archive_transactions(date(2024, 1, 1)) == (1, 1)
+        checking = Account.objects.get(pk=activity[0].pk)
+        assert checking.opening_balance == Decimal("960.00")
+        assert reconcile_balances() == (2, [])
+
+    def test_single_user(self, activity):
+        assert reconcile_balances(user_id=activity[0].user_id + 1) == (0, [])
+
+
+@pytest.mark.django_db
+class TestBalanceDeltas:
+    @pytest.fixture(autouse=True)
+    def deltas_mode(self, settings):
+        settings.LEDGER_BALANCE_MODE = "deltas"
+
+    def test_writes_append_deltas(self, client, auth_headers, activity):
+        checking, savings, transfer = activity
+        checking.refresh_from_db()
+        assert checking.balance == Decimal("1000.00")
+        assert AccountBalanceDelta.objects.filter(account=checking).count() == 3
+
+        response = client.get(f"/api/ledger/accounts/{checking.id}", **auth_headers)
+        assert Decimal(response.json()["balance"]) == Decimal("1360.00")
+        assert reconcile_balances() == (2, [])
+
+        client.delete(f"/api/ledger/transactions/{transfer}", **auth_headers)
+        balances = {a["name"]: Decimal(a["balance"]) for a in client.get("/api/ledger/accounts/", **auth_headers).json()}
+        assert balances == {"Checking": Decimal("1460.00"), "Savings": Decimal("250.00")}
+
+    def test_compaction_folds_deltas_into_balance(self, client, auth_headers, activity):
+        checking, savings, _ = activity
+        call_command("compact_balance_deltas", database="default")
+        assert not AccountBalanceDelta.objects.exists()
+
+        checking.refresh_from_db()
+        savings.refresh_from_db()
+        assert (checking.balance, savings.balance) == (Decimal("1360.00"), Decimal("350.00"))
+        assert reconcile_balances() == (2, [])
+        assert compact_balance_deltas() == 0
+
+    def test_repair_keeps_pending_deltas(self, activity):
+        checking = activity[0]
+        Account.objects.filter(pk=checking.pk).update(balance=Decimal("0.00"))
+        assert len(reconcile_balances(fix=True)[1]) == 1
+        assert reconcile_balances() == (2, [])
+        compact_balance_deltas()
+        checking.refresh_from_db()
+        assert checking.balance == Decimal("1360.00")
+
+    def test_sync_reports_accounts_with_new_deltas(self, client, auth_headers, accounts, expense_category, settings):
+        settings.SYNC_CURSOR_OVERLAP_SECONDS = 0
+        checking, _ = accounts
+        token = client.get("/api/sync", **auth_headers).json()["next_token"]
+        _post(client, auth_headers, "expense", amount="10.00", account_id=checking.id,
+              category_id=expense_category.id, date="2026-10-03")
+
+        updated = client.get(f"/api/sync?since={token}", **auth_headers).json()["accounts"]["updated"]
+        assert [(a["id"], Decimal(a["balance"])) for a in updated] == [(checking.id, Decimal("990.00"))]
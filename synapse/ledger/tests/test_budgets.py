@@ -0,0 +1,181 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from accounts.models import ExchangeRate, ExchangeRateHistory
+from django.core.management import call_command
+from django.test import Client
+from django.utils import timezone
+
+from ledger.budgets import reconcile
+from ledger.models import Account, Budget, BudgetSpend, Transaction
+from ledger.periods import period_start
+
+URL = "/api/ledger/budgets"
+
+
+def _expense(client, auth_headers, account, category, amount, day):
+    return client.post(
+        "/api/ledger/transactions/expense",
+        data={"amount": amount, "account_id": account.id, "category_id": category.id, "date": day},
+        content_type="application/json",
+        **auth_headers,
+    )
+
+
+def _spent(budget, day):
+    counter = BudgetSpend.objects.filter(budget=budget, period_start=period_start(day, budget.period)).first()
+    return counter.spent if counter else Decimal(0)
+
+
+@pytest.fixture
+def monthly(user, expense_category):
+    return Budget.objects.create(user=user, category=expense_category, period="month", amount=Decimal("300.00"))
+
+
+@pytest.fixture
+def weekly(user, expense_category):
+    return Budget.objects.create(user=user, category=expense_category, period="week", amount=Decimal("80.00"))
+
+
+@pytest.mark.django_db
+class TestSpendCounters:
+    def test_expense_and_delete_adjust_counter(self, client, auth_headers, checking_account, expense_category, monthly):
+        response = _expense(client, auth_headers, checking_account, expense_category, "42.50", "2026-10-05")
+        _expense(client, auth_headers, checking_account, expense_category, "10.00", "2026-10-20")
+        _expense(client, auth_headers, checking_account, expense_category, "5.00", "2026-11-01")
+        assert _spent(monthly, date(2026, 10, 1)) == Decimal("52.50")
+        assert _spent(monthly, date(2026, 11, 1)) == Decimal("5.00")
+
+        client.delete(f"/api/ledger/transactions/{response.json()['id']}", **auth_headers)
+        assert _spent(monthly, date(2026, 10, 1)) == Decimal("10.00")
+
+    def test_week_and_month_budgets_on_one_category(
+        self, client, auth_headers, checking_account, expense_category, monthly, weekly,
+    ):
+        _expense(client, auth_headers, checking_account, expense_category, "20.00", "2026-10-19")
+        _expense(client, auth_headers, checking_account, expense_category, "30.00", "2026-10-26")
+        assert _spent(monthly, date(2026, 10, 1)) == Decimal("50.00")
+        assert _spent(weekly, date(2026, 10, 19)) == Decimal("20.00")
+        assert _spent(weekly, date(2026, 10, 26)) == Decimal("30.00")
+        assert reconcile() == (3, 0)
+
+    def test_converted_into_budget_currency(self, client, auth_headers, user, expense_category, monthly):
+        euro = Account.objects.create(user=user, name="Euro", account_type="checking", currency="EUR")
+        ExchangeRate.objects.create(base_currency="EUR", target_currency="USD", rate=Decimal("1.1000000"))
+        _expense(client, auth_headers, euro, expense_category, "100.00", "2026-10-05")
+        assert _spent(monthly, date(2026, 10, 1)) == Decimal("110.00")
+
+    def test_converted_at_transaction_date(self, client, auth_headers, user, expense_category, monthly):
+        euro = Account.objects.create(user=user, name="Euro", account_type="checking", currency="EUR")
+        ExchangeRateHistory.objects.create(base_currency="EUR", date=date(2026, 10, 1), rates={"USD": "1.1000000"})
+        ExchangeRateHistory.objects.create(base_currency="EUR", date=date(2026, 10, 4), rates={"USD": "1.2000000"})
+        ExchangeRate.objects.create(base_currency="EUR", target_currency="USD", rate=Decimal("1.5000000"))
+
+        first = _expense(client, auth_headers, euro, expense_category, "0.33", "2026-10-02").json()["id"]
+        _expense(client, auth_headers, euro, expense_category, "0.33", "2026-10-03")
+        _expense(client, auth_headers, euro, expense_category, "10.00", "2026-10-05")
+        # Rounded per expense, at each expense's date
+        assert _spent(monthly, date(2026, 10, 1)) == Decimal("0.36") + Decimal("0.36") + Decimal("12.00")
+
+        ExchangeRate.objects.update(rate=Decimal("2.0000000"))
+        assert reconcile() == (1, 0)
+        client.delete(f"/api/ledger/transactions/{first}", **auth_headers)
+        assert _spent(monthly, date(2026, 10, 1)) == Decimal("12.36")
+
+    def test_delete_reverses_amount_recorded(self, client, auth_headers, user, expense_category, monthly):
+        euro = Account.objects.create(user=user, name="Euro", account_type="checking", currency="EUR")
+        ExchangeRate.objects.create(base_currency="EUR", target_currency="USD", rate=Decimal("1.5000000"))
+        # No history for the expense date yet, so the latest rate applies
+        expense = _expense(client, auth_headers, euro, expense_category, "10.00", "2026-10-05").json()["id"]
+        assert Transaction.objects.get(pk=expense).budget_amounts == {"USD": "15.00"}
+
+        # History arrives for that date and the latest rate moves
+        ExchangeRateHistory.objects.create(base_currency="EUR", date=date(2026, 10, 5), rates={"USD": "1.1000000"})
+        ExchangeRate.objects.update(rate=Decimal("2.0000000"))
+        assert reconcile() == (1, 0)
+
+        client.delete(f"/api/ledger/transactions/{expense}", **auth_headers)
+        assert _spent(monthly, date(2026, 10, 1)) == Decimal("0.00")
+
+    def test_batch(self, client, auth_headers, checking_account, expense_category, monthly):
+        mutation = {"op": "expense", "amount": "25.00", "account_id": checking_account.id,
+                    "category_id": expense_category.id, "date": "2026-10-05"}
+        response = client.post(
+            "/api/ledger/batch",
+            data={"mutations": [
+                {**mutation, "idempotency_key": "a"},
+                {**mutation, "idempotency_key": "b"},
+            ]},
+            content_type="application/json",
+            **auth_headers,
+        )
+        assert response.status_code == 200
+        assert _spent(monthly, date(2026, 10, 1)) == Decimal("50.00")
+
+        first = response.json()["results"][0]["transaction"]["id"]
+        client.post(
+            "/api/ledger/batch",
+            data={"mutations": [{"op": "delete", "idempotency_key": "c", "transaction_id": first}]},
+            content_type="application/json",
+            **auth_headers,
+        )
+        assert _spent(monthly, date(2026, 10, 1)) == Decimal("25.00")
+
+    def test_reconcile_repairs_drift(self, client, auth_headers, checking_account, expense_category, monthly):
+        today = timezone.localdate()
+        _expense(client, auth_headers, checking_account, expense_category, "40.00", today.isoformat())
+        BudgetSpend.objects.update(spent=Decimal("999.00"))
+        assert reconcile() == (1, 1)
+
+        call_command("reconcile_budgets", database="default")
+        assert _spent(monthly, today) == Decimal("999.00")
+        call_command("reconcile_budgets", database="default", fix=True)
+        assert _spent(monthly, today) == Decimal("40.00")
+        assert reconcile() == (1, 0)
+
+
+@pytest.mark.django_db
+class TestBudgetEndpoints:
+    def test_create_counts_current_period(self, client, auth_headers, checking_account, expense_category):
+        today = timezone.localdate()
+        _expense(client, auth_headers, checking_account, expense_category, "60.00", today.isoformat())
+        response = client.post(
+            URL, data={"category_id": expense_category.id, "amount": "200.00"},
+            content_type="application/json", **auth_headers,
+        )
+        assert response.status_code == 201
+        body = response.json()
+        assert body["currency"] == "USD"
+        assert body["period_start"] == period_start(today, "month").isoformat()
+        assert Decimal(body["spent"]) == Decimal("60.00")
+        assert Decimal(body["remaining"]) == Decimal("140.00")
+        assert body["progress"] == pytest.approx(0.3)
+
+    def test_create_validation(self, client, auth_headers, expense_category, income_category, monthly):
+        def create(**data):
+            return client.post(URL, data=data, content_type="application/json", **auth_headers)
+
+        assert create(category_id=income_category.id, amount="10").status_code == 400
+        assert create(category_id=expense_category.id, amount="0").status_code == 400
+        assert create(category_id=expense_category.id, amount="10", period="month").status_code == 400
+        assert create(category_id=expense_category.id, amount="10", period="week").status_code == 201
+
+    def test_list_for_day(self, client, auth_headers, checking_account, expense_category, monthly, weekly):
+        _expense(client, auth_headers, checking_account, expense_category, "20.00", "2026-10-19")
+        _expense(client, auth_headers, checking_account, expense_category, "30.00", "2026-10-26")
+        response = Client().get(f"{URL}?on=2026-10-27", **auth_headers)
+        assert response.status_code == 200
+        by_period = {b["period"]: b for b in response.json()}
+        assert Decimal(by_period["month"]["spent"]) == Decimal("50.00")
+        assert by_period["week"]["period_start"] == "2026-10-26"
+        assert by_period["week"]["period_end"] == "2026-11-01"
+        assert Decimal(by_period["week"]["spent"]) == Decimal("30.00")
+
+    def test_update_and_delete(self, client, auth_headers, monthly):
+        response = client.put(
+            f"{URL}/{monthly.id}", data={"amount": "500.00"}, content_type="application/json", **auth_headers,
+        )
+        assert Decimal(response.json()["amount"]) == Decimal("500.00")
+        assert client.delete(f"{URL}/{monthly.id}", **auth_headers).status_code == 200
+        assert client.delete(f"{URL}/{monthly.id}", **auth_headers).status_code == 404
@@ -0,0 +1,86 @@
+import csv
+import io
+import json
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import Client
+
+from ledger.archive import archive_transactions
+from ledger.export import parquet_available
+from ledger.models import Transaction
+
+
+@pytest.fixture
+def ledger(user, checking_account, savings_account, expense_category, tag):
+    first = Transaction.objects.create(
+        user=user, transaction_type="expense", amount=Decimal("8.50"), currency="EUR",
+        original_amount=Decimal("8.00"), exchange_rate=Decimal("1.0625000"),
+        account=checking_account, category=expense_category, date=date(2021, 3, 1), note="lunch",
+    )
+    first.tags.add(tag)
+    Transaction.objects.create(
+        user=user, transaction_type="transfer", amount=Decimal("100.00"),
+        account=checking_account, to_account=savings_account, date=date(2026, 9, 2),
+    )
+    for day in range(1, 6):
+        Transaction.objects.create(
+            user=user, transaction_type="expense", amount=Decimal(day),
+            account=checking_account, category=expense_category, date=date(2026, 10, day),
+        )
+    return user
+
+
+def _body(response):
+    async def collect():
+        return b"".join([chunk async for chunk in response.streaming_content])
+
+    return async_to_sync(collect)()
+
+
+@pytest.mark.django_db
+class TestExport:
+    def test_csv(self, ledger, auth_headers, settings):
+        settings.LEDGER_EXPORT_CHUNK_SIZE = 2
+        response = Client().get("/api/ledger/export", **auth_headers)
+        assert response.status_code == 200
+        assert response["Content-Type"].startswith("text/csv")
+        assert "attachment" in response["Content-Disposition"]
+
+        rows = list(csv.DictReader(io.StringIO(_body(response).decode())))
+        assert len(rows) == 7
+        assert rows[0]["date"] == "2021-03-01"
+        assert rows[0]["account"] == "Main Checking"
+        assert rows[0]["category"] == "Food"
+        assert rows[0]["tags"] == "Savings"
+        assert (rows[0]["currency"], rows[0]["original_amount"], rows[0]["account_currency"]) == (
+            "EUR", "8.00", "USD",
+        )
+        assert rows[1]["to_account"] == "High Yield Savings"
+        assert [r["date"] for r in rows] == sorted(r["date"] for r in rows)
+
+    def test_jsonl_includes_archived_rows(self, ledger, auth_headers):
+        archive_transactions(date(2022, 1, 1))
+        response = Client().get("/api/ledger/export?format=jsonl", **auth_headers)
+        lines = [json.loads(line) for line in _body(response).decode().splitlines()]
+        assert len(lines) == 7
+        assert lines[0]["note"] == "lunch"
+        assert lines[0]["tags"] == ["Savings"]
+        assert lines[0]["exchange_rate"] == "1.0625000"
+
+    def test_only_own_rows(self, ledger, auth_headers, django_user_model):
+        other = django_user_model.objects.create_user(email="other@example.com", password="x" * 12)
+        Transaction.objects.filter(user=ledger).update(user=other)
+        response = Client().get("/api/ledger/export?format=jsonl", **auth_headers)
+        assert _body(response) == b""
+
+    @pytest.mark.skipif(parquet_available(), reason="pyarrow is installed")
+    def test_parquet_requires_pyarrow(self, auth_headers):
+        response = Client().get("/api/ledger/export?format=parquet", **auth_headers)
+        assert response.status_code == 400
+
+    def test_rejects_unknown_format(self, auth_headers):
+        response = Client().get("/api/ledger/export?format=xml", **auth_headers)
+        assert response.status_code == 422
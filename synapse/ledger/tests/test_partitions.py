@@ -0,0 +1,28 @@
+from datetime import date
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from ledger.partitions import add_months, ensure_partitions, month_start, partition_name
+
+
+def test_month_arithmetic():
+    assert month_start(date(2026, 10, 19)) == date(2026, 10, 1)
+    assert add_months(date(2026, 11, 1), 1) == date(2026, 12, 1)
+    assert add_months(date(2026, 11, 1), 2) == date(2027, 1, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+    assert add_months(date(2026, 1, 1), 27) == date(2028, 4, 1)
+
+
+def test_partition_name():
+    assert partition_name(date(2026, 3, 1)) == "transactions_y2026m03"
+
+
+@pytest.mark.django_db
+def test_ensure_partitions_is_noop_without_postgres():
+    assert ensure_partitions(months_ahead=2) == []
+
+    out = StringIO()
+    call_command("create_transaction_partitions", database="default", stdout=out)
+    assert "Created 0 transaction partitions." in out.getvalue()
@@ -0,0 +1,114 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from accounts.models import ExchangeRate, ExchangeRateHistory
+from django.test import Client
+
+from ledger.archive import archive_transactions
+from ledger.models import Account, Transaction
+from ledger.periods import next_period, period_start
+
+URL = "/api/ledger/reports/cash-flow"
+
+
+def test_period_boundaries():
+    assert period_start(date(2026, 10, 22), "week") == date(2026, 10, 19)
+    assert period_start(date(2026, 10, 22), "month") == date(2026, 10, 1)
+    assert next_period(date(2026, 12, 1), "month") == date(2027, 1, 1)
+    assert next_period(date(2026, 10, 19), "week") == date(2026, 10, 26)
+    assert period_start(date(2026, 10, 22), "year") == date(2026, 1, 1)
+    assert next_period(date(2026, 1, 1), "year") == date(2027, 1, 1)
+
+
+@pytest.fixture
+def activity(user, checking_account, savings_account, expense_category, income_category):
+    euro = Account.objects.create(user=user, name="Euro", account_type="checking", currency="EUR")
+    ExchangeRate.objects.create(base_currency="EUR", target_currency="USD", rate=Decimal("1.1000000"))
+
+    def add(kind, amount, day, account=checking_account, **extra):
+        Transaction.objects.create(
+            user=user, transaction_type=kind, amount=Decimal(amount), account=account, date=day, **extra,
+        )
+
+    add("income", "1000.00", date(2026, 8, 1), category=income_category)
+    add("expense", "200.00", date(2026, 8, 15), category=expense_category)
+    add("expense", "100.00", date(2026, 10, 5), account=euro, category=expense_category)
+    add("transfer", "50.00", date(2026, 10, 6), to_account=savings_account)
+    return user
+
+
+@pytest.mark.django_db
+class TestCashFlow:
+    def test_monthly_in_main_currency(self, activity, auth_headers):
+        response = Client().get(f"{URL}?granularity=month&from=2026-08-01&to=2026-10-31", **auth_headers)
+        assert response.status_code == 200
+        body = response.json()
+        assert body["currency"] == "USD"
+        assert [p["period_start"] for p in body["periods"]] == ["2026-08-01", "2026-09-01", "2026-10-01"]
+
+        august, september, october = body["periods"]
+        assert (Decimal(august["income"]), Decimal(august["expense"]), Decimal(august["net"])) == (
+            Decimal("1000"), Decimal("200"), Decimal("800"),
+        )
+        assert Decimal(september["net"]) == 0
+        assert Decimal(october["expense"]) == Decimal("110.00")
+        assert Decimal(october["transfers"]) == Decimal("50.00")
+        assert Decimal(body["net"]) == Decimal("690.00")
+        assert body["unconverted_currencies"] == []
+
+    def test_weekly_periods_start_on_monday(self, activity, auth_headers):
+        response = Client().get(f"{URL}?granularity=week&from=2026-10-01&to=2026-10-11", **auth_headers)
+        periods = response.json()["periods"]
+        assert [p["period_start"] for p in periods] == ["2026-09-28", "2026-10-05"]
+        assert Decimal(periods[1]["expense"]) == Decimal("110.00")
+
+    def test_missing_rate_is_reported(self, activity, auth_headers):
+        ExchangeRate.objects.all().delete()
+        response = Client().get(f"{URL}?from=2026-10-01&to=2026-10-31", **auth_headers)
+        assert response.json()["unconverted_currencies"] == ["EUR"]
+        assert Decimal(response.json()["expense"]) == 0
+
+    def test_converts_at_historical_rate(self, activity, auth_headers):
+        euro = Account.objects.get(user=activity, currency="EUR")
+        Transaction.objects.create(
+            user=activity, transaction_type="expense", amount=Decimal("100.00"), account=euro, date=date(2026, 8, 10),
+        )
+        ExchangeRateHistory.objects.create(base_currency="EUR", date=date(2026, 8, 8), rates={"USD": "1.2000000"})
+        ExchangeRateHistory.objects.create(base_currency="EUR", date=date(2026, 8, 28), rates={"USD": "1.5000000"})
+        response = Client().get(f"{URL}?from=2026-08-01&to=2026-10-31", **auth_headers)
+        august, _, october = response.json()["periods"]
+        # At the rate on 10 August, not the one in effect at the end of the month
+        assert Decimal(august["expense"]) == Decimal("320.00")
+        # No history within a week of 5 October; the latest rate is used
+        assert Decimal(october["expense"]) == Decimal("110.00")
+
+    def test_archived_rows_convert_at_their_own_date(self, activity, auth_headers):
+        euro = Account.objects.get(user=activity, currency="EUR")
+        for day in (date(2026, 8, 3), date(2026, 8, 24)):
+            Transaction.objects.create(
+                user=activity, transaction_type="expense", amount=Decimal("10.00"), account=euro, date=day,
+            )
+        ExchangeRateHistory.objects.create(base_currency="EUR", date=date(2026, 8, 1), rates={"USD": "1.2000000"})
+        ExchangeRateHistory.objects.create(base_currency="EUR", date=date(2026, 8, 20), rates={"USD": "1.5000000"})
+        archive_transactions(date(2026, 9, 1))
+
+        response = Client().get(f"{URL}?from=2026-08-01&to=2026-08-31", **auth_headers)
+        assert Decimal(response.json()["expense"]) == Decimal("200.00") + Decimal("12.00") + Decimal("15.00")
+
+    def test_includes_archived_months(self, activity, auth_headers):
+        archive_transactions(date(2026, 9, 1))
+        response = Client().get(f"{URL}?from=2026-08-01&to=2026-08-31", **auth_headers)
+        assert Decimal(response.json()["net"]) == Decimal("800.00")
+
+    def test_validation(self, auth_headers):
+        response = Client().get(f"{URL}?from=2026-10-02&to=2026-10-01", **auth_headers)
+        assert response.status_code == 400
+        response = Client().get(f"{URL}?granularity=day&from=2020-01-01&to=2026-01-01", **auth_headers)
+        assert response.status_code == 400
+        response = Client().get(f"{URL}?granularity=year", **auth_headers)
+        assert response.status_code == 422
+
+    def test_defaults_to_twelve_months(self, auth_headers):
+        response = Client().get(URL, **auth_headers)
+        assert len(response.json()["periods"]) == 12
@@ -0,0 +1,119 @@
+import threading
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from accounts.middleware import rls_context
+from accounts.models import ExchangeRate
+from django.db import connection, connections, transaction
+from django.test import Client
+
+from ledger.balances import reconcile_balances
+from ledger.models import Account
+from ledger.services import build_transfer, post_transaction
+
+URL = "/api/ledger/transactions/transfer"
+
+
+@pytest.fixture
+def euro_account(user):
+    return Account.objects.create(
+        user=user, name="Euro", account_type="checking", balance=Decimal("100.00"),
+        opening_balance=Decimal("100.00"), currency="EUR",
+    )
+
+
+@pytest.fixture
+def rates():
+    ExchangeRate.objects.create(base_currency="USD", target_currency="EUR", rate=Decimal("0.9000000"))
+    ExchangeRate.objects.create(base_currency="EUR", target_currency="USD", rate=Decimal("1.1000000"))
+
+
+def _transfer(auth_headers, source, destination, amount, **extra):
+    return Client().post(
+        URL,
+        data={"amount": amount, "from_account_id": source.id, "to_account_id": destination.id,
+              "date": "2026-10-05", **extra},
+        content_type="application/json",
+        **auth_headers,
+    )
+
+
+@pytest.mark.django_db
+class TestCrossCurrencyTransfer:
+    def test_destination_credited_in_its_currency(self, auth_headers, checking_account, euro_account, rates):
+        response = _transfer(auth_headers, checking_account, euro_account, "50.00")
+        assert response.status_code == 201
+        body = response.json()
+        assert (Decimal(body["amount"]), body["currency"]) == (Decimal("50.00"), "USD")
+        assert Decimal(body["to_amount"]) == Decimal("45.00")
+
+        checking_account.refresh_from_db()
+        euro_account.refresh_from_db()
+        assert checking_account.balance == Decimal("12400.80")
+        assert euro_account.balance == Decimal("145.00")
+
+        Client().delete(f"/api/ledger/transactions/{body['id']}", **auth_headers)
+        euro_account.refresh_from_db()
+        assert euro_account.balance == Decimal("100.00")
+
+    def test_amount_in_destination_currency(self, auth_headers, checking_account, euro_account, rates):
+        response = _transfer(auth_headers, checking_account, euro_account, "20.00", currency="EUR")
+        body = response.json()
+        assert Decimal(body["amount"]) == Decimal("22.00")
+        assert Decimal(body["original_amount"]) == Decimal("20.00")
+        assert Decimal(body["to_amount"]) == Decimal("20.00")
+
+    def test_same_currency_has_no_to_amount(self, auth_headers, checking_account, savings_account):
+        body = _transfer(auth_headers, checking_account, savings_account, "10.00").json()
+        assert body["to_amount"] is None
+
+    def test_missing_rate_rejected(self, auth_headers, checking_account, euro_account):
+        response = _transfer(auth_headers, checking_account, euro_account, "50.00")
+        assert response.status_code == 400
+        euro_account.refresh_from_db()
+        assert euro_account.balance == Decimal("100.00")
+
+    def test_reconciles(self, auth_headers, user, euro_account, rates):
+        usd = Account.objects.create(
+            user=user, name="USD", account_type="checking", balance=Decimal("500.00"),
+            opening_balance=Decimal("500.00"), currency="USD",
+        )
+        _transfer(auth_headers, usd, euro_account, "50.00")
+        _transfer(auth_headers, euro_account, usd, "10.00")
+        assert reconcile_balances() == (2, [])
+
+
+@pytest.mark.skipif(connection.vendor != "postgresql", reason="row locks need Postgres")
+@pytest.mark.django_db(transaction=True)
+def test_opposing_transfers_do_not_deadlock(user, checking_account, savings_account):
+    """Parallel A->B and B->A transfers all commit and leave the total unchanged."""
+    rounds, workers = 50, 8
+    total = checking_account.balance + savings_account.balance
+    errors = []
+
+    payload = SimpleNamespace(amount=Decimal("1.00"), currency=None, note="", date=checking_account.created_at.date())
+
+    def worker(index):
+        source, destination = checking_account, savings_account
+        if index % 2:
+            source, destination = destination, source
+        try:
+            for _ in range(rounds):
+                with transaction.atomic(), rls_context(user.pk):
+                    post_transaction(build_transfer(user, payload, source, destination))
+        except Exception as e:  # noqa: BLE001 - surfaced through the assertion below
+            errors.append(e)
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    checking_account.refresh_from_db()
+    savings_account.refresh_from_db()
+    assert checking_account.balance + savings_account.balance == total
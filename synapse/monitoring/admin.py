@@ -0,0 +1,16 @@
+from django.contrib import admin
+
+from .models import RequestProfile, SlowQuery
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = ("created_at", "method", "path", "status_code", "duration_ms", "query_count", "trigger")
+    list_filter = ("trigger", "method")
+    search_fields = ("path", "route")
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = ("fingerprint", "operation", "calls", "total_ms", "max_ms", "last_seen")
+    search_fields = ("operation", "normalized_sql")
@@ -0,0 +1,56 @@
+import textwrap
+
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from monitoring.models import SlowQuery
+
+ORDERINGS = {
+    "total": F("total_ms").desc(),
+    "max": F("max_ms").desc(),
+    "calls": F("calls").desc(),
+    "avg": (F("total_ms") / F("calls")).desc(),
+}
+
+
+class Command(BaseCommand):
+    help = "Show the slowest query fingerprints recorded by the slow-query log."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top", type=int, default=20, help="Number of fingerprints to show.")
+        parser.add_argument(
+            "--order-by",
+            choices=sorted(ORDERINGS),
+            default="total",
+            help="Rank by total time (default), max time, call count or average time.",
+        )
+        parser.add_argument("--operation", help="Only show queries issued by this operation.")
+        parser.add_argument("--plans", action="store_true", help="Print captured EXPLAIN plans.")
+        parser.add_argument("--reset", action="store_true", help="Delete all recorded slow queries.")
+
+    def handle(self, *args, **options):
+        if options["reset"]:
+            deleted, _ = SlowQuery.objects.all().delete()
+            self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} slow query records."))
+            return
+
+        qs = SlowQuery.objects.order_by(ORDERINGS[options["order_by"]])
+        if options["operation"]:
+            qs = qs.filter(operation=options["operation"])
+        rows = list(qs[:options["top"]])
+        if not rows:
+            self.stdout.write("No slow queries recorded.")
+            return
+
+        for rank, row in enumerate(rows, 1):
+            self.stdout.write(
+                f"#{rank} {row.fingerprint}  calls={row.calls}  total={row.total_ms:.0f}ms  "
+                f"avg={row.total_ms / row.calls:.1f}ms  max={row.max_ms:.1f}ms  "
+                f"last={row.last_seen:%Y-%m-%d %H:%M}"
+            )
+            self.stdout.write(f"    {row.operation}")
+            self.stdout.write(textwrap.indent(textwrap.fill(row.normalized_sql, 100), "    "))
+            if options["plans"] and row.plan:
+                self.stdout.write(f"    plan captured {row.plan_captured_at:%Y-%m-%d %H:%M}:")
+                self.stdout.write(textwrap.indent(row.plan, "      "))
+            self.stdout.write("")
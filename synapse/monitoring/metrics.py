@@ -0,0 +1,222 @@
+"""
+Prometheus-style counters and histograms shared by every worker process.
+
+Each process buffers samples in memory and a background thread adds them
+to one Redis hash every METRICS_FLUSH_INTERVAL seconds, in a single
+pipelined round trip, so the request path never waits on Redis. /metrics reads the hash,
+which already holds the sum over all uvicorn workers. Values are integers
+so HINCRBY can add them atomically; durations are kept in microseconds.
+Without a Redis cache (e.g. LocMemCache in tests) samples stay in-process.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+
+METRICS_FLUSH_INTERVAL = getattr(settings, "METRICS_FLUSH_INTERVAL", 1.0)
+REDIS_KEY = "metrics:series"
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+# name -> (type, help, scale); histogram sums are stored multiplied by scale
+_metrics: dict[str, tuple[str, str, int]] = {}
+
+
+def describe(name, kind, help_text, scale=1):
+    _metrics[name] = (kind, help_text, scale)
+    return name
+
+
+HTTP_REQUESTS = describe(
+    "http_requests_total", "counter", "HTTP requests by route, method and status.",
+)
+HTTP_DURATION = describe(
+    "http_request_duration_seconds", "histogram", "Time to serve a request.", scale=1_000_000,
+)
+HTTP_DB_QUERIES = describe(
+    "http_request_db_queries", "histogram", "Database queries run while serving a request.",
+)
+HTTP_DB_DURATION = describe(
+    "http_request_db_seconds", "histogram", "Time spent in database queries per request.", scale=1_000_000,
+)
+CACHE_REQUESTS = describe(
+    "cache_requests_total", "counter", "Lookups in application caches by result.",
+)
+PASSWORD_CHECKS_STARTED = describe(
+    "password_hash_checks_started_total", "counter", "bcrypt password checks submitted.",
+)
+PASSWORD_CHECKS_FINISHED = describe(
+    "password_hash_checks_finished_total", "counter", "bcrypt password checks completed.",
+)
+
+
+def _redis():
+    try:
+        from django_redis import get_redis_connection
+
+        return get_redis_connection("default")
+    except Exception:
+        return None
+
+
+class Registry:
+    def __init__(self, background=False):
+        self._lock = threading.Lock()
+        self._pending = defaultdict(int)
+        self._local = defaultdict(int)
+        self._last_flush = time.monotonic()
+        self._background = background
+        self._flusher_pid = None
+
+    def _ensure_flusher(self):
+        # Started lazily and per process: a thread does not survive a fork
+        if not self._background or self._flusher_pid == os.getpid():
+            return
+        with self._lock:
+            if self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+        threading.Thread(target=self._flush_loop, name="metrics-flush", daemon=True).start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(METRICS_FLUSH_INTERVAL)
+            try:
+                self.flush(force=True)
+            except Exception:
+                logger.exception("Metrics flush failed")
+
+    def _add(self, name, suffix, labels, amount):
+        self._ensure_flusher()
+        field = json.dumps([name, suffix, sorted(labels.items())])
+        with self._lock:
+            self._pending[field] += amount
+
+    def inc(self, name, labels=None, amount=1):
+        self._add(name, "", labels or {}, amount)
+
+    def observe(self, name, value, buckets, labels=None):
+        labels = labels or {}
+        scale = _metrics[name][2]
+        for bound in buckets:
+            # Empty buckets are still written so every series has the full set
+            self._add(name, "_bucket", {**labels, "le": str(bound)}, 1 if value <= bound else 0)
+        self._add(name, "_bucket", {**labels, "le": "+Inf"}, 1)
+        self._add(name, "_count", labels, 1)
+        self._add(name, "_sum", labels, int(round(value * scale)))
+
+    def flush(self, force=False):
+        """Push buffered samples to Redis if the flush interval has passed (or force)."""
+        now = time.monotonic()
+        if not force and now - self._last_flush < METRICS_FLUSH_INTERVAL:
+            return
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(int)
+            self._last_flush = now
+        if not pending:
+            return
+
+        redis = _redis()
+        if redis is None:
+            with self._lock:
+                for field, amount in pending.items():
+                    self._local[field] += amount
+            return
+        try:
+            pipe = redis.pipeline(transaction=False)
+            for field, amount in pending.items():
+                pipe.hincrby(REDIS_KEY, field, amount)
+            pipe.execute()
+        except Exception:
+            # Keep the samples for the next attempt; the series set is bounded
+            with self._lock:
+                for field, amount in pending.items():
+                    self._pending[field] += amount
+
+    def snapshot(self) -> dict[tuple, int]:
+        """Return {(name, suffix, labels): value} summed over every process."""
+        self.flush(force=True)
+        redis = _redis()
+        if redis is None:
+            with self._lock:
+                raw = dict(self._local)
+        else:
+            try:
+                raw = {k.decode(): int(v) for k, v in redis.hgetall(REDIS_KEY).items()}
+            except Exception:
+                raw = {}
+        samples = {}
+        for field, value in raw.items():
+            name, suffix, labels = json.loads(field)
+            samples[(name, suffix, tuple(tuple(pair) for pair in labels))] = value
+        return samples
+
+    def reset(self):
+        with self._lock:
+            self._pending.clear()
+            self._local.clear()
+        redis = _redis()
+        if redis is not None:
+            try:
+                redis.delete(REDIS_KEY)
+            except Exception:
+                pass
+
+
+registry = Registry(background=True)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_sample(name, labels, value) -> str:
+    if labels:
+        label_str = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+        return f"{name}{{{label_str}}} {value}"
+    return f"{name} {value}"
+
+
+def _bucket_order(labels):
+    le = dict(labels).get("le")
+    return (
+        tuple(pair for pair in labels if pair[0] != "le"),
+        float("inf") if le == "+Inf" else float(le or 0),
+    )
+
+
+def render(samples, gauges=()) -> str:
+    """
+    Render samples in the Prometheus text exposition format.
+
+    `gauges` is an iterable of (name, help, [(labels, value), ...]) for
+    values computed at scrape time.
+    """
+    by_metric = defaultdict(list)
+    for (name, suffix, labels), value in samples.items():
+        by_metric[name].append((suffix, labels, value))
+
+    lines = []
+    for name in sorted(by_metric):
+        kind, help_text, scale = _metrics.get(name, ("untyped", "", 1))
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for suffix, labels, value in sorted(by_metric[name], key=lambda s: (s[0], _bucket_order(s[1]))):
+            if suffix == "_sum" and scale != 1:
+                value = value / scale
+            lines.append(format_sample(name + suffix, labels, value))
+
+    for name, help_text, values in gauges:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        for labels, value in values:
+            lines.append(format_sample(name, tuple(sorted(labels.items())), value))
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,156 @@
+import logging
+import random
+import threading
+import time
+from contextlib import ExitStack
+
+from accounts.middleware import get_request_user_id
+from accounts.models import User
+from django.conf import settings
+from django.db import connections
+
+from .metrics import (
+    DURATION_BUCKETS,
+    HTTP_DB_DURATION,
+    HTTP_DB_QUERIES,
+    HTTP_DURATION,
+    HTTP_REQUESTS,
+    QUERY_COUNT_BUCKETS,
+    registry,
+)
+from .models import RequestProfile
+from .profiler import SQLTimeline, StackSampler
+from .slow_queries import current_operation
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    """execute_wrapper that counts queries and their total time."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - start
+
+
+class MetricsMiddleware:
+    """
+    Record latency, status and database usage for every request.
+
+    Requests are labelled by URL route (e.g. api/ledger/accounts/<account_id>)
+    and method, which identifies the django-ninja operation while keeping
+    label cardinality bounded. Must come first in MIDDLEWARE to time the
+    whole stack.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = QueryStats()
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(stats))
+                response = self.get_response(request)
+        finally:
+            token = getattr(request, "_operation_token", None)
+            if token is not None:
+                current_operation.reset(token)
+        elapsed = time.perf_counter() - start
+
+        match = getattr(request, "resolver_match", None)
+        labels = {
+            "route": match.route if match else "unmatched",
+            "method": request.method,
+        }
+        registry.inc(HTTP_REQUESTS, {**labels, "status": str(response.status_code)})
+        registry.observe(HTTP_DURATION, elapsed, DURATION_BUCKETS, labels)
+        registry.observe(HTTP_DB_QUERIES, stats.count, QUERY_COUNT_BUCKETS, labels)
+        registry.observe(HTTP_DB_DURATION, stats.seconds, DURATION_BUCKETS, labels)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Label queries from here on (e.g. in the slow-query log) with this operation
+        request._operation_token = current_operation.set(
+            f"{request.method} {request.resolver_match.route}"
+        )
+
+
+class ProfilerMiddleware:
+    """
+    Capture a sampled stack profile and SQL timeline for selected requests.
+
+    A request is profiled when a staff user sends `X-Profile: 1`, or at
+    random with probability PROFILER_SAMPLE_RATE. The profile is stored as a
+    RequestProfile and its id returned in the `X-Profile-Id` header. Other
+    requests pay for one header lookup and one random() call.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, "PROFILER_SAMPLE_RATE", 0.0)
+        self.interval = getattr(settings, "PROFILER_INTERVAL", 0.005)
+
+    def _trigger(self, request, user_id):
+        if request.headers.get("X-Profile") and user_id is not None:
+            if User.objects.filter(pk=user_id, is_staff=True).exists():
+                return "header"
+        if self.sample_rate and random.random() < self.sample_rate:
+            return "sample"
+        return None
+
+    def __call__(self, request):
+        if not (request.headers.get("X-Profile") or self.sample_rate):
+            return self.get_response(request)
+
+        user_id = get_request_user_id(request)
+        trigger = self._trigger(request, user_id)
+        if trigger is None:
+            return self.get_response(request)
+
+        started = time.perf_counter()
+        timeline = SQLTimeline(started)
+        sampler = StackSampler(threading.get_ident(), self.interval)
+        sampler.start()
+        try:
+            with ExitStack() as stack:
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(timeline))
+                response = self.get_response(request)
+        finally:
+            sampler.stop()
+        elapsed = time.perf_counter() - started
+
+        match = getattr(request, "resolver_match", None)
+        try:
+            profile = RequestProfile.objects.create(
+                user_id=user_id,
+                method=request.method,
+                path=request.path[:500],
+                route=match.route if match else "",
+                status_code=response.status_code,
+                trigger=trigger,
+                duration_ms=elapsed * 1000,
+                query_count=timeline.count,
+                query_ms=timeline.seconds * 1000,
+                sample_count=sum(sampler.samples.values()),
+                folded_stacks=sampler.folded(),
+                sql_timeline=timeline.entries,
+            )
+        except Exception:
+            # Profiling must never break the request it is observing
+            logger.exception("Failed to store request profile for %s", request.path)
+            return response
+
+        response["X-Profile-Id"] = str(profile.pk)
+        return response
@@ -0,0 +1,58 @@
+import uuid
+
+from django.conf import settings
+from django.db import models
+
+
+class RequestProfile(models.Model):
+    """A sampled stack profile and SQL timeline captured for one request."""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="request_profiles",
+    )
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    route = models.CharField(max_length=200, blank=True)
+    status_code = models.PositiveSmallIntegerField()
+    trigger = models.CharField(max_length=10)  # "header" or "sample"
+    duration_ms = models.FloatField()
+    query_count = models.PositiveIntegerField()
+    query_ms = models.FloatField()
+    sample_count = models.PositiveIntegerField()
+    folded_stacks = models.TextField(blank=True)
+    sql_timeline = models.JSONField(default=list, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        db_table = "monitoring_request_profiles"
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.method} {self.path} {self.duration_ms:.0f}ms"
+
+
+class SlowQuery(models.Model):
+    """Aggregated timings for one SQL fingerprint issued by one operation."""
+
+    fingerprint = models.CharField(max_length=16)
+    operation = models.CharField(max_length=250)
+    normalized_sql = models.TextField()
+    calls = models.PositiveIntegerField(default=0)
+    total_ms = models.FloatField(default=0)
+    max_ms = models.FloatField(default=0)
+    first_seen = models.DateTimeField()
+    last_seen = models.DateTimeField()
+    plan = models.TextField(blank=True)
+    plan_captured_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "monitoring_slow_queries"
+        unique_together = ("fingerprint", "operation")
+
+    def __str__(self):
+        return f"{self.fingerprint} {self.operation} ({self.calls} calls)"
@@ -0,0 +1,76 @@
+"""
+Low-overhead stack sampling for individual requests.
+
+A daemon thread reads the request thread's current frame every
+PROFILER_INTERVAL seconds via sys._current_frames() and counts identical
+stacks. The result is written in the "folded" format (one
+`outer;inner;leaf count` line per stack) that flamegraph.pl, speedscope
+and most flame-graph viewers load directly.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+SQL_TIMELINE_LIMIT = 1000
+SQL_TEXT_LIMIT = 2000
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def folded(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common())
+
+
+class SQLTimeline:
+    """execute_wrapper recording when each query started and how long it took."""
+
+    def __init__(self, started):
+        self.started = started
+        self.entries = []
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.count += 1
+            self.seconds += duration
+            if len(self.entries) < SQL_TIMELINE_LIMIT:
+                self.entries.append({
+                    "offset_ms": round((start - self.started) * 1000, 3),
+                    "duration_ms": round(duration * 1000, 3),
+                    "alias": context["connection"].alias,
+                    "sql": sql[:SQL_TEXT_LIMIT],
+                })
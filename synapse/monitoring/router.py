@@ -0,0 +1,64 @@
+from uuid import UUID
+
+from accounts.auth import JWTAuth
+from accounts.schemas import ErrorResponse
+from django.http import HttpResponse
+from ninja import Router
+
+from .models import RequestProfile
+from .schemas import ProfileDetailResponse, ProfileSummaryResponse
+
+router = Router(tags=["Profiles"])
+
+PROFILE_LIST_LIMIT = 100
+
+
+@router.get(
+    "",
+    response={200: list[ProfileSummaryResponse], 403: ErrorResponse},
+    auth=JWTAuth(),
+    description="List the most recent request profiles, optionally for one route. Staff only.",
+)
+def list_profiles(request, route: str = None, limit: int = 50):
+    if not request.auth.is_staff:
+        return 403, ErrorResponse(detail="Staff only")
+    qs = RequestProfile.objects.defer("folded_stacks", "sql_timeline")
+    if route:
+        qs = qs.filter(route=route)
+    limit = max(1, min(limit, PROFILE_LIST_LIMIT))
+    return 200, [ProfileSummaryResponse.from_profile(p) for p in qs[:limit]]
+
+
+@router.get(
+    "/{profile_id}",
+    response={200: ProfileDetailResponse, 403: ErrorResponse, 404: ErrorResponse},
+    auth=JWTAuth(),
+    description="Get a request profile with its SQL timeline. Staff only.",
+)
+def get_profile(request, profile_id: UUID):
+    if not request.auth.is_staff:
+        return 403, ErrorResponse(detail="Staff only")
+    profile = RequestProfile.objects.filter(pk=profile_id).first()
+    if profile is None:
+        return 404, ErrorResponse(detail="Profile not found")
+    return 200, ProfileDetailResponse.from_profile(profile)
+
+
+@router.get(
+    "/{profile_id}/flamegraph",
+    response={403: ErrorResponse, 404: ErrorResponse},
+    auth=JWTAuth(),
+    description=(
+        "Download the sampled stacks in folded format, for flamegraph.pl or speedscope. Staff only."
+    ),
+)
+def download_flamegraph(request, profile_id: UUID):
+    if not request.auth.is_staff:
+        return 403, ErrorResponse(detail="Staff only")
+    profile = RequestProfile.objects.filter(pk=profile_id).first()
+    if profile is None:
+        return 404, ErrorResponse(detail="Profile not found")
+    response = HttpResponse(profile.folded_stacks, content_type="text/plain; charset=utf-8")
+    response["Content-Disposition"] = f'attachment; filename="profile-{profile.pk}.folded"'
+    return response
+
@@ -0,0 +1,53 @@
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from ninja import Schema
+
+
+class ProfileSummaryResponse(Schema):
+    id: UUID
+    method: str
+    path: str
+    route: str
+    status_code: int
+    trigger: str
+    duration_ms: float
+    query_count: int
+    query_ms: float
+    sample_count: int
+    user_id: Optional[int]
+    created_at: datetime
+
+    @staticmethod
+    def from_profile(profile):
+        return ProfileSummaryResponse(
+            id=profile.id,
+            method=profile.method,
+            path=profile.path,
+            route=profile.route,
+            status_code=profile.status_code,
+            trigger=profile.trigger,
+            duration_ms=profile.duration_ms,
+            query_count=profile.query_count,
+            query_ms=profile.query_ms,
+            sample_count=profile.sample_count,
+            user_id=profile.user_id,
+            created_at=profile.created_at,
+        )
+
+
+class SQLTimelineEntry(Schema):
+    offset_ms: float
+    duration_ms: float
+    alias: str
+    sql: str
+
+
+class ProfileDetailResponse(ProfileSummaryResponse):
+    sql_timeline: list[SQLTimelineEntry]
+
+    @staticmethod
+    def from_profile(profile):
+        summary = ProfileSummaryResponse.from_profile(profile)
+        return ProfileDetailResponse(**summary.model_dump(), sql_timeline=profile.sql_timeline)
@@ -0,0 +1,189 @@
+"""
+Slow-query log.
+
+SlowQueryRecorder is installed as an execute_wrapper on every database
+connection as it opens, so it sees queries from requests, task workers and
+management commands alike. Queries slower than SLOW_QUERY_THRESHOLD_MS are
+aggregated into SlowQuery rows keyed by SQL fingerprint and originating
+operation.
+
+For SELECTs, a plan is captured at most once per fingerprint every
+SLOW_QUERY_EXPLAIN_INTERVAL seconds. It runs on the same connection right
+after the slow query, inside a savepoint, so it sees the same SET LOCAL
+app.current_user_id (and therefore the same RLS filtering) as the query it
+explains. EXPLAIN ANALYZE runs the statement again, so it is only used for
+plain reads: row-locking SELECTs, SELECTs calling functions with side
+effects and server-side cursors (exports) get a plain EXPLAIN.
+"""
+import contextvars
+import hashlib
+import logging
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Label of the request or job issuing queries, e.g. "GET api/ledger/accounts/"
+current_operation = contextvars.ContextVar("current_operation", default="(background)")
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_VALUES_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+# Clauses and calls that make running a SELECT a second time unsafe or costly
+_NOT_ANALYZABLE = re.compile(
+    r"\bFOR\s+(?:NO\s+KEY\s+)?(?:UPDATE|SHARE|KEY\s+SHARE)\b|\bNOWAIT\b|\bSKIP\s+LOCKED\b"
+    r"|\b(?:pg_\w+|nextval|setval)\s*\(",
+    re.IGNORECASE,
+)
+
+
+def normalize_sql(sql: str) -> str:
+    """Replace literals and placeholders with ? and collapse IN (...) lists."""
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = sql.replace("%s", "?")
+    sql = _VALUES_LIST.sub("(...)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+def fingerprint(normalized_sql: str) -> str:
+    return hashlib.sha1(normalized_sql.encode("utf-8")).hexdigest()[:16]
+
+
+def can_analyze(sql: str) -> bool:
+    """Whether EXPLAIN ANALYZE may re-run this SELECT without side effects."""
+    return not _NOT_ANALYZABLE.search(sql)
+
+
+def _explain_sql(vendor, sql, analyze=True):
+    if vendor == "postgresql":
+        return f"EXPLAIN (ANALYZE, BUFFERS) {sql}" if analyze else f"EXPLAIN {sql}"
+    if vendor == "sqlite":
+        return f"EXPLAIN QUERY PLAN {sql}"
+    return None
+
+
+class SlowQueryRecorder:
+    def __init__(self):
+        self._local = threading.local()
+
+    @property
+    def _busy(self):
+        return getattr(self._local, "busy", False)
+
+    def __call__(self, execute, sql, params, many, context):
+        if self._busy:
+            return execute(sql, params, many, context)
+
+        start = time.perf_counter()
+        result = execute(sql, params, many, context)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        if elapsed_ms >= getattr(settings, "SLOW_QUERY_THRESHOLD_MS", 200):
+            self._local.busy = True
+            try:
+                self._record(context["connection"], sql, params, many, elapsed_ms, context["cursor"])
+            except Exception:
+                logger.exception("Failed to record slow query")
+            finally:
+                self._local.busy = False
+        return result
+
+    def _record(self, connection, sql, params, many, elapsed_ms, cursor=None):
+        normalized = normalize_sql(sql)
+        fp = fingerprint(normalized)
+        operation = current_operation.get()
+
+        plan = ""
+        if not many and sql.lstrip()[:6].upper() == "SELECT" and self._claim_explain(fp):
+            # A named cursor is a server-side one (QuerySet.iterator on Postgres)
+            analyze = getattr(cursor, "name", None) is None and can_analyze(sql)
+            plan = self._explain(connection, sql, params, analyze)
+
+        def store():
+            self._local.busy = True
+            try:
+                store_slow_query(fp, operation, normalized, elapsed_ms, plan)
+            except Exception:
+                logger.exception("Failed to store slow query")
+            finally:
+                self._local.busy = False
+
+        # Writing now could land in (and roll back with) the caller's transaction
+        if connection.in_atomic_block:
+            transaction.on_commit(store, using=connection.alias)
+        else:
+            store()
+
+    def _claim_explain(self, fp) -> bool:
+        interval = getattr(settings, "SLOW_QUERY_EXPLAIN_INTERVAL", 3600)
+        try:
+            return cache.add(f"slowq:explained:{fp}", 1, interval)
+        except Exception:
+            return False
+
+    def _explain(self, connection, sql, params, analyze=True) -> str:
+        explain = _explain_sql(connection.vendor, sql, analyze)
+        if explain is None or connection.needs_rollback:
+            return ""
+        try:
+            with transaction.atomic(using=connection.alias):
+                with connection.cursor() as cursor:
+                    cursor.execute(explain, params)
+                    rows = cursor.fetchall()
+        except Exception as e:
+            return f"EXPLAIN failed: {e}"
+        return "\n".join(" ".join(str(col) for col in row) for row in rows)
+
+
+recorder = SlowQueryRecorder()
+
+
+def install_recorder(sender, connection, **kwargs):
+    """connection_created receiver: attach the recorder once per connection wrapper."""
+    if getattr(settings, "SLOW_QUERY_LOG", True) and recorder not in connection.execute_wrappers:
+        connection.execute_wrappers.append(recorder)
+
+
+def store_slow_query(fp, operation, normalized, elapsed_ms, plan=""):
+    from .models import SlowQuery
+
+    now = timezone.now()
+    changes = {
+        "calls": F("calls") + 1,
+        "total_ms": F("total_ms") + elapsed_ms,
+        "max_ms": Greatest(F("max_ms"), elapsed_ms),
+        "last_seen": now,
+    }
+    if plan:
+        changes.update(plan=plan, plan_captured_at=now)
+
+    rows = SlowQuery.objects.filter(fingerprint=fp, operation=operation)
+    if rows.update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            SlowQuery.objects.create(
+                fingerprint=fp,
+                operation=operation,
+                normalized_sql=normalized,
+                calls=1,
+                total_ms=elapsed_ms,
+                max_ms=elapsed_ms,
+                first_seen=now,
+                last_seen=now,
+                plan=plan,
+                plan_captured_at=now if plan else None,
+            )
+    except IntegrityError:
+        # Another process recorded the first call at the same moment
+        rows.update(**changes)
@@ -0,0 +1,13 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from taskqueue.registry import task
+
+from .models import RequestProfile
+
+
+@task(concurrency=1)
+def purge_request_profiles():
+    cutoff = timezone.now() - timedelta(days=getattr(settings, "PROFILER_RETENTION_DAYS", 7))
+    RequestProfile.objects.filter(created_at__lt=cutoff).delete()
@@ -0,0 +1,29 @@
+import pytest
+from accounts.auth import create_access_token
+from accounts.models import User
+from django.core.cache import cache
+
+from monitoring.metrics import registry
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    cache.clear()
+    registry.reset()
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(email="metrics@example.com", password="SecurePass123!")
+
+
+@pytest.fixture
+def auth_headers(user):
+    token = create_access_token(user.id)
+    return {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+
+
+@pytest.fixture
+def staff_headers(db):
+    staff = User.objects.create_user(email="ops@example.com", password=None, is_staff=True)
+    return {"HTTP_AUTHORIZATION": f"Bearer {create_access_token(staff.id)}"}
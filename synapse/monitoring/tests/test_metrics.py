@@ -0,0 +1,91 @@
+import pytest
+from accounts.cache import check_password_cached
+from asgiref.sync import async_to_sync
+from django.test import Client
+
+from monitoring.metrics import HTTP_DURATION, Registry, describe, render
+
+TEST_COUNTER = describe("test_events_total", "counter", "Events seen by tests.")
+
+
+def _lines(text):
+    return set(text.splitlines())
+
+
+class TestRender:
+    def test_histogram_buckets_are_cumulative(self):
+        reg = Registry()
+        reg.observe(HTTP_DURATION, 0.02, (0.01, 0.05, 0.1), {"route": "r", "method": "GET"})
+        reg.observe(HTTP_DURATION, 0.07, (0.01, 0.05, 0.1), {"route": "r", "method": "GET"})
+
+        lines = _lines(render(reg.snapshot()))
+
+        assert "# TYPE http_request_duration_seconds histogram" in lines
+        assert 'http_request_duration_seconds_bucket{le="0.01",method="GET",route="r"} 0' in lines
+        assert 'http_request_duration_seconds_bucket{le="0.05",method="GET",route="r"} 1' in lines
+        assert 'http_request_duration_seconds_bucket{le="0.1",method="GET",route="r"} 2' in lines
+        assert 'http_request_duration_seconds_bucket{le="+Inf",method="GET",route="r"} 2' in lines
+        assert 'http_request_duration_seconds_count{method="GET",route="r"} 2' in lines
+        assert 'http_request_duration_seconds_sum{method="GET",route="r"} 0.09' in lines
+
+    def test_counters_and_label_escaping(self):
+        reg = Registry()
+        reg.inc(TEST_COUNTER, {"name": 'a "quoted"\nvalue'}, 3)
+
+        text = render(reg.snapshot(), gauges=[("test_depth", "Depth.", [({}, 4)])])
+
+        assert 'test_events_total{name="a \\"quoted\\"\\nvalue"} 3' in text
+        assert "# TYPE test_depth gauge\ntest_depth 4" in text
+
+    def test_flush_is_rate_limited(self):
+        reg = Registry()
+        reg.inc(TEST_COUNTER)
+        reg.flush()
+        assert reg._pending  # interval not yet elapsed
+        reg.flush(force=True)
+        assert not reg._pending
+
+
+@pytest.mark.django_db
+class TestMetricsEndpoint:
+    def test_records_requests_per_route(self, auth_headers, staff_headers):
+        client = Client()
+        client.get("/api/ledger/accounts/", **auth_headers)
+        client.get("/api/ledger/accounts/999", **auth_headers)
+
+        response = client.get("/metrics", **staff_headers)
+
+        assert response.status_code == 200
+        assert response["Content-Type"].startswith("text/plain")
+        text = response.content.decode()
+        assert 'http_requests_total{method="GET",route="api/ledger/accounts/",status="200"} 1' in text
+        assert 'http_requests_total{method="GET",route="api/ledger/accounts/<account_id>",status="404"} 1' in text
+        assert 'http_request_db_queries_count{method="GET",route="api/ledger/accounts/"} 1' in text
+        assert "password_hash_queue_depth 0" in text
+        assert "task_queue_depth{" in text
+
+    def test_token_required_when_configured(self, settings):
+        settings.METRICS_TOKEN = "s3cret"
+        client = Client()
+
+        assert client.get("/metrics").status_code == 401
+        assert client.get("/metrics", HTTP_AUTHORIZATION="Bearer wrong").status_code == 401
+        assert client.get("/metrics", HTTP_AUTHORIZATION="Bearer s3cret").status_code == 200
+
+    def test_staff_required_without_token(self, auth_headers, staff_headers):
+        client = Client()
+
+        assert client.get("/metrics").status_code == 401
+        assert client.get("/metrics", **auth_headers).status_code == 403
+        assert client.get("/metrics", **staff_headers).status_code == 200
+
+    def test_password_cache_hits_and_misses(self, user, staff_headers):
+        assert async_to_sync(check_password_cached)(user, "SecurePass123!")
+        assert async_to_sync(check_password_cached)(user, "SecurePass123!")
+
+        text = Client().get("/metrics", **staff_headers).content.decode()
+
+        assert 'cache_requests_total{cache="password",result="miss"} 1' in text
+        assert 'cache_requests_total{cache="password",result="hit"} 1' in text
+        assert "password_hash_checks_started_total 1" in text
+        assert "password_hash_queue_depth 0" in text
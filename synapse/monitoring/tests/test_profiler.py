@@ -0,0 +1,88 @@
+import threading
+import time
+
+import pytest
+from accounts.auth import create_access_token
+from accounts.models import User
+from django.test import Client
+
+from monitoring.models import RequestProfile
+from monitoring.profiler import StackSampler
+
+
+def busy_leaf(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_stack_sampler_collects_folded_stacks():
+    sampler = StackSampler(threading.get_ident(), 0.001)
+    sampler.start()
+    busy_leaf(0.05)
+    sampler.stop()
+
+    assert sum(sampler.samples.values()) > 0
+    assert "busy_leaf (test_profiler.py" in sampler.folded()
+
+
+@pytest.fixture
+def staff(db):
+    return User.objects.create_user(email="staff@example.com", password="SecurePass123!", is_staff=True)
+
+
+def _headers(user, **extra):
+    return {"HTTP_AUTHORIZATION": f"Bearer {create_access_token(user.id)}", **extra}
+
+
+@pytest.mark.django_db
+class TestProfilerMiddleware:
+    def test_staff_header_captures_profile(self, staff):
+        response = Client().get("/api/ledger/accounts/", **_headers(staff, HTTP_X_PROFILE="1"))
+
+        profile = RequestProfile.objects.get(pk=response["X-Profile-Id"])
+        assert profile.trigger == "header"
+        assert profile.route == "api/ledger/accounts/"
+        assert profile.user == staff
+        assert profile.query_count == len(profile.sql_timeline) >= 1
+        assert profile.sql_timeline[0]["alias"] == "default"
+
+    def test_header_ignored_for_non_staff(self, user, auth_headers):
+        response = Client().get("/api/ledger/accounts/", HTTP_X_PROFILE="1", **auth_headers)
+
+        assert "X-Profile-Id" not in response
+        assert not RequestProfile.objects.exists()
+
+    def test_sample_rate(self, settings, user, auth_headers):
+        settings.PROFILER_SAMPLE_RATE = 1.0
+        response = Client().get("/api/ledger/accounts/", **auth_headers)
+
+        assert RequestProfile.objects.get(pk=response["X-Profile-Id"]).trigger == "sample"
+
+    def test_disabled_by_default(self, user, auth_headers):
+        Client().get("/api/ledger/accounts/", **auth_headers)
+        assert not RequestProfile.objects.exists()
+
+
+@pytest.mark.django_db
+class TestProfileEndpoints:
+    def test_staff_can_list_and_download(self, staff):
+        client = Client()
+        profile_id = client.get("/api/ledger/accounts/", **_headers(staff, HTTP_X_PROFILE="1"))["X-Profile-Id"]
+
+        listed = client.get("/api/profiles?route=api/ledger/accounts/", **_headers(staff)).json()
+        assert [p["id"] for p in listed] == [profile_id]
+
+        detail = client.get(f"/api/profiles/{profile_id}", **_headers(staff)).json()
+        assert detail["sql_timeline"]
+
+        folded = client.get(f"/api/profiles/{profile_id}/flamegraph", **_headers(staff))
+        assert folded.status_code == 200
+        assert "attachment" in folded["Content-Disposition"]
+
+    def test_non_staff_forbidden(self, user, auth_headers):
+        assert Client().get("/api/profiles", **auth_headers).status_code == 403
+
+    def test_missing_profile(self, staff):
+        response = Client().get("/api/profiles/00000000-0000-0000-0000-000000000000", **_headers(staff))
+        assert response.status_code == 404
@@ -0,0 +1,82 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client
+
+from monitoring.models import SlowQuery
+from monitoring.slow_queries import _explain_sql, can_analyze, fingerprint, normalize_sql, recorder
+
+
+def test_normalize_sql_strips_literals_and_lists():
+    a = normalize_sql('SELECT * FROM "t" WHERE "id" IN (%s, %s, %s) AND name = \'bob\' LIMIT 21')
+    b = normalize_sql('SELECT *  FROM "t"\nWHERE "id" IN (%s) AND name = \'o\'\'neil\' LIMIT 5')
+    assert a == b == 'SELECT * FROM "t" WHERE "id" IN (...) AND name = ? LIMIT ?'
+    assert fingerprint(a) == fingerprint(b)
+
+
+def test_identifiers_with_digits_are_kept():
+    assert normalize_sql('SELECT U0."id" FROM t0') == 'SELECT U0."id" FROM t0'
+
+
+def test_locking_and_side_effect_selects_are_not_analyzed():
+    assert can_analyze('SELECT "id" FROM "transactions" WHERE "user_id" = %s')
+    assert not can_analyze('SELECT "id" FROM "taskqueue_tasks" FOR UPDATE SKIP LOCKED')
+    assert not can_analyze('SELECT "id" FROM "financial_accounts" FOR NO KEY UPDATE NOWAIT')
+    assert not can_analyze("SELECT pg_advisory_xact_lock(%s)")
+    assert _explain_sql("postgresql", "SELECT 1", analyze=False) == "EXPLAIN SELECT 1"
+
+
+@pytest.fixture
+def log_everything(settings):
+    settings.SLOW_QUERY_THRESHOLD_MS = 0
+    if recorder not in connection.execute_wrappers:
+        connection.execute_wrappers.append(recorder)
+
+
+@pytest.mark.django_db
+class TestSlowQueryLog:
+    def test_records_request_queries_with_operation_and_plan(
+        self, log_everything, auth_headers, django_capture_on_commit_callbacks,
+    ):
+        with django_capture_on_commit_callbacks(execute=True):
+            Client().get("/api/ledger/accounts/", **auth_headers)
+            Client().get("/api/ledger/accounts/", **auth_headers)
+
+        row = SlowQuery.objects.get(
+            operation="GET api/ledger/accounts/", normalized_sql__contains='FROM "financial_accounts"',
+        )
+        assert row.calls == 2
+        assert row.max_ms <= row.total_ms
+        assert row.plan  # EXPLAIN QUERY PLAN on SQLite
+
+    def test_plan_captured_once_per_interval(
+        self, log_everything, auth_headers, django_capture_on_commit_callbacks,
+    ):
+        with django_capture_on_commit_callbacks(execute=True):
+            Client().get("/api/ledger/accounts/", **auth_headers)
+        row = SlowQuery.objects.get(normalized_sql__contains='FROM "financial_accounts"')
+        first_capture = row.plan_captured_at
+
+        with django_capture_on_commit_callbacks(execute=True):
+            Client().get("/api/ledger/accounts/", **auth_headers)
+        row.refresh_from_db()
+        assert row.plan_captured_at == first_capture
+
+    def test_fast_queries_are_ignored(self, auth_headers, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            Client().get("/api/ledger/accounts/", **auth_headers)
+        assert not SlowQuery.objects.exists()
+
+    def test_report_command(self, log_everything, auth_headers, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            Client().get("/api/ledger/accounts/", **auth_headers)
+
+        out = StringIO()
+        call_command("slow_query_report", top=3, plans=True, stdout=out)
+        assert "#1 " in out.getvalue()
+        assert "GET api/ledger/accounts/" in out.getvalue()
+
+        call_command("slow_query_report", reset=True, stdout=StringIO())
+        assert not SlowQuery.objects.exists()
@@ -0,0 +1,69 @@
+import hmac
+
+from accounts.middleware import get_request_user_id
+from accounts.models import User
+from django.conf import settings
+from django.http import HttpResponse
+
+from taskqueue import metrics as task_metrics
+from taskqueue.registry import registered_tasks
+
+from .metrics import PASSWORD_CHECKS_FINISHED, PASSWORD_CHECKS_STARTED, registry, render
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _total(samples, name):
+    return sum(value for (n, suffix, _), value in samples.items() if n == name and suffix == "")
+
+
+def _gauges(samples):
+    depth = task_metrics.queue_depth()
+    names = sorted(set(registered_tasks()) | set(depth))
+    counts = task_metrics.counters(names)
+    return [
+        (
+            "password_hash_queue_depth",
+            "bcrypt password checks waiting or running across all workers.",
+            [({}, _total(samples, PASSWORD_CHECKS_STARTED) - _total(samples, PASSWORD_CHECKS_FINISHED))],
+        ),
+        (
+            "task_queue_depth",
+            "Background tasks by state.",
+            [
+                ({"task": name, "status": status}, depth.get(name, {}).get(status, 0))
+                for name in names
+                for status in ("queued", "running")
+            ],
+        ),
+        (
+            "task_runs",
+            "Background task runs by outcome since counters were last reset.",
+            [
+                ({"task": name, "result": result}, counts[name][result])
+                for name in names
+                for result in ("succeeded", "retried", "failed")
+            ],
+        ),
+    ]
+
+
+def metrics_view(request):
+    """
+    Expose metrics for Prometheus. Requires `Authorization: Bearer <METRICS_TOKEN>`
+    when METRICS_TOKEN is set, and a staff user's access token otherwise.
+    """
+    token = getattr(settings, "METRICS_TOKEN", "")
+    if token:
+        supplied = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        if not hmac.compare_digest(supplied, token):
+            return HttpResponse(status=401)
+    else:
+        user_id = get_request_user_id(request)
+        if user_id is None:
+            return HttpResponse(status=401)
+        if not User.objects.filter(pk=user_id, is_staff=True).exists():
+            return HttpResponse(status=403)
+
+    samples = registry.snapshot()
+    return HttpResponse(render(samples, _gauges(samples)), content_type=CONTENT_TYPE)
@@ -1,5 +1,6 @@
 from django.contrib import admin
 
-from .models import Subscription
+from .models import PendingPayment, Subscription
 
 admin.site.register(Subscription)
+admin.site.register(PendingPayment)
@@ -0,0 +1,113 @@
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from .models import Subscription
+from .schedule import normalize_to_monthly
+
+SUBSCRIPTION_SUMMARY_TTL = getattr(settings, "SUBSCRIPTION_SUMMARY_TTL", 3600)
+
+
+def _generation_key(user_id) -> str:
+    return f"sub_summary_gen:{user_id}"
+
+
+def _summary_key(user_id) -> str:
+    """
+    Key of the user's current summary. It embeds a generation that every
+    committed write bumps, so a summary rebuilt from data read before that
+    commit is stored under a key no later read will use.
+    """
+    key = _generation_key(user_id)
+    generation = cache.get(key)
+    if generation is None:
+        # Wall-clock seed: a lost counter never comes back to an old generation
+        cache.add(key, int(time.time() * 1000), None)
+        generation = cache.get(key)
+    return f"sub_summary:{user_id}:{generation}"
+
+
+def _bump_generation(user_id) -> None:
+    key = _generation_key(user_id)
+    try:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, int(time.time() * 1000), None)
+    except Exception:
+        pass
+
+
+def summary_entry(sub):
+    """
+    Return what a subscription contributes to its owner's summary.
+
+    The result is ((currency, category_id), monthly_cost), or None for an
+    inactive subscription. Take one before and one after a write and pass
+    both to update_summary, which skips writes that leave it unchanged.
+    """
+    if not sub.is_active:
+        return None
+    monthly = normalize_to_monthly(sub.amount, sub.frequency, sub.custom_interval_days)
+    return (sub.currency, sub.category_id), monthly
+
+
+def build_summary(user_id) -> dict:
+    """
+    Compute a user's summary from the database with one grouped query.
+
+    Monthly costs are kept in each subscription's own currency, bucketed by
+    (currency, category_id), so exchange-rate refreshes and main-currency
+    changes never invalidate the cached value.
+    """
+    rows = (
+        Subscription.objects.filter(user_id=user_id, is_active=True)
+        .values("currency", "category_id", "frequency", "custom_interval_days")
+        .annotate(total=Sum("amount"), count=Count("id"))
+        .order_by()
+    )
+    summary = {"active_count": 0, "monthly": {}}
+    for row in rows:
+        bucket = (row["currency"], row["category_id"])
+        monthly = normalize_to_monthly(row["total"], row["frequency"], row["custom_interval_days"])
+        summary["monthly"][bucket] = summary["monthly"].get(bucket, Decimal(0)) + monthly
+        summary["active_count"] += row["count"]
+    return summary
+
+
+def get_summary(user_id) -> dict:
+    """Return the user's summary from Redis, rebuilding it on a miss or if Redis is down."""
+    try:
+        key = _summary_key(user_id)
+        summary = cache.get(key)
+        if summary is not None:
+            return summary
+    except Exception:
+        return build_summary(user_id)
+
+    summary = build_summary(user_id)
+    try:
+        cache.set(key, summary, SUBSCRIPTION_SUMMARY_TTL)
+    except Exception:
+        pass
+    return summary
+
+
+def update_summary(user_id, before=None, after=None) -> None:
+    """
+    Drop the user's cached summary once the transaction commits, unless the
+    write left its summary_entry() unchanged (pass before=None for a create
+    and after=None for a delete). The next read rebuilds it.
+    """
+    if before != after:
+        transaction.on_commit(lambda: _bump_generation(user_id))
+
+
+def invalidate_summaries(user_ids) -> None:
+    """Drop cached summaries after a bulk change, ignoring Redis errors."""
+    for user_id in user_ids:
+        _bump_generation(user_id)
@@ -0,0 +1,155 @@
+from collections import defaultdict, deque
+from datetime import date, timedelta
+
+from accounts.cache import bump_ledger_version
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from subscriptions.cache import invalidate_summaries
+from subscriptions.models import PendingPayment, Subscription
+from subscriptions.reminders import compute_remind_at
+from subscriptions.schedule import compute_next_due_date, occurrences_between
+
+
+class Command(BaseCommand):
+    help = (
+        "Emit pending payments for every active subscription that has fallen due, "
+        "one per cycle missed since its next_due_date, and advance its next_due_date. "
+        "Safe to re-run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database",
+            default="superuser" if "superuser" in settings.DATABASES else "default",
+            help="Database alias to use. Defaults to the superuser connection, which bypasses RLS.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=5000,
+            help="Number of subscriptions processed per transaction.",
+        )
+        parser.add_argument(
+            "--date",
+            type=date.fromisoformat,
+            default=None,
+            help="Process subscriptions due on or before this date (YYYY-MM-DD). Defaults to today.",
+        )
+        parser.add_argument(
+            "--max-cycles",
+            type=int,
+            default=366,
+            help="Most payments emitted per subscription in one run; only the latest cycles are kept.",
+        )
+
+    def handle(self, *args, **options):
+        using = options["database"]
+        chunk_size = options["chunk_size"]
+        today = options["date"] or timezone.localdate()
+        max_cycles = options["max_cycles"]
+
+        fallen_due = Subscription.objects.using(using).filter(is_active=True, next_due_date__lte=today)
+        # An end_date edited to before next_due_date: nothing is left to pay
+        ended = fallen_due.filter(end_date__lt=F("next_due_date"))
+        lapsed_users = set(ended.values_list("user_id", flat=True))
+        deactivated = ended.update(is_active=False, remind_at=None, updated_at=timezone.now())
+        for user_id in lapsed_users:
+            bump_ledger_version(user_id)
+        invalidate_summaries(lapsed_users)
+
+        due = fallen_due.filter(Q(end_date__isnull=True) | Q(end_date__gte=F("next_due_date"))).order_by("id")
+
+        processed = dropped = 0
+        last_id = 0
+        while True:
+            with transaction.atomic(using=using):
+                # Keyset pagination keeps each chunk an index range scan and the
+                # working set bounded; skip_locked lets parallel runs share the load.
+                rows = list(
+                    due.filter(id__gt=last_id)
+                    .select_for_update(skip_locked=True)
+                    .values(
+                        "id", "user_id", "amount", "currency", "frequency",
+                        "custom_interval_days", "start_date", "end_date", "next_due_date",
+                        "reminder_enabled", "reminder_days_before",
+                    )[:chunk_size]
+                )
+                if not rows:
+                    break
+                last_id = rows[-1]["id"]
+
+                # One payment per cycle from next_due_date through today, so
+                # runs skipped for a while catch up instead of dropping cycles.
+                # A payment already emitted for the same cycle (e.g. by an
+                # interrupted earlier run) is left as is.
+                payments = []
+                for row in rows:
+                    missed = occurrences_between(
+                        row["start_date"], row["frequency"],
+                        row["next_due_date"] + timedelta(days=1), today,
+                        row["custom_interval_days"], row["end_date"],
+                    )
+                    due_dates = deque([row["next_due_date"]], maxlen=max_cycles)
+                    total = 1
+                    for due_date in missed:
+                        due_dates.append(due_date)
+                        total += 1
+                    dropped += total - len(due_dates)
+                    payments.extend(
+                        PendingPayment(
+                            user_id=row["user_id"],
+                            subscription_id=row["id"],
+                            due_date=due_date,
+                            amount=row["amount"],
+                            currency=row["currency"],
+                        )
+                        for due_date in due_dates
+                    )
+                PendingPayment.objects.using(using).bulk_create(payments, ignore_conflicts=True)
+
+                # Subscriptions moving to the same dates share one UPDATE
+                advances = defaultdict(list)
+                ended_users = set()
+                for row in rows:
+                    next_due = compute_next_due_date(
+                        row["start_date"], row["frequency"],
+                        row["custom_interval_days"], today=today,
+                    )
+                    active = row["end_date"] is None or next_due <= row["end_date"]
+                    remind_at = compute_remind_at(
+                        next_due, row["reminder_days_before"], row["reminder_enabled"], active,
+                    )
+                    advances[(next_due, active, remind_at)].append(row["id"])
+                    if not active:
+                        ended_users.add(row["user_id"])
+
+                now = timezone.now()
+                for (next_due, active, remind_at), ids in advances.items():
+                    Subscription.objects.using(using).filter(id__in=ids).update(
+                        next_due_date=next_due, is_active=active, remind_at=remind_at,
+                        updated_at=now,
+                    )
+                    if not active:
+                        deactivated += len(ids)
+
+            for user_id in {row["user_id"] for row in rows}:
+                bump_ledger_version(user_id)
+            # Ended subscriptions drop out of the cached monthly summaries
+            invalidate_summaries(ended_users)
+
+            processed += len(rows)
+            self.stdout.write(f"Processed {processed} subscriptions...")
+
+        if dropped:
+            self.stdout.write(self.style.WARNING(
+                f"Skipped {dropped} cycles older than the last {max_cycles} of their subscription."
+            ))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Processed {processed} due subscriptions ({deactivated} reached their end date)."
+            )
+        )
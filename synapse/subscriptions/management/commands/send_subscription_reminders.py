@@ -0,0 +1,60 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from subscriptions.reminders import dispatch_due_reminders, get_notifier
+
+
+class Command(BaseCommand):
+    help = (
+        "Send due subscription reminders through SUBSCRIPTION_REMINDER_NOTIFIER. "
+        "Any number of copies may run at once."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database",
+            default="superuser" if "superuser" in settings.DATABASES else "default",
+            help="Database alias to use. Defaults to the superuser connection, which bypasses RLS.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of reminders claimed per transaction.",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep running, polling for due reminders every --interval seconds.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=60,
+            help="Seconds to sleep between polls in --loop mode.",
+        )
+
+    def handle(self, *args, **options):
+        notifier = get_notifier()
+        batch_size = options["batch_size"]
+
+        while True:
+            total_sent = total_failed = 0
+            while True:
+                sent, failed = dispatch_due_reminders(
+                    notifier, using=options["database"], batch_size=batch_size,
+                )
+                total_sent += sent
+                total_failed += failed
+                if sent + failed < batch_size:
+                    break
+
+            if total_sent or total_failed or not options["loop"]:
+                self.stdout.write(
+                    self.style.SUCCESS(f"Sent {total_sent} reminders ({total_failed} failed, will retry).")
+                )
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
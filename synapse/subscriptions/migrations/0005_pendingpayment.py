@@ -0,0 +1,54 @@
+# Generated by Django 6.1.2 on 2026-10-19 15:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ledger', '0010_transaction_note_search'),
+        ('subscriptions', '0004_subscription_sub_user_updated_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingPayment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('due_date', models.DateField()),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('currency', models.CharField(default='USD', max_length=3)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('confirmed', 'Confirmed'), ('skipped', 'Skipped')], default='pending', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'subscription_pending_payments',
+                'ordering': ['due_date'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['next_due_date'], name='sub_active_due_idx'),
+        ),
+        migrations.AddField(
+            model_name='pendingpayment',
+            name='subscription',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pending_payments', to='subscriptions.subscription'),
+        ),
+        migrations.AddField(
+            model_name='pendingpayment',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pending_payments', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='pendingpayment',
+            index=models.Index(fields=['user', 'status'], name='pending_user_status_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='pendingpayment',
+            unique_together={('subscription', 'due_date')},
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated manually
+
+from django.db import connection, migrations
+
+RLS_TABLES = [
+    "subscription_pending_payments",
+]
+
+
+def enable_rls(apps, schema_editor):
+    if connection.vendor != "postgresql":
+        return
+
+    for table in RLS_TABLES:
+        schema_editor.execute(f"ALTER TABLE {table} ENABLE ROW LEVEL SECURITY")
+        schema_editor.execute(f"ALTER TABLE {table} FORCE ROW LEVEL SECURITY")
+        schema_editor.execute(f"""
+            CREATE POLICY user_isolation_policy ON {table}
+                USING (user_id = current_setting('app.current_user_id', true)::int);
+        """)
+
+
+def disable_rls(apps, schema_editor):
+    if connection.vendor != "postgresql":
+        return
+
+    for table in RLS_TABLES:
+        schema_editor.execute(
+            f"DROP POLICY IF EXISTS user_isolation_policy ON {table}"
+        )
+        schema_editor.execute(f"ALTER TABLE {table} DISABLE ROW LEVEL SECURITY")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("subscriptions", "0005_pendingpayment"),
+    ]
+
+    operations = [
+        migrations.RunPython(enable_rls, reverse_code=disable_rls),
+    ]
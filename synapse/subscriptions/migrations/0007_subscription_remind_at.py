@@ -0,0 +1,52 @@
+# Generated by Django 6.1.2 on 2026-10-19 15:59
+
+from datetime import date, datetime, time, timedelta, timezone
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_remind_at(apps, schema_editor):
+    """Schedule reminders for cycles that are still upcoming."""
+    Subscription = apps.get_model("subscriptions", "Subscription")
+    postgres = schema_editor.connection.vendor == "postgresql"
+    if postgres:
+        # FORCE ROW LEVEL SECURITY would hide every row from the table owner
+        schema_editor.execute("ALTER TABLE subscriptions NO FORCE ROW LEVEL SECURITY")
+
+    subs = Subscription.objects.filter(
+        reminder_enabled=True, is_active=True, next_due_date__gte=date.today(),
+    ).only("id", "next_due_date", "reminder_days_before")
+    batch = []
+    for sub in subs.iterator(chunk_size=2000):
+        day = sub.next_due_date - timedelta(days=sub.reminder_days_before)
+        sub.remind_at = datetime.combine(day, time(9), tzinfo=timezone.utc)
+        batch.append(sub)
+        if len(batch) >= 2000:
+            Subscription.objects.bulk_update(batch, ["remind_at"])
+            batch = []
+    Subscription.objects.bulk_update(batch, ["remind_at"])
+
+    if postgres:
+        schema_editor.execute("ALTER TABLE subscriptions FORCE ROW LEVEL SECURITY")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscriptions', '0006_enable_rls_pending_payments'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subscription',
+            name='remind_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(condition=models.Q(('remind_at__isnull', False)), fields=['remind_at'], name='sub_remind_at_idx'),
+        ),
+        migrations.RunPython(backfill_remind_at, reverse_code=migrations.RunPython.noop),
+    ]
@@ -44,6 +44,8 @@ class Subscription(models.Model):
     is_active = models.BooleanField(default=True)
     reminder_enabled = models.BooleanField(default=False)
     reminder_days_before = models.PositiveIntegerField(default=1)
+    # When the reminder for next_due_date should go out; null once sent or if none is due
+    remind_at = models.DateTimeField(null=True, blank=True)
     note = models.TextField(blank=True)
     icon = models.CharField(max_length=50, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -52,6 +54,59 @@ class Subscription(models.Model):
     class Meta:
         db_table = "subscriptions"
         ordering = ["next_due_date"]
+        indexes = [
+            models.Index(fields=["user", "updated_at"], name="sub_user_updated_idx"),
+            models.Index(
+                fields=["next_due_date"],
+                name="sub_active_due_idx",
+                condition=models.Q(is_active=True),
+            ),
+            models.Index(
+                fields=["remind_at"],
+                name="sub_remind_at_idx",
+                condition=models.Q(remind_at__isnull=False),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.amount} ({self.get_frequency_display()})"  # ty:ignore[unresolved-attribute]
+
+
+PENDING_PAYMENT_STATUSES = (
+    ("pending", "Pending"),
+    ("confirmed", "Confirmed"),
+    ("skipped", "Skipped"),
+)
+
+
+class PendingPayment(models.Model):
+    """A subscription cycle that fell due and is awaiting user confirmation."""
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="pending_payments",
+    )
+    subscription = models.ForeignKey(
+        Subscription,
+        on_delete=models.CASCADE,
+        related_name="pending_payments",
+    )
+    due_date = models.DateField()
+    amount = models.DecimalField(max_digits=15, decimal_places=2)
+    currency = models.CharField(max_length=3, default=settings.DEFAULT_CURRENCY)
+    status = models.CharField(
+        max_length=10, choices=PENDING_PAYMENT_STATUSES, default="pending"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "subscription_pending_payments"
+        ordering = ["due_date"]
+        unique_together = ("subscription", "due_date")
+        indexes = [
+            models.Index(fields=["user", "status"], name="pending_user_status_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.subscription_id} due {self.due_date} ({self.status})"
@@ -0,0 +1,47 @@
+"""
+Delivery backends for subscription reminders.
+
+The dispatcher loads the class named by settings.SUBSCRIPTION_REMINDER_NOTIFIER
+and calls send() once per reminder. A notifier raises to signal a failed
+delivery; the reminder is then retried later. Push or email backends plug in
+by subclassing BaseNotifier.
+"""
+import json
+import logging
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class BaseNotifier:
+    def send(self, reminder: dict) -> None:
+        """
+        Deliver one reminder.
+
+        `reminder` holds subscription_id, user_id, email, name, amount,
+        currency and due_date.
+        """
+        raise NotImplementedError
+
+
+class LogNotifier(BaseNotifier):
+    """Write reminders to the application log."""
+
+    def send(self, reminder: dict) -> None:
+        logger.info(
+            "Reminder for user %s: %s (%s %s) is due on %s",
+            reminder["user_id"], reminder["name"], reminder["amount"],
+            reminder["currency"], reminder["due_date"],
+        )
+
+
+class FileNotifier(BaseNotifier):
+    """Append reminders as JSON lines to settings.SUBSCRIPTION_REMINDER_FILE."""
+
+    def __init__(self, path=None):
+        self.path = path or getattr(settings, "SUBSCRIPTION_REMINDER_FILE", "reminders.jsonl")
+
+    def send(self, reminder: dict) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(reminder, default=str) + "\n")
@@ -0,0 +1,91 @@
+import logging
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Subscription
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIPTION_REMINDER_HOUR = getattr(settings, "SUBSCRIPTION_REMINDER_HOUR", 9)
+SUBSCRIPTION_REMINDER_RETRY = getattr(settings, "SUBSCRIPTION_REMINDER_RETRY", 300)
+
+
+def compute_remind_at(next_due_date, reminder_days_before, reminder_enabled=True, is_active=True):
+    """
+    Return when the reminder for next_due_date should be sent, or None.
+
+    Reminders go out at SUBSCRIPTION_REMINDER_HOUR (UTC) reminder_days_before
+    days ahead of the due date.
+    """
+    if not (reminder_enabled and is_active):
+        return None
+    day = next_due_date - timedelta(days=reminder_days_before)
+    return datetime.combine(day, time(SUBSCRIPTION_REMINDER_HOUR), tzinfo=dt_timezone.utc)
+
+
+def refresh_remind_at(sub) -> None:
+    """Recompute sub.remind_at from its current schedule and reminder settings."""
+    sub.remind_at = compute_remind_at(
+        sub.next_due_date, sub.reminder_days_before, sub.reminder_enabled, sub.is_active,
+    )
+
+
+def get_notifier():
+    path = getattr(settings, "SUBSCRIPTION_REMINDER_NOTIFIER", "subscriptions.notifiers.LogNotifier")
+    return import_string(path)()
+
+
+def dispatch_due_reminders(notifier, using="default", batch_size=500, now=None) -> tuple[int, int]:
+    """
+    Send one batch of due reminders and return (sent, failed).
+
+    Rows are claimed with SELECT ... FOR UPDATE SKIP LOCKED, so any number of
+    workers can run this concurrently without sending a reminder twice. Sent
+    reminders have remind_at cleared; failed ones are pushed back by
+    SUBSCRIPTION_REMINDER_RETRY seconds. The row lock is held until the batch
+    commits, so a crash mid-batch leaves its reminders to be sent again.
+    """
+    now = now or timezone.now()
+    with transaction.atomic(using=using):
+        batch = list(
+            Subscription.objects.using(using)
+            .filter(remind_at__lte=now)
+            .order_by("remind_at")
+            .select_for_update(skip_locked=True, of=("self",))
+            .values(
+                "id", "user_id", "user__email", "name", "amount", "currency", "next_due_date",
+            )[:batch_size]
+        )
+
+        sent, failed = [], []
+        for row in batch:
+            reminder = {
+                "subscription_id": row["id"],
+                "user_id": row["user_id"],
+                "email": row["user__email"],
+                "name": row["name"],
+                "amount": row["amount"],
+                "currency": row["currency"],
+                "due_date": row["next_due_date"],
+            }
+            try:
+                notifier.send(reminder)
+            except Exception:
+                logger.exception("Failed to send reminder for subscription %s", row["id"])
+                failed.append(row["id"])
+            else:
+                sent.append(row["id"])
+
+        subs = Subscription.objects.using(using)
+        if sent:
+            subs.filter(id__in=sent).update(remind_at=None)
+        if failed:
+            subs.filter(id__in=failed).update(
+                remind_at=now + timedelta(seconds=SUBSCRIPTION_REMINDER_RETRY),
+            )
+
+    return len(sent), len(failed)
@@ -1,82 +1,179 @@
+from collections import defaultdict
 from datetime import date, timedelta
 from decimal import Decimal
+from typing import Optional
 
 from accounts.auth import JWTAuth
+from accounts.cache import bump_ledger_version
+from accounts.exchange_service import get_main_currency, get_rates
 from accounts.schemas import ErrorResponse, MessageResponse
-from dateutil.relativedelta import relativedelta
-from ninja import Router
+from ninja import Query, Router
 
 from ledger.models import Account, Category
+from sync.models import Tombstone
 
+from ..cache import get_summary, summary_entry, update_summary
 from ..models import Subscription
+from ..reminders import compute_remind_at, refresh_remind_at
+from ..schedule import FREQUENCIES, compute_next_due_date, occurrences_between
 from ..schemas import (
+    CategoryCostResponse,
     CreateSubscriptionRequest,
+    SubscriptionOverviewResponse,
     SubscriptionResponse,
     SubscriptionSummaryResponse,
+    UpcomingBillResponse,
+    UpcomingBillsResponse,
+    UpcomingDayResponse,
     UpdateSubscriptionRequest,
 )
 
 router = Router(tags=["Subscriptions"])
 
-
-def compute_next_due_date(start_date, frequency, custom_interval_days=None):
-    """Calculate the next due date from today based on frequency."""
-    today = date.today()
-    current = start_date
-    if current > today:
-        return current
-    while current <= today:
-        if frequency == "weekly":
-            current += timedelta(weeks=1)
-        elif frequency == "monthly":
-            current += relativedelta(months=1)
-        elif frequency == "yearly":
-            current += relativedelta(years=1)
-        elif frequency == "custom" and custom_interval_days:
-            current += timedelta(days=custom_interval_days)
-        else:
-            break
-    return current
-
-
-def normalize_to_monthly(amount, frequency, custom_interval_days=None):
-    """Convert any frequency amount to its monthly equivalent."""
-    if frequency == "monthly":
-        return amount
-    elif frequency == "weekly":
-        return amount * Decimal("52") / Decimal("12")
-    elif frequency == "yearly":
-        return amount / Decimal("12")
-    elif frequency == "custom" and custom_interval_days:
-        return amount * Decimal("30") / Decimal(str(custom_interval_days))
-    return amount
+UPCOMING_MAX_DAYS = 366
+LIST_MAX_LIMIT = 200
+
+
+def _overview(user):
+    """Convert the cached per-currency summary into the user's main currency."""
+    summary = get_summary(user.pk)
+    main_currency = get_main_currency(user)
+    rates = get_rates({currency for currency, _ in summary["monthly"]}, main_currency)
+
+    by_category = defaultdict(Decimal)
+    for (currency, category_id), monthly in summary["monthly"].items():
+        rate = rates.get(currency)
+        if rate is not None:
+            by_category[category_id] += monthly * rate
+
+    return SubscriptionOverviewResponse(
+        currency=main_currency,
+        total_monthly_cost=sum(by_category.values(), Decimal(0)).quantize(Decimal("0.01")),
+        active_count=summary["active_count"],
+        categories=[
+            CategoryCostResponse(category_id=category_id, monthly_cost=cost.quantize(Decimal("0.01")))
+            for category_id, cost in sorted(by_category.items(), key=lambda kv: -kv[1])
+        ],
+        unconverted_currencies=sorted(
+            {currency for currency, _ in summary["monthly"]} - rates.keys()
+        ),
+    )
 
 
 @router.get(
     "/",
     response={200: SubscriptionSummaryResponse},
     auth=JWTAuth(),
-    description="List all subscriptions with monthly cost summary.",
+    description=(
+        "List subscriptions ordered by next due date, `limit` at a time from `offset`, "
+        "with the monthly cost summary in the user's main currency."
+    ),
 )
-def list_subscriptions(request):
-    qs = (
+def list_subscriptions(request, limit: int = 100, offset: int = 0):
+    limit = max(1, min(limit, LIST_MAX_LIMIT))
+    offset = max(0, offset)
+    overview = _overview(request.auth)
+
+    page = list(
         Subscription.objects.filter(user=request.auth)
         .select_related("account", "category")
+        .order_by("next_due_date", "id")[offset:offset + limit + 1]
     )
 
-    subs = list(qs)
-    active_subs = [s for s in subs if s.is_active]
-    total_monthly = sum(
-        normalize_to_monthly(s.amount, s.frequency, s.custom_interval_days)
-        for s in active_subs
+    return 200, SubscriptionSummaryResponse(
+        currency=overview.currency,
+        total_monthly_cost=overview.total_monthly_cost,
+        active_count=overview.active_count,
+        subscriptions=[SubscriptionResponse.from_subscription(s) for s in page[:limit]],
+        has_more=len(page) > limit,
     )
 
-    return 200, SubscriptionSummaryResponse(
-        total_monthly_cost=total_monthly.quantize(Decimal("0.01"))
-        if total_monthly
-        else Decimal("0.00"),
-        active_count=len(active_subs),
-        subscriptions=[SubscriptionResponse.from_subscription(s) for s in subs],
+
+@router.get(
+    "/summary",
+    response={200: SubscriptionOverviewResponse},
+    auth=JWTAuth(),
+    description=(
+        "Monthly subscription cost in the user's main currency, active count and "
+        "per-category breakdown, served from a cached summary. Currencies with no "
+        "exchange rate are listed and left out of the totals."
+    ),
+)
+def subscription_summary(request):
+    return 200, _overview(request.auth)
+
+
+@router.get(
+    "/upcoming",
+    response={200: UpcomingBillsResponse, 400: ErrorResponse},
+    auth=JWTAuth(),
+    description=(
+        "List bills falling due between `from` and `to` (inclusive, default the next 30 days), "
+        "grouped by day with totals in the user's main currency. "
+        "Bills in a currency with no exchange rate are listed but left out of the totals."
+    ),
+)
+def upcoming_bills(
+    request,
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+):
+    date_from = date_from or date.today()
+    date_to = date_to or date_from + timedelta(days=30)
+    if date_to < date_from:
+        return 400, ErrorResponse(detail="'to' must not be before 'from'")
+    if (date_to - date_from).days > UPCOMING_MAX_DAYS:
+        return 400, ErrorResponse(detail=f"Range may span at most {UPCOMING_MAX_DAYS} days")
+
+    main_currency = get_main_currency(request.auth)
+
+    subs = list(
+        Subscription.objects.filter(
+            user=request.auth, is_active=True, next_due_date__lte=date_to,
+        ).values(
+            "id", "name", "icon", "amount", "currency", "frequency",
+            "custom_interval_days", "start_date", "end_date", "next_due_date",
+        )
+    )
+    rates = get_rates({s["currency"] for s in subs}, main_currency)
+
+    by_day = defaultdict(list)
+    for s in subs:
+        rate = rates.get(s["currency"])
+        bill = UpcomingBillResponse(
+            subscription_id=s["id"],
+            name=s["name"],
+            icon=s["icon"],
+            amount=s["amount"],
+            currency=s["currency"],
+            converted_amount=(s["amount"] * rate).quantize(Decimal("0.01")) if rate is not None else None,
+        )
+        # Cycles before next_due_date have already been processed
+        for day in occurrences_between(
+            s["start_date"], s["frequency"],
+            max(date_from, s["next_due_date"]), date_to,
+            s["custom_interval_days"], s["end_date"],
+        ):
+            by_day[day].append(bill)
+
+    days = [
+        UpcomingDayResponse(
+            date=day,
+            total=sum((b.converted_amount for b in bills if b.converted_amount is not None), Decimal("0.00")),
+            bills=bills,
+        )
+        for day, bills in sorted(by_day.items())
+    ]
+
+    return 200, UpcomingBillsResponse(
+        currency=main_currency,
+        date_from=date_from,
+        date_to=date_to,
+        total=sum((d.total for d in days), Decimal("0.00")),
+        unconverted_currencies=sorted({
+            b.currency for bills in by_day.values() for b in bills if b.converted_amount is None
+        }),
+        days=days,
     )
 
 
@@ -104,7 +201,7 @@ def create_subscription(request, payload: CreateSubscriptionRequest):
             return 400, ErrorResponse(detail="Category not found")
 
     # Validate frequency
-    if payload.frequency not in ("weekly", "monthly", "yearly", "custom"):
+    if payload.frequency not in FREQUENCIES:
         return 400, ErrorResponse(detail="Invalid frequency")
 
     if payload.frequency == "custom" and not payload.custom_interval_days:
@@ -130,9 +227,14 @@ def create_subscription(request, payload: CreateSubscriptionRequest):
         next_due_date=next_due,
         reminder_enabled=payload.reminder_enabled,
         reminder_days_before=payload.reminder_days_before,
+        remind_at=compute_remind_at(
+            next_due, payload.reminder_days_before, payload.reminder_enabled,
+        ),
         note=payload.note,
         icon=payload.icon,
     )
+    update_summary(request.auth.pk, after=summary_entry(sub))
+    bump_ledger_version(request.auth.pk)
 
     return 201, SubscriptionResponse.from_subscription(sub)
 
@@ -169,6 +271,7 @@ def update_subscription(
     except Subscription.DoesNotExist:
         return 404, ErrorResponse(detail="Subscription not found")
 
+    before = summary_entry(sub)
     update_fields = []
 
     # Handle account change
@@ -218,7 +321,10 @@ def update_subscription(
         update_fields.append("next_due_date")
 
     if update_fields:
-        sub.save(update_fields=update_fields)
+        refresh_remind_at(sub)
+        sub.save(update_fields=update_fields + ["remind_at", "updated_at"])
+        update_summary(request.auth.pk, before, summary_entry(sub))
+        bump_ledger_version(request.auth.pk)
 
     return 200, SubscriptionResponse.from_subscription(sub)
 
@@ -234,7 +340,10 @@ def delete_subscription(request, subscription_id: int):
         sub = Subscription.objects.get(id=subscription_id, user=request.auth)
     except Subscription.DoesNotExist:
         return 404, ErrorResponse(detail="Subscription not found")
+    Tombstone.objects.create(user=request.auth, entity="subscription", object_id=sub.pk)
+    update_summary(request.auth.pk, before=summary_entry(sub))
     sub.delete()
+    bump_ledger_version(request.auth.pk)
     return 200, MessageResponse(message="Subscription deleted")
 
 
@@ -251,6 +360,10 @@ def toggle_subscription(request, subscription_id: int):
         )
     except Subscription.DoesNotExist:
         return 404, ErrorResponse(detail="Subscription not found")
+    before = summary_entry(sub)
     sub.is_active = not sub.is_active
-    sub.save(update_fields=["is_active"])
+    refresh_remind_at(sub)
+    sub.save(update_fields=["is_active", "remind_at", "updated_at"])
+    update_summary(request.auth.pk, before, summary_entry(sub))
+    bump_ledger_version(request.auth.pk)
     return 200, SubscriptionResponse.from_subscription(sub)
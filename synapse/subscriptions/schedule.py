@@ -0,0 +1,109 @@
+"""
+Due-date arithmetic for subscriptions.
+
+Occurrence n of a subscription is computed directly from its start date —
+start + n periods — rather than by stepping one period at a time, so
+finding the next due date is O(1) however old the subscription is.
+Monthly and yearly occurrences are anchored to the start date and clamped
+to the end of shorter months: a subscription starting Jan 31 falls due
+Feb 28 (or 29), then Mar 31, never drifting to the 28th.
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Iterator, Optional
+
+from dateutil.relativedelta import relativedelta
+
+FREQUENCIES = ("weekly", "monthly", "yearly", "custom")
+
+
+def _period_days(frequency, custom_interval_days):
+    if frequency == "weekly":
+        return 7
+    if frequency == "custom" and custom_interval_days:
+        return custom_interval_days
+    return None
+
+
+def is_recurring(frequency, custom_interval_days=None) -> bool:
+    """Whether the frequency defines a repeating schedule."""
+    return frequency in ("monthly", "yearly") or _period_days(frequency, custom_interval_days) is not None
+
+
+def occurrence(start_date: date, frequency, n: int, custom_interval_days=None) -> date:
+    """Return the n-th occurrence (0 is start_date itself)."""
+    days = _period_days(frequency, custom_interval_days)
+    if days is not None:
+        return start_date + timedelta(days=days * n)
+    if frequency == "monthly":
+        return start_date + relativedelta(months=n)
+    if frequency == "yearly":
+        return start_date + relativedelta(years=n)
+    return start_date
+
+
+def occurrence_index_after(start_date: date, frequency, after: date, custom_interval_days=None) -> int:
+    """Return the index of the first occurrence strictly after `after`."""
+    if start_date > after or not is_recurring(frequency, custom_interval_days):
+        return 0
+
+    days = _period_days(frequency, custom_interval_days)
+    if days is not None:
+        return (after - start_date).days // days + 1
+
+    if frequency == "monthly":
+        n = (after.year - start_date.year) * 12 + (after.month - start_date.month)
+    else:
+        n = after.year - start_date.year
+    # Occurrence n lands in after's month (or year); clamping can only move it
+    # earlier within that period, so at most one more step is needed.
+    if occurrence(start_date, frequency, n, custom_interval_days) <= after:
+        n += 1
+    return n
+
+
+def compute_next_due_date(start_date: date, frequency, custom_interval_days=None, today: Optional[date] = None) -> date:
+    """Return the first occurrence after today (or start_date if it is still in the future)."""
+    today = today or date.today()
+    n = occurrence_index_after(start_date, frequency, today, custom_interval_days)
+    return occurrence(start_date, frequency, n, custom_interval_days)
+
+
+def occurrences_between(
+    start_date: date,
+    frequency,
+    date_from: date,
+    date_to: date,
+    custom_interval_days=None,
+    end_date: Optional[date] = None,
+) -> Iterator[date]:
+    """Lazily yield every occurrence in [date_from, date_to], stopping at end_date."""
+    last = min(date_to, end_date) if end_date else date_to
+    if last < start_date or last < date_from:
+        return
+
+    n = occurrence_index_after(start_date, frequency, date_from - timedelta(days=1), custom_interval_days)
+    if not is_recurring(frequency, custom_interval_days):
+        if date_from <= start_date <= last:
+            yield start_date
+        return
+
+    while True:
+        current = occurrence(start_date, frequency, n, custom_interval_days)
+        if current > last:
+            return
+        yield current
+        n += 1
+
+
+def normalize_to_monthly(amount, frequency, custom_interval_days=None):
+    """Convert any frequency amount to its monthly equivalent."""
+    if frequency == "monthly":
+        return amount
+    elif frequency == "weekly":
+        return amount * Decimal("52") / Decimal("12")
+    elif frequency == "yearly":
+        return amount / Decimal("12")
+    elif frequency == "custom" and custom_interval_days:
+        return amount * Decimal("30") / Decimal(str(custom_interval_days))
+    return amount
@@ -83,7 +83,46 @@ class SubscriptionResponse(Schema):
         )
 
 
+class CategoryCostResponse(Schema):
+    category_id: Optional[int]
+    monthly_cost: Decimal
+
+
+class SubscriptionOverviewResponse(Schema):
+    currency: str
+    total_monthly_cost: Decimal
+    active_count: int
+    categories: list[CategoryCostResponse]
+    unconverted_currencies: list[str]
+
+
 class SubscriptionSummaryResponse(Schema):
+    currency: str
     total_monthly_cost: Decimal
     active_count: int
     subscriptions: list[SubscriptionResponse]
+    has_more: bool
+
+
+class UpcomingBillResponse(Schema):
+    subscription_id: int
+    name: str
+    icon: str
+    amount: Decimal
+    currency: str
+    converted_amount: Optional[Decimal]
+
+
+class UpcomingDayResponse(Schema):
+    date: date
+    total: Decimal
+    bills: list[UpcomingBillResponse]
+
+
+class UpcomingBillsResponse(Schema):
+    currency: str
+    date_from: date
+    date_to: date
+    total: Decimal
+    unconverted_currencies: list[str]
+    days: list[UpcomingDayResponse]
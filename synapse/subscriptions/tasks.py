@@ -0,0 +1,12 @@
+from django.core.management import call_command
+from taskqueue.registry import task
+
+
+@task(concurrency=1, retry_delay=300)
+def process_due_subscriptions():
+    call_command("process_due_subscriptions")
+
+
+@task(concurrency=2)
+def send_subscription_reminders():
+    call_command("send_subscription_reminders")
@@ -0,0 +1,195 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from accounts.models import ExchangeRate
+from django.core.cache import cache
+from django.test import Client
+
+from subscriptions.cache import _summary_key, build_summary, get_summary, update_summary
+from subscriptions.models import Subscription
+
+
+@pytest.fixture
+def client():
+    return Client()
+
+
+def _subscription(user, account, **kwargs):
+    fields = {
+        "name": "Streaming",
+        "amount": Decimal("10.00"),
+        "currency": "USD",
+        "frequency": "monthly",
+        "start_date": date(2026, 1, 31),
+        "next_due_date": date(2026, 1, 31),
+    }
+    fields.update(kwargs)
+    return Subscription.objects.create(user=user, account=account, **fields)
+
+
+@pytest.mark.django_db
+class TestUpcomingBills:
+    def test_groups_occurrences_by_day(self, client, auth_headers, user, account):
+        monthly = _subscription(user, account)
+        weekly = _subscription(user, account, name="Gym", amount=Decimal("5.00"),
+                               frequency="weekly", start_date=date(2026, 2, 7),
+                               next_due_date=date(2026, 2, 7))
+
+        response = client.get("/api/subscriptions/upcoming?from=2026-02-01&to=2026-03-01", **auth_headers)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["currency"] == "USD"
+        assert [d["date"] for d in data["days"]] == [
+            "2026-02-07", "2026-02-14", "2026-02-21", "2026-02-28",
+        ]
+        last = data["days"][-1]
+        assert {b["subscription_id"] for b in last["bills"]} == {monthly.id, weekly.id}
+        assert Decimal(last["total"]) == Decimal("15.00")
+        assert Decimal(data["total"]) == Decimal("30.00")
+
+    def test_converts_to_main_currency(self, client, auth_headers, user, account):
+        ExchangeRate.objects.create(base_currency="EUR", target_currency="USD", rate=Decimal("1.10"))
+        _subscription(user, account, currency="EUR")
+        _subscription(user, account, name="Cloud", currency="GBP")
+
+        response = client.get("/api/subscriptions/upcoming?from=2026-02-01&to=2026-02-28", **auth_headers)
+
+        data = response.json()
+        bills = data["days"][0]["bills"]
+        converted = {b["currency"]: b["converted_amount"] for b in bills}
+        assert Decimal(converted["EUR"]) == Decimal("11.00")
+        assert converted["GBP"] is None
+        assert Decimal(data["total"]) == Decimal("11.00")
+        assert data["unconverted_currencies"] == ["GBP"]
+
+    def test_skips_processed_inactive_and_ended(self, client, auth_headers, user, account):
+        _subscription(user, account, next_due_date=date(2026, 3, 31))
+        _subscription(user, account, is_active=False)
+        _subscription(user, account, end_date=date(2026, 2, 15))
+
+        response = client.get("/api/subscriptions/upcoming?from=2026-02-01&to=2026-03-15", **auth_headers)
+
+        assert response.json()["days"] == []
+
+    def test_rejects_inverted_range(self, client, auth_headers):
+        response = client.get("/api/subscriptions/upcoming?from=2026-03-01&to=2026-02-01", **auth_headers)
+        assert response.status_code == 400
+
+    def test_requires_auth(self, client):
+        response = client.get("/api/subscriptions/upcoming")
+        assert response.status_code == 401
+
+
+def _create(client, auth_headers, account, **kwargs):
+    payload = {
+        "name": "Streaming",
+        "amount": "12.00",
+        "currency": "USD",
+        "frequency": "monthly",
+        "account_id": account.id,
+        "start_date": "2026-01-15",
+    }
+    payload.update(kwargs)
+    return client.post("/api/subscriptions/", data=payload, content_type="application/json", **auth_headers)
+
+
+@pytest.mark.django_db
+class TestSubscriptionSummary:
+    def test_summary_in_main_currency(self, client, auth_headers, user, account):
+        ExchangeRate.objects.create(base_currency="EUR", target_currency="USD", rate=Decimal("1.10"))
+        _subscription(user, account, amount=Decimal("12.00"))
+        _subscription(user, account, amount=Decimal("120.00"), currency="EUR", frequency="yearly")
+        _subscription(user, account, amount=Decimal("5.00"), currency="GBP")
+        _subscription(user, account, amount=Decimal("50.00"), is_active=False)
+
+        data = client.get("/api/subscriptions/summary", **auth_headers).json()
+
+        assert data["currency"] == "USD"
+        assert Decimal(data["total_monthly_cost"]) == Decimal("23.00")
+        assert data["active_count"] == 3
+        assert data["unconverted_currencies"] == ["GBP"]
+
+    def test_writes_update_cached_summary(
+        self, client, auth_headers, account, django_capture_on_commit_callbacks,
+    ):
+        assert client.get("/api/subscriptions/summary", **auth_headers).json()["active_count"] == 0
+
+        with django_capture_on_commit_callbacks(execute=True):
+            sub_id = _create(client, auth_headers, account).json()["id"]
+        data = client.get("/api/subscriptions/summary", **auth_headers).json()
+        assert data["active_count"] == 1
+        assert Decimal(data["total_monthly_cost"]) == Decimal("12.00")
+
+        with django_capture_on_commit_callbacks(execute=True):
+            client.patch(
+                f"/api/subscriptions/{sub_id}", data={"amount": "20.00"},
+                content_type="application/json", **auth_headers,
+            )
+        assert Decimal(client.get("/api/subscriptions/summary", **auth_headers).json()["total_monthly_cost"]) == Decimal("20.00")
+
+        with django_capture_on_commit_callbacks(execute=True):
+            client.patch(f"/api/subscriptions/{sub_id}/toggle", **auth_headers)
+        data = client.get("/api/subscriptions/summary", **auth_headers).json()
+        assert data["active_count"] == 0
+        assert Decimal(data["total_monthly_cost"]) == Decimal("0.00")
+
+        with django_capture_on_commit_callbacks(execute=True):
+            client.patch(f"/api/subscriptions/{sub_id}/toggle", **auth_headers)
+            client.delete(f"/api/subscriptions/{sub_id}", **auth_headers)
+        assert client.get("/api/subscriptions/summary", **auth_headers).json()["active_count"] == 0
+
+    def test_incremental_summary_matches_rebuild(
+        self, client, auth_headers, user, account, django_capture_on_commit_callbacks,
+    ):
+        get_summary(user.pk)
+        with django_capture_on_commit_callbacks(execute=True):
+            _create(client, auth_headers, account, frequency="weekly", amount="7.00")
+            _create(client, auth_headers, account, currency="EUR", amount="3.50")
+
+        assert get_summary(user.pk) == build_summary(user.pk)
+
+    def test_rebuild_racing_a_write_is_not_served(
+        self, user, account, django_capture_on_commit_callbacks,
+    ):
+        stale_key = _summary_key(user.pk)
+        stale = build_summary(user.pk)
+        with django_capture_on_commit_callbacks(execute=True):
+            _subscription(user, account)
+            update_summary(user.pk, after=("USD", None))
+        # A reader that read before the commit stores its summary afterwards
+        cache.set(stale_key, stale)
+
+        assert get_summary(user.pk)["active_count"] == 1
+
+    def test_primary_currency_change_drops_summary(
+        self, client, auth_headers, account, django_capture_on_commit_callbacks,
+    ):
+        with django_capture_on_commit_callbacks(execute=True):
+            _create(client, auth_headers, account)
+        assert client.get("/api/subscriptions/summary", **auth_headers).json()["active_count"] == 1
+
+        with django_capture_on_commit_callbacks(execute=True):
+            client.post(
+                "/api/currencies/change-primary", data={"currency": "EUR"},
+                content_type="application/json", **auth_headers,
+            )
+        assert client.get("/api/subscriptions/summary", **auth_headers).json()["active_count"] == 0
+
+    def test_list_has_no_ledger_etag(self, client, auth_headers):
+        # Totals follow exchange-rate refreshes, which do not bump the ledger version
+        assert "ETag" not in client.get("/api/subscriptions/", **auth_headers)
+
+    def test_list_is_paginated(self, client, auth_headers, user, account):
+        for day in range(1, 6):
+            _subscription(user, account, next_due_date=date(2026, 3, day))
+
+        first = client.get("/api/subscriptions/?limit=2", **auth_headers).json()
+        rest = client.get("/api/subscriptions/?limit=2&offset=4", **auth_headers).json()
+
+        assert [s["next_due_date"] for s in first["subscriptions"]] == ["2026-03-01", "2026-03-02"]
+        assert first["has_more"] is True
+        assert first["active_count"] == 5
+        assert len(rest["subscriptions"]) == 1
+        assert rest["has_more"] is False
@@ -0,0 +1,139 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+
+from subscriptions.models import PendingPayment, Subscription
+
+
+def _subscription(user, account, **kwargs):
+    fields = {
+        "name": "Streaming",
+        "amount": Decimal("9.99"),
+        "currency": "USD",
+        "frequency": "monthly",
+        "start_date": date(2026, 1, 31),
+        "next_due_date": date(2026, 3, 31),
+    }
+    fields.update(kwargs)
+    return Subscription.objects.create(user=user, account=account, **fields)
+
+
+def _run(day, **kwargs):
+    call_command("process_due_subscriptions", database="default", date=day, **kwargs)
+
+
+@pytest.mark.django_db
+class TestProcessDueSubscriptions:
+    def test_emits_pending_payment_and_advances(self, user, account):
+        sub = _subscription(user, account)
+
+        _run(date(2026, 3, 31))
+
+        sub.refresh_from_db()
+        assert sub.next_due_date == date(2026, 4, 30)
+        payment = PendingPayment.objects.get(subscription=sub)
+        assert payment.user == user
+        assert payment.due_date == date(2026, 3, 31)
+        assert payment.amount == Decimal("9.99")
+        assert payment.status == "pending"
+
+    def test_skips_not_yet_due_and_inactive(self, user, account):
+        future = _subscription(user, account, next_due_date=date(2026, 4, 30))
+        paused = _subscription(user, account, is_active=False)
+
+        _run(date(2026, 3, 31))
+
+        assert not PendingPayment.objects.exists()
+        future.refresh_from_db()
+        paused.refresh_from_db()
+        assert future.next_due_date == date(2026, 4, 30)
+        assert paused.next_due_date == date(2026, 3, 31)
+
+    def test_rerun_is_a_no_op(self, user, account):
+        sub = _subscription(user, account)
+
+        _run(date(2026, 3, 31))
+        _run(date(2026, 3, 31))
+
+        assert PendingPayment.objects.filter(subscription=sub).count() == 1
+        sub.refresh_from_db()
+        assert sub.next_due_date == date(2026, 4, 30)
+
+    def test_existing_pending_payment_is_not_duplicated(self, user, account):
+        sub = _subscription(user, account)
+        PendingPayment.objects.create(
+            user=user, subscription=sub, due_date=date(2026, 3, 31),
+            amount=Decimal("9.99"), currency="USD",
+        )
+
+        _run(date(2026, 3, 31))
+
+        assert PendingPayment.objects.filter(subscription=sub).count() == 1
+        sub.refresh_from_db()
+        assert sub.next_due_date == date(2026, 4, 30)
+
+    def test_missed_cycles_each_get_a_payment(self, user, account):
+        sub = _subscription(user, account, frequency="weekly",
+                            start_date=date(2026, 1, 1), next_due_date=date(2026, 1, 8))
+
+        _run(date(2026, 3, 1))
+
+        sub.refresh_from_db()
+        assert sub.next_due_date == date(2026, 3, 5)
+        due_dates = list(
+            PendingPayment.objects.filter(subscription=sub).order_by("due_date").values_list("due_date", flat=True)
+        )
+        assert due_dates == [
+            date(2026, 1, 8), date(2026, 1, 15), date(2026, 1, 22), date(2026, 1, 29),
+            date(2026, 2, 5), date(2026, 2, 12), date(2026, 2, 19), date(2026, 2, 26),
+        ]
+
+    def test_missed_cycles_are_bounded(self, user, account):
+        sub = _subscription(user, account, frequency="weekly",
+                            start_date=date(2026, 1, 1), next_due_date=date(2026, 1, 8))
+
+        _run(date(2026, 3, 1), max_cycles=3)
+
+        due_dates = set(PendingPayment.objects.filter(subscription=sub).values_list("due_date", flat=True))
+        assert due_dates == {date(2026, 2, 12), date(2026, 2, 19), date(2026, 2, 26)}
+
+    def test_missed_cycles_stop_at_end_date(self, user, account):
+        sub = _subscription(user, account, start_date=date(2026, 1, 31),
+                            next_due_date=date(2026, 1, 31), end_date=date(2026, 2, 28))
+
+        _run(date(2026, 4, 30))
+
+        sub.refresh_from_db()
+        assert sub.is_active is False
+        assert PendingPayment.objects.filter(subscription=sub).count() == 2
+
+    def test_end_date_moved_before_next_due_date(self, user, account):
+        sub = _subscription(user, account, next_due_date=date(2026, 3, 31), end_date=date(2026, 3, 15))
+
+        _run(date(2026, 4, 30))
+
+        sub.refresh_from_db()
+        assert sub.is_active is False
+        assert sub.next_due_date == date(2026, 3, 31)
+        assert not PendingPayment.objects.filter(subscription=sub).exists()
+
+    def test_deactivates_after_end_date(self, user, account):
+        sub = _subscription(user, account, end_date=date(2026, 4, 15))
+
+        _run(date(2026, 3, 31))
+
+        sub.refresh_from_db()
+        assert sub.is_active is False
+        assert PendingPayment.objects.filter(subscription=sub).count() == 1
+
+    def test_processes_across_chunks(self, user, account):
+        subs = [_subscription(user, account) for _ in range(5)]
+
+        _run(date(2026, 3, 31), chunk_size=2)
+
+        assert PendingPayment.objects.count() == 5
+        for sub in subs:
+            sub.refresh_from_db()
+            assert sub.next_due_date == date(2026, 4, 30)
@@ -0,0 +1,137 @@
+import json
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.test import Client
+
+from subscriptions.models import Subscription
+from subscriptions.notifiers import BaseNotifier, FileNotifier
+from subscriptions.reminders import compute_remind_at, dispatch_due_reminders
+
+NOW = datetime(2026, 3, 10, 12, tzinfo=timezone.utc)
+
+
+class RecordingNotifier(BaseNotifier):
+    def __init__(self, fail_for=()):
+        self.sent = []
+        self.fail_for = set(fail_for)
+
+    def send(self, reminder):
+        if reminder["subscription_id"] in self.fail_for:
+            raise RuntimeError("delivery failed")
+        self.sent.append(reminder)
+
+
+def _subscription(user, account, due, days_before=1, **kwargs):
+    fields = {
+        "name": "Streaming",
+        "amount": Decimal("9.99"),
+        "frequency": "monthly",
+        "start_date": due,
+        "next_due_date": due,
+        "reminder_enabled": True,
+        "reminder_days_before": days_before,
+        "remind_at": compute_remind_at(due, days_before),
+    }
+    fields.update(kwargs)
+    return Subscription.objects.create(user=user, account=account, **fields)
+
+
+def test_compute_remind_at():
+    assert compute_remind_at(date(2026, 3, 12), 2) == datetime(2026, 3, 10, 9, tzinfo=timezone.utc)
+    assert compute_remind_at(date(2026, 3, 12), 2, reminder_enabled=False) is None
+    assert compute_remind_at(date(2026, 3, 12), 2, is_active=False) is None
+
+
+@pytest.mark.django_db
+class TestDispatchReminders:
+    def test_sends_due_reminders_once(self, user, account):
+        due = _subscription(user, account, date(2026, 3, 11))
+        _subscription(user, account, date(2026, 3, 20))
+        notifier = RecordingNotifier()
+
+        assert dispatch_due_reminders(notifier, now=NOW) == (1, 0)
+        assert dispatch_due_reminders(notifier, now=NOW) == (0, 0)
+
+        assert [r["subscription_id"] for r in notifier.sent] == [due.id]
+        assert notifier.sent[0]["email"] == user.email
+        due.refresh_from_db()
+        assert due.remind_at is None
+
+    def test_failed_reminder_is_retried_later(self, user, account):
+        sub = _subscription(user, account, date(2026, 3, 11))
+        notifier = RecordingNotifier(fail_for={sub.id})
+
+        assert dispatch_due_reminders(notifier, now=NOW) == (0, 1)
+
+        sub.refresh_from_db()
+        assert sub.remind_at > NOW
+
+    def test_batches(self, user, account):
+        for _ in range(3):
+            _subscription(user, account, date(2026, 3, 11))
+        notifier = RecordingNotifier()
+
+        assert dispatch_due_reminders(notifier, batch_size=2, now=NOW) == (2, 0)
+        assert dispatch_due_reminders(notifier, batch_size=2, now=NOW) == (1, 0)
+
+    def test_file_notifier_writes_json_lines(self, user, account, tmp_path):
+        sub = _subscription(user, account, date(2026, 3, 11))
+        path = tmp_path / "reminders.jsonl"
+
+        dispatch_due_reminders(FileNotifier(path), now=NOW)
+
+        [line] = path.read_text().splitlines()
+        assert json.loads(line)["subscription_id"] == sub.id
+
+    def test_command_sends_reminders(self, user, account, settings, tmp_path):
+        settings.SUBSCRIPTION_REMINDER_NOTIFIER = "subscriptions.notifiers.FileNotifier"
+        settings.SUBSCRIPTION_REMINDER_FILE = tmp_path / "out.jsonl"
+        sub = _subscription(user, account, date.today())
+
+        call_command("send_subscription_reminders", database="default")
+
+        sub.refresh_from_db()
+        assert sub.remind_at is None
+        assert (tmp_path / "out.jsonl").exists()
+
+
+@pytest.mark.django_db
+class TestRemindAtMaintenance:
+    def test_api_writes_schedule_reminders(self, user, account, auth_headers):
+        client = Client()
+        response = client.post(
+            "/api/subscriptions/",
+            data={
+                "name": "Cloud", "amount": "5.00", "frequency": "monthly",
+                "account_id": account.id, "start_date": "2099-01-15",
+                "reminder_enabled": True, "reminder_days_before": 3,
+            },
+            content_type="application/json",
+            **auth_headers,
+        )
+        sub = Subscription.objects.get(id=response.json()["id"])
+        assert sub.remind_at == datetime(2099, 1, 12, 9, tzinfo=timezone.utc)
+
+        client.patch(f"/api/subscriptions/{sub.id}/toggle", **auth_headers)
+        sub.refresh_from_db()
+        assert sub.remind_at is None
+
+        client.patch(f"/api/subscriptions/{sub.id}/toggle", **auth_headers)
+        client.patch(
+            f"/api/subscriptions/{sub.id}", data={"reminder_days_before": 1},
+            content_type="application/json", **auth_headers,
+        )
+        sub.refresh_from_db()
+        assert sub.remind_at == datetime(2099, 1, 14, 9, tzinfo=timezone.utc)
+
+    def test_processing_due_subscription_schedules_next_reminder(self, user, account):
+        sub = _subscription(user, account, date(2026, 3, 10), remind_at=None)
+
+        call_command("process_due_subscriptions", database="default", date=date(2026, 3, 10))
+
+        sub.refresh_from_db()
+        assert sub.next_due_date == date(2026, 4, 10)
+        assert sub.remind_at == datetime(2026, 4, 9, 9, tzinfo=timezone.utc)
@@ -0,0 +1,120 @@
+import random
+from datetime import date, timedelta
+
+import pytest
+from dateutil.relativedelta import relativedelta
+
+from subscriptions.schedule import (
+    compute_next_due_date,
+    occurrence,
+    occurrences_between,
+)
+
+FREQUENCY_CASES = ("weekly", "monthly", "yearly", "custom")
+
+
+def _legacy_next_due_date(start_date, frequency, custom_interval_days, today):
+    """The original one-period-at-a-time loop from subscription_router."""
+    current = start_date
+    if current > today:
+        return current
+    while current <= today:
+        if frequency == "weekly":
+            current += timedelta(weeks=1)
+        elif frequency == "monthly":
+            current += relativedelta(months=1)
+        elif frequency == "yearly":
+            current += relativedelta(years=1)
+        elif frequency == "custom" and custom_interval_days:
+            current += timedelta(days=custom_interval_days)
+        else:
+            break
+    return current
+
+
+def _anchored_next_due_date(start_date, frequency, custom_interval_days, today):
+    """Reference loop that steps occurrence indexes, anchored to start_date."""
+    n = 0
+    current = start_date
+    while current <= today:
+        n += 1
+        current = occurrence(start_date, frequency, n, custom_interval_days)
+    return current
+
+
+def _random_case(rng, max_day=31):
+    start = date(2000, 1, 1) + timedelta(days=rng.randrange(0, 365 * 30))
+    if start.day > max_day:
+        start = start.replace(day=max_day)
+    today = start + timedelta(days=rng.randrange(-400, 365 * 12))
+    frequency = rng.choice(FREQUENCY_CASES)
+    custom = rng.randrange(1, 120) if frequency == "custom" else None
+    return start, frequency, custom, today
+
+
+class TestComputeNextDueDate:
+    def test_matches_legacy_loop(self):
+        # The legacy loop chains relativedelta steps, which drifts after a
+        # short month, so it is only a valid oracle for days 1-28.
+        rng = random.Random(20240131)
+        for _ in range(2000):
+            start, frequency, custom, today = _random_case(rng, max_day=28)
+            assert compute_next_due_date(start, frequency, custom, today=today) == \
+                _legacy_next_due_date(start, frequency, custom, today), (start, frequency, custom, today)
+
+    def test_matches_anchored_reference(self):
+        rng = random.Random(7)
+        for _ in range(2000):
+            start, frequency, custom, today = _random_case(rng)
+            result = compute_next_due_date(start, frequency, custom, today=today)
+            assert result == _anchored_next_due_date(start, frequency, custom, today)
+            assert result > today or result == start
+
+    @pytest.mark.parametrize("today, expected", [
+        (date(2024, 1, 31), date(2024, 2, 29)),
+        (date(2024, 2, 29), date(2024, 3, 31)),
+        (date(2024, 4, 1), date(2024, 4, 30)),
+    ])
+    def test_month_end_clamping(self, today, expected):
+        assert compute_next_due_date(date(2024, 1, 31), "monthly", today=today) == expected
+
+    def test_leap_day_yearly(self):
+        assert compute_next_due_date(date(2020, 2, 29), "yearly", today=date(2021, 3, 1)) == date(2022, 2, 28)
+        assert compute_next_due_date(date(2020, 2, 29), "yearly", today=date(2023, 6, 1)) == date(2024, 2, 29)
+
+    def test_future_start_is_returned_as_is(self):
+        assert compute_next_due_date(date(2030, 5, 1), "monthly", today=date(2024, 1, 1)) == date(2030, 5, 1)
+
+    def test_custom_without_interval_does_not_advance(self):
+        assert compute_next_due_date(date(2020, 1, 1), "custom", None, today=date(2024, 1, 1)) == date(2020, 1, 1)
+
+
+class TestOccurrencesBetween:
+    def test_matches_filtered_enumeration(self):
+        rng = random.Random(99)
+        for _ in range(1000):
+            start, frequency, custom, _ = _random_case(rng)
+            date_from = start + timedelta(days=rng.randrange(-100, 2000))
+            date_to = date_from + timedelta(days=rng.randrange(0, 400))
+
+            expected = []
+            n = 0
+            while True:
+                current = occurrence(start, frequency, n, custom)
+                if current > date_to:
+                    break
+                if current >= date_from:
+                    expected.append(current)
+                n += 1
+            assert list(occurrences_between(start, frequency, date_from, date_to, custom)) == expected
+
+    def test_stops_at_end_date(self):
+        result = list(occurrences_between(
+            date(2024, 1, 15), "monthly", date(2024, 1, 1), date(2024, 12, 31), end_date=date(2024, 4, 1),
+        ))
+        assert result == [date(2024, 1, 15), date(2024, 2, 15), date(2024, 3, 15)]
+
+    def test_is_lazy(self):
+        gen = occurrences_between(date(1990, 1, 1), "weekly", date(1990, 1, 1), date(9999, 1, 1))
+        assert next(gen) == date(1990, 1, 1)
+        assert next(gen) == date(1990, 1, 8)
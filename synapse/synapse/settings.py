@@ -37,6 +37,9 @@ CORE_APPS = [
     'accounts',
     'ledger',
     'subscriptions',
+    'sync',
+    'taskqueue',
+    'monitoring',
 ]
 
 PLUGINS = [
@@ -53,6 +56,8 @@ INSTALLED_APPS = [
 ] + CORE_APPS
 
 MIDDLEWARE = [
+    'monitoring.middleware.MetricsMiddleware',
+    'monitoring.middleware.ProfilerMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -60,6 +65,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'accounts.middleware.LedgerETagMiddleware',
     'accounts.middleware.RLSMiddleware'
 ]
 
@@ -122,6 +128,123 @@ CACHES = {
 
 PASSWORD_CACHE_TTL = int(os.getenv("PASSWORD_CACHE_TTL", "300"))  # 5 minutes
 
+# GET endpoints answered with 304 when If-None-Match matches the user's ledger version.
+# Only list responses that change with ledger writes alone; /api/subscriptions/
+# converts at live exchange rates and is left out.
+LEDGER_ETAG_PATHS = (
+    "/api/ledger/accounts/",
+    "/api/ledger/categories",
+    "/api/ledger/tags/",
+    "/api/currencies/user",
+)
+
+# How long an Idempotency-Key (header or batch key) replays its original response
+IDEMPOTENCY_KEY_TTL = int(os.getenv("IDEMPOTENCY_KEY_TTL", "86400"))  # 24 hours
+
+# Sync tokens are issued this many seconds in the past. Rows are stamped by the
+# app server before their transaction commits, so a write can commit after a
+# sync that started later; keep this above the longest request plus clock skew.
+SYNC_CURSOR_OVERLAP_SECONDS = int(os.getenv("SYNC_CURSOR_OVERLAP_SECONDS", "300"))  # 5 minutes
+
+# Expiry for cached subscription summaries; writes replace them on commit
+SUBSCRIPTION_SUMMARY_TTL = int(os.getenv("SUBSCRIPTION_SUMMARY_TTL", "3600"))  # 1 hour
+
+# Subscription reminders: sent at this hour (UTC) through the notifier class below
+SUBSCRIPTION_REMINDER_HOUR = int(os.getenv("SUBSCRIPTION_REMINDER_HOUR", "9"))
+SUBSCRIPTION_REMINDER_NOTIFIER = os.getenv(
+    "SUBSCRIPTION_REMINDER_NOTIFIER", "subscriptions.notifiers.LogNotifier"
+)
+SUBSCRIPTION_REMINDER_FILE = os.getenv("SUBSCRIPTION_REMINDER_FILE", BASE_DIR / "reminders.jsonl")
+SUBSCRIPTION_REMINDER_RETRY = int(os.getenv("SUBSCRIPTION_REMINDER_RETRY", "300"))  # seconds
+
+# Background tasks (python manage.py run_tasks --beat). Cron times are UTC.
+TASK_SCHEDULE = {
+    "refresh-exchange-rates": {
+        "task": "accounts.tasks.refresh_exchange_rates",
+        "cron": "0 */6 * * *",
+    },
+    "process-due-subscriptions": {
+        "task": "subscriptions.tasks.process_due_subscriptions",
+        "cron": "5 0 * * *",
+    },
+    "send-subscription-reminders": {
+        "task": "subscriptions.tasks.send_subscription_reminders",
+        "cron": "* * * * *",
+    },
+    "purge-idempotency-records": {
+        "task": "ledger.tasks.purge_idempotency_records",
+        "cron": "30 3 * * *",
+    },
+    "create-transaction-partitions": {
+        "task": "ledger.tasks.create_transaction_partitions",
+        "cron": "15 1 * * *",
+    },
+    "archive-transactions": {
+        "task": "ledger.tasks.archive_transactions",
+        "cron": "30 1 * * *",
+    },
+    "compact-balance-deltas": {
+        "task": "ledger.tasks.compact_balance_deltas",
+        "cron": "* * * * *",
+    },
+    "reconcile-balances": {
+        "task": "ledger.tasks.reconcile_balances",
+        "cron": "0 4 * * 0",
+    },
+    "purge-request-profiles": {
+        "task": "monitoring.tasks.purge_request_profiles",
+        "cron": "45 3 * * *",
+    },
+    "purge-finished-tasks": {
+        "task": "taskqueue.tasks.purge_finished_tasks",
+        "cron": "50 3 * * *",
+    },
+}
+# A running task whose worker has not sent a heartbeat for this many seconds is
+# assumed lost and requeued; workers send one every TASK_HEARTBEAT_INTERVAL.
+TASK_VISIBILITY_TIMEOUT = int(os.getenv("TASK_VISIBILITY_TIMEOUT", "3600"))
+TASK_HEARTBEAT_INTERVAL = int(os.getenv("TASK_HEARTBEAT_INTERVAL", "60"))
+# Finished (succeeded or failed) tasks are purged daily after this many days
+TASK_RETENTION_DAYS = int(os.getenv("TASK_RETENTION_DAYS", "7"))
+
+# /metrics: each worker pushes its samples to Redis this often (seconds), from a
+# background thread. Scrapes need "Authorization: Bearer <METRICS_TOKEN>" when it
+# is set, and a staff user's access token otherwise.
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "1.0"))
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Request profiler: staff users send "X-Profile: 1"; additionally profile this
+# fraction of all requests. Profiles are kept for PROFILER_RETENTION_DAYS.
+PROFILER_SAMPLE_RATE = float(os.getenv("PROFILER_SAMPLE_RATE", "0"))
+PROFILER_INTERVAL = float(os.getenv("PROFILER_INTERVAL", "0.005"))  # seconds between stack samples
+PROFILER_RETENTION_DAYS = int(os.getenv("PROFILER_RETENTION_DAYS", "7"))
+
+# Slow-query log: queries at or over the threshold are aggregated by fingerprint
+# (python manage.py slow_query_report); SELECTs get an EXPLAIN (ANALYZE, BUFFERS),
+# or a plain EXPLAIN if they lock rows or stream, at most once per fingerprint
+# per interval.
+SLOW_QUERY_LOG = os.getenv("SLOW_QUERY_LOG", "true").lower() == "true"
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "200"))
+SLOW_QUERY_EXPLAIN_INTERVAL = int(os.getenv("SLOW_QUERY_EXPLAIN_INTERVAL", "3600"))  # seconds
+
+# Upper bound on mutations accepted by POST /api/ledger/batch
+LEDGER_BATCH_MAX_MUTATIONS = int(os.getenv("LEDGER_BATCH_MAX_MUTATIONS", "500"))
+
+# transactions is range-partitioned by month on Postgres; keep partitions
+# created this many months past the current one
+LEDGER_PARTITION_MONTHS_AHEAD = int(os.getenv("LEDGER_PARTITION_MONTHS_AHEAD", "3"))
+
+# Transactions dated more than this many days ago (whole months) move to the archive
+LEDGER_ARCHIVE_AFTER_DAYS = int(os.getenv("LEDGER_ARCHIVE_AFTER_DAYS", "730"))  # 2 years
+
+# Rows read and encoded per step by GET /api/ledger/export
+LEDGER_EXPORT_CHUNK_SIZE = int(os.getenv("LEDGER_EXPORT_CHUNK_SIZE", "2000"))
+
+# "inline" updates financial_accounts.balance on every write; "deltas" appends
+# to account_balance_deltas instead, so concurrent writers to one account
+# don't queue on its row lock. Deltas are compacted every minute.
+LEDGER_BALANCE_MODE = os.getenv("LEDGER_BALANCE_MODE", "inline")
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -9,6 +9,9 @@ from accounts.router import auth_router
 from accounts.router import currency_router
 from ledger.router import ledger_router
 from subscriptions.router import router as subscriptions_router
+from sync.router import router as sync_router
+from monitoring.router import router as profiles_router
+from monitoring.views import metrics_view
 
 api = NinjaAPI(title="Synapse Manager API", version="1.0",
     openapi_extra={"info": {"description": "Synapse Manager API"}}
@@ -18,7 +21,10 @@ api.add_router("/auth", auth_router.router)
 api.add_router("/ledger", ledger_router.router)
 api.add_router("/subscriptions", subscriptions_router)
 api.add_router("/currencies", currency_router.router)
+api.add_router("/sync", sync_router)
+api.add_router("/profiles", profiles_router)
 
 urlpatterns = [
-    path("api/", api.urls)
+    path("api/", api.urls),
+    path("metrics", metrics_view),
 ]
@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.db import models
+
+SYNC_ENTITIES = (
+    ("transaction", "Transaction"),
+    ("account", "Account"),
+    ("category", "Category"),
+    ("tag", "Tag"),
+    ("subscription", "Subscription"),
+    ("sub_currency", "Sub-currency"),
+    ("all", "All"),  # bulk wipe (e.g. primary currency change) — clients must resync
+)
+
+
+class Tombstone(models.Model):
+    """Marker for a hard-deleted row, so delta sync can tell clients to drop it."""
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="tombstones",
+    )
+    entity = models.CharField(max_length=20, choices=SYNC_ENTITIES)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "sync_tombstones"
+        indexes = [
+            models.Index(fields=["user", "deleted_at"], name="tombstone_user_deleted_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.entity} #{self.object_id} deleted at {self.deleted_at}"
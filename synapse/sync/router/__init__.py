@@ -0,0 +1,3 @@
+from .sync_router import router
+
+__all__ = ["router"]
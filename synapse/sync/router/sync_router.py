@@ -0,0 +1,158 @@
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Optional
+
+from accounts.auth import JWTAuth
+from accounts.schemas import ErrorResponse
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from ninja import Router
+
+from ledger.archive import archived_transactions
+from ledger.models import Account, AccountBalanceDelta, Category, Tag, Transaction
+from ledger.schemas import (
+    AccountResponse,
+    CategoryResponse,
+    TagResponse,
+    TransactionResponse,
+)
+from subscriptions.models import Subscription
+from subscriptions.schemas import SubscriptionResponse
+
+from ..models import Tombstone
+from ..schemas import (
+    AccountChanges,
+    CategoryChanges,
+    SubscriptionChanges,
+    SyncResponse,
+    TagChanges,
+    TransactionChanges,
+)
+
+router = Router(tags=["Sync"])
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def encode_sync_token(moment: datetime) -> str:
+    """Encode a cursor as integer microseconds since the epoch."""
+    delta = moment - EPOCH
+    return str((delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds)
+
+
+def decode_sync_token(token: str) -> datetime:
+    """Decode a cursor produced by encode_sync_token. Raises ValueError if malformed."""
+    micros = int(token)
+    if micros < 0:
+        raise ValueError("Negative sync token")
+    return EPOCH + timedelta(microseconds=micros)
+
+
+def _split(rows, since, to_response):
+    """Partition changed rows into created/updated relative to the cursor."""
+    created, updated = [], []
+    for row in rows:
+        if since is None or row.created_at >= since:
+            created.append(to_response(row))
+        else:
+            updated.append(to_response(row))
+    return created, updated
+
+
+@router.get(
+    "",
+    response={200: SyncResponse, 400: ErrorResponse},
+    auth=JWTAuth(),
+    description=(
+        "Return transactions, accounts, categories, tags and subscriptions "
+        "created, updated or deleted since the given sync token. "
+        "Omit since for a full snapshot; archived transactions are only part of a "
+        "snapshot with include_archived=true (or fetch them by date range from the "
+        "transaction list). Pass next_token as since on the next call. "
+        "If full_resync is true, discard local data and apply this response as a snapshot."
+    ),
+)
+def sync(request, since: Optional[str] = None, include_archived: bool = False):
+    user = request.auth
+
+    cursor = None
+    if since:
+        try:
+            cursor = decode_sync_token(since)
+        except (ValueError, OverflowError):
+            return 400, ErrorResponse(detail="Invalid sync token")
+
+    # updated_at is stamped by the app server before commit, so a row
+    # stamped before now() may still be invisible to this read when its
+    # writer commits later. Issue the next cursor SYNC_CURSOR_OVERLAP_SECONDS
+    # in the past so such rows are sent again on the next sync instead of
+    # skipped. Rows in the overlap are sent twice; clients must upsert
+    # idempotently.
+    overlap = timedelta(seconds=getattr(settings, "SYNC_CURSOR_OVERLAP_SECONDS", 300))
+    next_token = encode_sync_token(timezone.now() - overlap)
+
+    deleted: dict[str, list[int]] = defaultdict(list)
+    full_resync = False
+    if cursor is not None:
+        tombstones = Tombstone.objects.filter(
+            user=user, deleted_at__gte=cursor,
+        ).values_list("entity", "object_id")
+        for entity, object_id in tombstones:
+            if entity == "all":
+                full_resync = True
+            else:
+                deleted[entity].append(object_id)
+
+    if full_resync:
+        # The user's data was wiped; serve a snapshot instead of a delta.
+        cursor = None
+        deleted.clear()
+
+    def changed(qs):
+        return qs.filter(updated_at__gte=cursor) if cursor is not None else qs
+
+    transactions = changed(
+        Transaction.objects.filter(user=user)
+    ).select_related("account", "to_account", "category").prefetch_related("tags")
+    accounts = Account.objects.filter(user=user).with_pending_balance()
+    if cursor is not None:
+        # Balance deltas move the balance without touching the account row
+        # until they are compacted, which carries their time into updated_at
+        moved = AccountBalanceDelta.objects.filter(user=user, created_at__gte=cursor).values('account_id')
+        accounts = accounts.filter(Q(updated_at__gte=cursor) | Q(id__in=moved))
+    categories = changed(Category.objects.filter(user=user))
+    tags = changed(Tag.objects.filter(user=user))
+    subscriptions = changed(
+        Subscription.objects.filter(user=user)
+    ).select_related("account", "category")
+
+    txn_created, txn_updated = _split(transactions, cursor, TransactionResponse.from_transaction)
+    if cursor is None and include_archived:
+        # Archived rows never change, so only a snapshot needs them, and only on request
+        txn_created += [TransactionResponse.from_transaction(t) for t in archived_transactions(user)]
+    acc_created, acc_updated = _split(accounts, cursor, AccountResponse.from_account)
+    cat_created, cat_updated = _split(categories, cursor, CategoryResponse.from_category)
+    tag_created, tag_updated = _split(tags, cursor, TagResponse.from_tag)
+    sub_created, sub_updated = _split(subscriptions, cursor, SubscriptionResponse.from_subscription)
+
+    return 200, SyncResponse(
+        next_token=next_token,
+        full_resync=full_resync,
+        transactions=TransactionChanges(
+            created=txn_created, updated=txn_updated, deleted=deleted["transaction"],
+        ),
+        accounts=AccountChanges(
+            created=acc_created, updated=acc_updated, deleted=deleted["account"],
+        ),
+        categories=CategoryChanges(
+            created=cat_created, updated=cat_updated, deleted=deleted["category"],
+        ),
+        tags=TagChanges(
+            created=tag_created, updated=tag_updated, deleted=deleted["tag"],
+        ),
+        subscriptions=SubscriptionChanges(
+            created=sub_created, updated=sub_updated, deleted=deleted["subscription"],
+        ),
+        deleted_sub_currencies=deleted["sub_currency"],
+    )
@@ -0,0 +1,51 @@
+from ninja import Schema
+
+from ledger.schemas import (
+    AccountResponse,
+    CategoryResponse,
+    TagResponse,
+    TransactionResponse,
+)
+from subscriptions.schemas import SubscriptionResponse
+
+
+class TransactionChanges(Schema):
+    created: list[TransactionResponse] = []
+    updated: list[TransactionResponse] = []
+    deleted: list[int] = []
+
+
+class AccountChanges(Schema):
+    created: list[AccountResponse] = []
+    updated: list[AccountResponse] = []
+    deleted: list[int] = []
+
+
+class CategoryChanges(Schema):
+    created: list[CategoryResponse] = []
+    updated: list[CategoryResponse] = []
+    deleted: list[int] = []
+
+
+class TagChanges(Schema):
+    created: list[TagResponse] = []
+    updated: list[TagResponse] = []
+    deleted: list[int] = []
+
+
+class SubscriptionChanges(Schema):
+    created: list[SubscriptionResponse] = []
+    updated: list[SubscriptionResponse] = []
+    deleted: list[int] = []
+
+
+class SyncResponse(Schema):
+    """Rows changed since the client's cursor, plus the cursor for the next call."""
+    next_token: str
+    full_resync: bool = False
+    transactions: TransactionChanges
+    accounts: AccountChanges
+    categories: CategoryChanges
+    tags: TagChanges
+    subscriptions: SubscriptionChanges
+    deleted_sub_currencies: list[int] = []
@@ -0,0 +1,51 @@
+import pytest
+from decimal import Decimal
+from accounts.auth import create_access_token
+from accounts.models import AppPreference, SubCurrency, User
+from django.core.cache import cache
+
+from ledger.models import Account, Category
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Keep cached ledger versions and idempotency keys from leaking between tests."""
+    cache.clear()
+
+
+@pytest.fixture
+def user(db):
+    user_obj = User.objects.create_user(
+        email="sync@example.com",
+        password="SecurePass123!",
+    )
+    currency = SubCurrency.objects.create(currency='USD', user=user_obj)
+    AppPreference.objects.create(user=user_obj, main_currency=currency, timezone='UTC')
+    return user_obj
+
+
+@pytest.fixture
+def auth_headers(user):
+    token = create_access_token(user.id)
+    return {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+
+
+@pytest.fixture
+def checking_account(user):
+    return Account.objects.create(
+        user=user,
+        name="Main Checking",
+        account_type="checking",
+        balance=Decimal("1000.00"),
+        currency="USD",
+    )
+
+
+@pytest.fixture
+def expense_category(user):
+    return Category.objects.create(
+        user=user,
+        name="Food",
+        icon="food",
+        category_type="expense",
+    )
@@ -0,0 +1,107 @@
+from datetime import timedelta
+
+import pytest
+from django.test import Client
+from django.utils import timezone
+
+from ledger.models import Tag
+
+
+@pytest.fixture
+def client():
+    return Client()
+
+
+def _create_expense(client, auth_headers, account, category, amount="25.00"):
+    return client.post(
+        "/api/ledger/transactions/expense",
+        data={"amount": amount, "account_id": account.id, "category_id": category.id, "date": "2023-10-24"},
+        content_type="application/json",
+        **auth_headers,
+    )
+
+
+@pytest.mark.django_db
+class TestSyncEndpoint:
+    @pytest.fixture(autouse=True)
+    def exact_cursor(self, settings):
+        # These tests check exactly which rows a delta carries
+        settings.SYNC_CURSOR_OVERLAP_SECONDS = 0
+
+    def test_initial_sync_returns_snapshot(self, client, auth_headers, checking_account, expense_category):
+        _create_expense(client, auth_headers, checking_account, expense_category)
+
+        response = client.get("/api/sync", **auth_headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["next_token"]
+        assert data["full_resync"] is False
+        assert len(data["transactions"]["created"]) == 1
+        assert [a["id"] for a in data["accounts"]["created"]] == [checking_account.id]
+        assert [c["id"] for c in data["categories"]["created"]] == [expense_category.id]
+
+    def test_delta_only_returns_changes_since_token(self, client, auth_headers, checking_account, expense_category, user):
+        token = client.get("/api/sync", **auth_headers).json()["next_token"]
+
+        _create_expense(client, auth_headers, checking_account, expense_category)
+        Tag.objects.create(user=user, name="Trip")
+
+        data = client.get(f"/api/sync?since={token}", **auth_headers).json()
+        assert len(data["transactions"]["created"]) == 1
+        assert [t["name"] for t in data["tags"]["created"]] == ["Trip"]
+        # The expense moved the account balance, so the account shows as updated
+        assert [a["id"] for a in data["accounts"]["updated"]] == [checking_account.id]
+        assert data["categories"] == {"created": [], "updated": [], "deleted": []}
+
+    def test_delete_produces_tombstone(self, client, auth_headers, checking_account, expense_category):
+        txn_id = _create_expense(client, auth_headers, checking_account, expense_category).json()["id"]
+        token = client.get("/api/sync", **auth_headers).json()["next_token"]
+
+        client.delete(f"/api/ledger/transactions/{txn_id}", **auth_headers)
+
+        data = client.get(f"/api/sync?since={token}", **auth_headers).json()
+        assert data["transactions"]["deleted"] == [txn_id]
+        assert data["transactions"]["created"] == []
+
+    def test_archive_shows_as_update(self, client, auth_headers, expense_category):
+        token = client.get("/api/sync", **auth_headers).json()["next_token"]
+        client.patch(f"/api/ledger/categories/{expense_category.id}/archive", **auth_headers)
+
+        data = client.get(f"/api/sync?since={token}", **auth_headers).json()
+        assert [c["is_archived"] for c in data["categories"]["updated"]] == [True]
+
+    def test_primary_currency_change_forces_resync(self, client, auth_headers, checking_account):
+        token = client.get("/api/sync", **auth_headers).json()["next_token"]
+        client.post(
+            "/api/currencies/change-primary",
+            data={"currency": "EUR"},
+            content_type="application/json",
+            **auth_headers,
+        )
+
+        data = client.get(f"/api/sync?since={token}", **auth_headers).json()
+        assert data["full_resync"] is True
+        assert data["accounts"]["created"] == []
+
+    def test_invalid_token(self, client, auth_headers):
+        response = client.get("/api/sync?since=not-a-token", **auth_headers)
+        assert response.status_code == 400
+
+    def test_requires_auth(self, client):
+        response = client.get("/api/sync")
+        assert response.status_code == 401
+
+
+@pytest.mark.django_db
+class TestSyncCursorOverlap:
+    def test_row_committed_after_sync_is_sent_next_time(self, client, auth_headers, user):
+        started = timezone.now()
+        token = client.get("/api/sync", **auth_headers).json()["next_token"]
+
+        # Stamped before that sync read, but committed after it
+        tag = Tag.objects.create(user=user, name="Late")
+        stamped = started - timedelta(seconds=1)
+        Tag.objects.filter(pk=tag.pk).update(created_at=stamped, updated_at=stamped)
+
+        data = client.get(f"/api/sync?since={token}", **auth_headers).json()
+        assert "Late" in [t["name"] for t in data["tags"]["created"] + data["tags"]["updated"]]
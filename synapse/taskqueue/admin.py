@@ -0,0 +1,6 @@
+from django.contrib import admin
+
+from .models import ScheduledRun, Task
+
+admin.site.register(Task)
+admin.site.register(ScheduledRun)
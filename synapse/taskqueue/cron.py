@@ -0,0 +1,85 @@
+"""
+Minimal five-field cron expressions: minute hour day-of-month month day-of-week.
+
+Each field accepts `*`, numbers, ranges (`1-5`), lists (`1,15`) and steps
+(`*/15`, `0-30/10`). Day of week runs 0-6 from Sunday; 7 is also Sunday.
+As in cron, when both day fields are restricted a time matches either.
+"""
+from datetime import datetime, timedelta
+
+_FIELDS = (
+    ("minute", 0, 59),
+    ("hour", 0, 23),
+    ("day", 1, 31),
+    ("month", 1, 12),
+    ("weekday", 0, 7),
+)
+
+
+class CronError(ValueError):
+    pass
+
+
+def _parse_field(spec, low, high):
+    values = set()
+    for part in spec.split(","):
+        step = 1
+        if "/" in part:
+            part, step_str = part.split("/", 1)
+            if not step_str.isdigit() or int(step_str) == 0:
+                raise CronError(f"Invalid step in {spec!r}")
+            step = int(step_str)
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start_str, end_str = part.split("-", 1)
+            if not (start_str.isdigit() and end_str.isdigit()):
+                raise CronError(f"Invalid range in {spec!r}")
+            start, end = int(start_str), int(end_str)
+        elif part.isdigit():
+            start = end = int(part)
+        else:
+            raise CronError(f"Invalid value in {spec!r}")
+        if start < low or end > high or start > end:
+            raise CronError(f"{spec!r} is out of range {low}-{high}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSchedule:
+    def __init__(self, expression: str):
+        parts = expression.split()
+        if len(parts) != 5:
+            raise CronError(f"Expected 5 fields in {expression!r}")
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            _parse_field(spec, low, high) for spec, (_, low, high) in zip(parts, _FIELDS)
+        )
+        self.weekdays = {d % 7 for d in weekdays}
+        self.day_restricted = parts[2] != "*"
+        self.weekday_restricted = parts[4] != "*"
+
+    def _day_matches(self, dt: datetime) -> bool:
+        day_ok = dt.day in self.days
+        weekday_ok = (dt.isoweekday() % 7) in self.weekdays
+        if self.day_restricted and self.weekday_restricted:
+            return day_ok or weekday_ok
+        return day_ok and weekday_ok
+
+    def next_after(self, dt: datetime) -> datetime:
+        """Return the first matching minute strictly after dt."""
+        current = dt.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # Skip whole days, then hours, then minutes; bounded by one leap cycle
+        limit = current + timedelta(days=366 * 4)
+        while current <= limit:
+            if current.month not in self.months or not self._day_matches(current):
+                current = (current + timedelta(days=1)).replace(hour=0, minute=0)
+                continue
+            if current.hour not in self.hours:
+                current = (current + timedelta(hours=1)).replace(minute=0)
+                continue
+            if current.minute not in self.minutes:
+                current += timedelta(minutes=1)
+                continue
+            return current
+        raise CronError(f"{self.expression!r} never fires")
@@ -0,0 +1,59 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from taskqueue.worker import Worker
+
+
+class Command(BaseCommand):
+    help = "Run background task workers. Start as many copies as needed; they share the queue."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=1,
+            help="Number of worker threads in this process.",
+        )
+        parser.add_argument(
+            "--beat",
+            action="store_true",
+            help="Also enqueue TASK_SCHEDULE entries as they fall due.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Seconds to wait before polling an empty queue again.",
+        )
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Exit once the queue is empty instead of polling forever.",
+        )
+
+    def handle(self, *args, **options):
+        # Only one thread per process needs to run the scheduler
+        workers = [
+            Worker(poll_interval=options["poll_interval"], beat=options["beat"] and i == 0)
+            for i in range(options["concurrency"])
+        ]
+
+        def stop(signum, frame):
+            self.stdout.write("Stopping after current tasks...")
+            for worker in workers:
+                worker.stopping = True
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        threads = [
+            threading.Thread(target=worker.run, kwargs={"burst": options["burst"]}, name=worker.worker_id)
+            for worker in workers
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.stdout.write(self.style.SUCCESS("Workers stopped."))
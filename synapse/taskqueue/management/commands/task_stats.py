@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from taskqueue import metrics
+from taskqueue.registry import registered_tasks
+
+
+class Command(BaseCommand):
+    help = "Show queue depth and run counters for each registered task."
+
+    def handle(self, *args, **options):
+        depth = metrics.queue_depth()
+        names = sorted(set(registered_tasks()) | set(depth))
+        counts = metrics.counters(names)
+
+        header = f"{'task':<60} {'queued':>7} {'running':>7} {'ok':>7} {'retried':>7} {'failed':>7} {'avg ms':>8}"
+        self.stdout.write(header)
+        for name in names:
+            d = depth.get(name, {})
+            c = counts[name]
+            runs = c["succeeded"] + c["retried"] + c["failed"]
+            avg = c["duration_ms"] // runs if runs else 0
+            self.stdout.write(
+                f"{name:<60} {d.get('queued', 0):>7} {d.get('running', 0):>7} "
+                f"{c['succeeded']:>7} {c['retried']:>7} {c['failed']:>7} {avg:>8}"
+            )
@@ -0,0 +1,56 @@
+"""
+Task counters kept in Redis so every worker process adds to the same totals.
+
+Counters are best-effort: if Redis is down they are skipped rather than
+failing the task.
+"""
+from django.core.cache import cache
+from django.db.models import Count
+
+from .models import Task
+
+COUNTERS = ("enqueued", "succeeded", "retried", "failed", "duration_ms")
+
+
+def _key(counter: str, task_name: str) -> str:
+    return f"taskq:{counter}:{task_name}"
+
+
+def incr(counter: str, task_name: str, amount: int = 1) -> None:
+    key = _key(counter, task_name)
+    try:
+        try:
+            cache.incr(key, amount)
+        except ValueError:
+            if not cache.add(key, amount, None):
+                cache.incr(key, amount)
+    except Exception:
+        pass
+
+
+def counters(task_names) -> dict[str, dict[str, int]]:
+    """Return {task_name: {counter: value}} for the given task names."""
+    keys = {_key(c, n): (n, c) for n in task_names for c in COUNTERS}
+    try:
+        values = cache.get_many(list(keys))
+    except Exception:
+        values = {}
+    result = {n: dict.fromkeys(COUNTERS, 0) for n in task_names}
+    for key, value in values.items():
+        name, counter = keys[key]
+        result[name][counter] = value
+    return result
+
+
+def queue_depth() -> dict[str, dict[str, int]]:
+    """Return {task_name: {status: count}} for queued and running tasks."""
+    rows = (
+        Task.objects.filter(status__in=("queued", "running"))
+        .values("name", "status")
+        .annotate(n=Count("id"))
+        .order_by()
+    )
+    depth: dict[str, dict[str, int]] = {}
+    for row in rows:
+        depth.setdefault(row["name"], {"queued": 0, "running": 0})[row["status"]] = row["n"]
+    return depth
@@ -0,0 +1,58 @@
+from django.db import models
+from django.utils import timezone
+
+TASK_STATUSES = (
+    ("queued", "Queued"),
+    ("running", "Running"),
+    ("succeeded", "Succeeded"),
+    ("failed", "Failed"),
+)
+
+
+class Task(models.Model):
+    """One queued call of a registered task function."""
+
+    name = models.CharField(max_length=200)
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=TASK_STATUSES, default="queued")
+    priority = models.SmallIntegerField(default=0)  # lower runs first
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    last_error = models.TextField(blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "taskqueue_tasks"
+        indexes = [
+            models.Index(
+                fields=["priority", "run_at"],
+                name="task_ready_idx",
+                condition=models.Q(status="queued"),
+            ),
+            models.Index(
+                fields=["name", "locked_at"],
+                name="task_running_idx",
+                condition=models.Q(status="running"),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+
+class ScheduledRun(models.Model):
+    """When a TASK_SCHEDULE entry next fires; shared by every worker running the scheduler."""
+
+    name = models.CharField(max_length=100, primary_key=True)
+    next_run_at = models.DateTimeField()
+
+    class Meta:
+        db_table = "taskqueue_schedule"
+
+    def __str__(self):
+        return f"{self.name} next at {self.next_run_at}"
@@ -0,0 +1,79 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+_registry: dict[str, "TaskDefinition"] = {}
+
+
+class TaskDefinition:
+    """A function registered with @task, plus its retry and concurrency policy."""
+
+    def __init__(self, func, name, max_attempts, retry_delay, concurrency, priority):
+        self.func = func
+        self.name = name
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.concurrency = concurrency
+        self.priority = priority
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def enqueue(self, *args, countdown=0, unique=False, **kwargs):
+        """
+        Queue a call to run in a worker and return its Task row.
+
+        Arguments must be JSON-serialisable. With unique=True, an identical
+        call that is still queued is returned instead of adding another.
+        """
+        from . import metrics
+        from .models import Task
+
+        if unique:
+            existing = Task.objects.filter(
+                name=self.name, status="queued", args=list(args), kwargs=kwargs,
+            ).first()
+            if existing is not None:
+                return existing
+
+        queued = Task.objects.create(
+            name=self.name,
+            args=list(args),
+            kwargs=kwargs,
+            priority=self.priority,
+            max_attempts=self.max_attempts,
+            run_at=timezone.now() + timedelta(seconds=countdown),
+        )
+        metrics.incr("enqueued", self.name)
+        return queued
+
+    def backoff(self, attempts: int) -> timedelta:
+        """Delay before retry number `attempts`, doubling each time."""
+        return timedelta(seconds=self.retry_delay * 2 ** (attempts - 1))
+
+
+def task(name=None, max_attempts=3, retry_delay=30, concurrency=None, priority=0):
+    """
+    Register a function as a background task.
+
+    The decorated function can still be called directly; call .enqueue()
+    to run it in a worker instead. `concurrency` caps how many calls may
+    run at once across all workers; `retry_delay` is the first retry's
+    delay in seconds.
+    """
+
+    def decorator(func):
+        task_name = name or f"{func.__module__}.{func.__qualname__}"
+        definition = TaskDefinition(func, task_name, max_attempts, retry_delay, concurrency, priority)
+        _registry[task_name] = definition
+        return definition
+
+    return decorator
+
+
+def get_task(name: str) -> TaskDefinition | None:
+    return _registry.get(name)
+
+
+def registered_tasks() -> dict[str, TaskDefinition]:
+    return dict(_registry)
@@ -0,0 +1,7 @@
+from .registry import task
+from .worker import Worker
+
+
+@task(concurrency=1)
+def purge_finished_tasks():
+    Worker().purge_finished()
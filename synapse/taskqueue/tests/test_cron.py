@@ -0,0 +1,38 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from taskqueue.cron import CronError, CronSchedule
+
+
+def _at(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize(
+    "expression, after, expected",
+    [
+        ("* * * * *", _at(2026, 3, 10, 12, 0, 30), _at(2026, 3, 10, 12, 1)),
+        ("*/15 * * * *", _at(2026, 3, 10, 12, 1), _at(2026, 3, 10, 12, 15)),
+        ("0 */6 * * *", _at(2026, 3, 10, 12, 0), _at(2026, 3, 10, 18, 0)),
+        ("5 0 * * *", _at(2026, 3, 10, 12, 0), _at(2026, 3, 11, 0, 5)),
+        ("0 9 1 * *", _at(2026, 12, 15), _at(2027, 1, 1, 9, 0)),
+        ("0 9 * * 1-5", _at(2026, 3, 13, 10), _at(2026, 3, 16, 9, 0)),  # Friday -> Monday
+        ("0 0 * * 7", _at(2026, 3, 10), _at(2026, 3, 15)),  # 7 is Sunday
+        ("0 0 13 * 5", _at(2026, 3, 10), _at(2026, 3, 13)),  # day or weekday
+        ("0 0 29 2 *", _at(2026, 3, 1), _at(2028, 2, 29)),
+    ],
+)
+def test_next_after(expression, after, expected):
+    assert CronSchedule(expression).next_after(after) == expected
+
+
+@pytest.mark.parametrize("expression", ["* * * *", "60 * * * *", "*/0 * * * *", "a * * * *", "5-1 * * * *"])
+def test_invalid_expressions(expression):
+    with pytest.raises(CronError):
+        CronSchedule(expression)
+
+
+def test_impossible_schedule():
+    with pytest.raises(CronError):
+        CronSchedule("0 0 31 2 *").next_after(_at(2026, 1, 1))
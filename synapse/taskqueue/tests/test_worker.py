@@ -0,0 +1,181 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from taskqueue import metrics
+from taskqueue.models import ScheduledRun, Task
+from taskqueue.registry import task
+from taskqueue.worker import Worker
+
+calls = []
+
+
+@task(name="tests.record", retry_delay=10)
+def record(value):
+    calls.append(value)
+
+
+@task(name="tests.explode", max_attempts=2)
+def explode():
+    raise RuntimeError("boom")
+
+
+@task(name="tests.limited", concurrency=1)
+def limited():
+    pass
+
+
+@pytest.fixture(autouse=True)
+def reset_calls():
+    calls.clear()
+
+
+@pytest.mark.django_db
+class TestWorker:
+    def test_runs_enqueued_task(self):
+        queued = record.enqueue("hello")
+
+        assert Worker().run_once() is True
+
+        queued.refresh_from_db()
+        assert calls == ["hello"]
+        assert queued.status == "succeeded"
+        assert queued.attempts == 1
+        assert metrics.counters(["tests.record"])["tests.record"]["succeeded"] == 1
+
+    def test_direct_call_still_works(self):
+        record("direct")
+        assert calls == ["direct"]
+        assert not Task.objects.exists()
+
+    def test_countdown_delays_task(self):
+        record.enqueue("later", countdown=60)
+        assert Worker().run_once() is False
+
+    def test_priority_order(self):
+        record.enqueue("low")
+        Task.objects.create(name="tests.record", args=["high"], priority=-1)
+
+        worker = Worker()
+        worker.run_once()
+        worker.run_once()
+
+        assert calls == ["high", "low"]
+
+    def test_failure_retries_with_backoff_then_fails(self):
+        queued = explode.enqueue()
+        worker = Worker()
+
+        worker.run_once()
+        queued.refresh_from_db()
+        assert queued.status == "queued"
+        assert queued.run_at > timezone.now()
+        assert "boom" in queued.last_error
+
+        Task.objects.filter(id=queued.id).update(run_at=timezone.now())
+        worker.run_once()
+        queued.refresh_from_db()
+        assert queued.status == "failed"
+        assert queued.attempts == 2
+        counts = metrics.counters(["tests.explode"])["tests.explode"]
+        assert counts["retried"] == 1
+        assert counts["failed"] == 1
+
+    def test_unknown_task_fails(self):
+        queued = Task.objects.create(name="tests.missing")
+        Worker().run_once()
+        queued.refresh_from_db()
+        assert queued.status == "failed"
+
+    def test_concurrency_limit(self):
+        Task.objects.create(name="tests.limited", status="running", locked_at=timezone.now())
+        queued = limited.enqueue()
+
+        assert Worker().claim() is None
+
+        Task.objects.filter(status="running").update(status="succeeded")
+        assert Worker().claim().pk == queued.pk
+
+    def test_unique_enqueue(self):
+        first = record.enqueue("x", unique=True)
+        assert record.enqueue("x", unique=True).pk == first.pk
+        assert record.enqueue("y", unique=True).pk != first.pk
+
+    def test_reaps_lost_tasks(self):
+        stale = timezone.now() - timedelta(hours=2)
+        lost = Task.objects.create(name="tests.record", args=["again"], status="running",
+                                   attempts=1, locked_by="gone", locked_at=stale)
+        dead = Task.objects.create(name="tests.record", status="running", attempts=3,
+                                   locked_by="gone", locked_at=stale)
+
+        assert Worker().reap_stale() == 2
+
+        lost.refresh_from_db()
+        dead.refresh_from_db()
+        assert lost.status == "queued"
+        assert dead.status == "failed"
+
+    def test_heartbeat_keeps_long_task_from_being_reaped(self):
+        queued = record.enqueue("slow")
+        worker = Worker()
+        claimed = worker.claim()
+        Task.objects.filter(id=queued.id).update(locked_at=timezone.now() - timedelta(hours=2))
+
+        assert worker.heartbeat(claimed) is True
+        assert Worker().reap_stale() == 0
+        queued.refresh_from_db()
+        assert queued.status == "running"
+
+    def test_heartbeat_stops_for_task_taken_over(self):
+        queued = record.enqueue("x")
+        worker = Worker()
+        claimed = worker.claim()
+        Task.objects.filter(id=queued.id).update(locked_by="someone-else")
+
+        assert worker.heartbeat(claimed) is False
+
+    def test_purges_old_finished_tasks(self):
+        old = timezone.now() - timedelta(days=30)
+        Task.objects.create(name="tests.record", status="succeeded", finished_at=old)
+        Task.objects.create(name="tests.record", status="failed", finished_at=old)
+        recent = Task.objects.create(name="tests.record", status="succeeded", finished_at=timezone.now())
+        waiting = record.enqueue("x")
+
+        assert Worker().purge_finished(days=7, batch_size=1) == 2
+        assert set(Task.objects.values_list("id", flat=True)) == {recent.id, waiting.id}
+
+    def test_stale_write_back_is_ignored(self):
+        queued = record.enqueue("x")
+        worker = Worker()
+        claimed = worker.claim()
+        Task.objects.filter(id=queued.id).update(locked_by="someone-else")
+
+        worker.execute(claimed)
+
+        queued.refresh_from_db()
+        assert queued.status == "running"
+
+
+@pytest.mark.django_db
+class TestSchedule:
+    def test_fires_due_entries_once(self, settings):
+        settings.TASK_SCHEDULE = {"every-minute": {"task": "tests.record", "cron": "* * * * *", "args": ["tick"]}}
+        now = timezone.now()
+        worker, other = Worker(), Worker()
+
+        assert worker.tick_schedule(now) == 0  # first sight only records the next run
+        later = now + timedelta(minutes=2)
+        assert worker.tick_schedule(later) == 1
+        assert other.tick_schedule(later) == 0
+
+        assert Task.objects.filter(name="tests.record", args=["tick"]).count() == 1
+        assert ScheduledRun.objects.get(name="every-minute").next_run_at > later
+
+    def test_burst_run_drains_queue(self):
+        for value in range(3):
+            record.enqueue(value)
+
+        Worker().run(burst=True)
+
+        assert calls == [0, 1, 2]
@@ -0,0 +1,225 @@
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+import uuid
+import zlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import metrics
+from .cron import CronSchedule
+from .models import ScheduledRun, Task
+from .registry import get_task
+
+logger = logging.getLogger(__name__)
+
+# A running task whose worker has been silent this long is assumed lost and requeued
+TASK_VISIBILITY_TIMEOUT = getattr(settings, "TASK_VISIBILITY_TIMEOUT", 3600)
+# How often a worker refreshes locked_at on the task it is running
+TASK_HEARTBEAT_INTERVAL = getattr(settings, "TASK_HEARTBEAT_INTERVAL", 60)
+# Succeeded and failed tasks are deleted this many days after they finish
+TASK_RETENTION_DAYS = getattr(settings, "TASK_RETENTION_DAYS", 7)
+# How many ready rows one claim considers when some are held back by concurrency limits
+CLAIM_WINDOW = 20
+
+
+class Worker:
+    """
+    Pulls tasks from the queue table and runs them.
+
+    Tasks are claimed with SELECT ... FOR UPDATE SKIP LOCKED, so any number
+    of workers can share the queue. Failed tasks are retried with
+    exponential backoff until max_attempts, then left as failed. While a
+    task runs, a heartbeat thread keeps its locked_at fresh, so only tasks
+    whose worker has died reach TASK_VISIBILITY_TIMEOUT.
+    """
+
+    def __init__(self, worker_id=None, poll_interval=1.0, beat=False):
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.poll_interval = poll_interval
+        self.beat = beat
+        self.stopping = False
+        self._last_reap = 0.0
+        self._last_tick = 0.0
+
+    def _has_capacity(self, definition) -> bool:
+        if connection.vendor == "postgresql":
+            # Serialise claims of this task name until our transaction commits,
+            # so two workers cannot both take the last free slot.
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT pg_advisory_xact_lock(%s)", [zlib.crc32(definition.name.encode())]
+                )
+        running = Task.objects.filter(name=definition.name, status="running").count()
+        return running < definition.concurrency
+
+    def claim(self) -> Task | None:
+        """Lock and mark running the next ready task, or return None."""
+        now = timezone.now()
+        with transaction.atomic():
+            candidates = list(
+                Task.objects.filter(status="queued", run_at__lte=now)
+                .order_by("priority", "run_at", "id")
+                .select_for_update(skip_locked=True)[:CLAIM_WINDOW]
+            )
+            for task in candidates:
+                definition = get_task(task.name)
+                if definition is not None and definition.concurrency and not self._has_capacity(definition):
+                    continue
+                task.status = "running"
+                task.locked_by = self.worker_id
+                task.locked_at = now
+                task.attempts += 1
+                task.save(update_fields=["status", "locked_by", "locked_at", "attempts"])
+                return task
+        return None
+
+    def heartbeat(self, task: Task) -> bool:
+        """Mark `task` as still running; False if it is no longer ours."""
+        return bool(self._owned(task).update(locked_at=timezone.now()))
+
+    def _heartbeat_loop(self, task, stop, interval):
+        try:
+            while not stop.wait(interval):
+                if not self.heartbeat(task):
+                    logger.warning("Task %s #%s was taken from worker %s", task.name, task.pk, self.worker_id)
+                    return
+        except Exception:
+            logger.exception("Heartbeat for task %s #%s failed", task.name, task.pk)
+        finally:
+            # Runs on its own thread, so it has its own connection
+            connections.close_all()
+
+    def execute(self, task: Task) -> None:
+        definition = get_task(task.name)
+        started = time.monotonic()
+        stop = threading.Event()
+        beat = threading.Thread(
+            target=self._heartbeat_loop, args=(task, stop, TASK_HEARTBEAT_INTERVAL),
+            name=f"heartbeat-{task.pk}", daemon=True,
+        )
+        beat.start()
+        try:
+            if definition is None:
+                raise LookupError(f"No task registered as {task.name!r}")
+            definition.func(*task.args, **task.kwargs)
+        except Exception:
+            error = traceback.format_exc()
+            logger.warning("Task %s #%s failed (attempt %s)", task.name, task.pk, task.attempts)
+            self._fail(task, definition, error)
+        else:
+            self._finish(task, status="succeeded")
+            metrics.incr("succeeded", task.name)
+        finally:
+            stop.set()
+            beat.join()
+            metrics.incr("duration_ms", task.name, int((time.monotonic() - started) * 1000))
+
+    def _owned(self, task):
+        # Guard every write-back: a reaped task may already belong to another worker
+        return Task.objects.filter(id=task.pk, status="running", locked_by=self.worker_id)
+
+    def _finish(self, task, status, error=""):
+        self._owned(task).update(
+            status=status, finished_at=timezone.now(), locked_by="", last_error=error,
+        )
+
+    def _fail(self, task, definition, error):
+        if definition is not None and task.attempts < task.max_attempts:
+            self._owned(task).update(
+                status="queued",
+                run_at=timezone.now() + definition.backoff(task.attempts),
+                locked_by="",
+                locked_at=None,
+                last_error=error,
+            )
+            metrics.incr("retried", task.name)
+        else:
+            self._finish(task, status="failed", error=error)
+            metrics.incr("failed", task.name)
+
+    def reap_stale(self) -> int:
+        """Requeue (or fail, if out of attempts) tasks whose worker disappeared."""
+        cutoff = timezone.now() - timedelta(seconds=TASK_VISIBILITY_TIMEOUT)
+        stale = Task.objects.filter(status="running", locked_at__lt=cutoff)
+        failed = stale.filter(attempts__gte=F("max_attempts")).update(
+            status="failed", finished_at=timezone.now(), locked_by="", last_error="Worker lost",
+        )
+        requeued = stale.update(
+            status="queued", run_at=timezone.now(), locked_by="", locked_at=None,
+            last_error="Worker lost",
+        )
+        return failed + requeued
+
+    def purge_finished(self, days=None, batch_size=10000) -> int:
+        """Delete succeeded and failed tasks that finished more than `days` ago."""
+        cutoff = timezone.now() - timedelta(days=TASK_RETENTION_DAYS if days is None else days)
+        finished = Task.objects.filter(status__in=("succeeded", "failed"), finished_at__lt=cutoff)
+        deleted = 0
+        while ids := list(finished.values_list("id", flat=True)[:batch_size]):
+            deleted += Task.objects.filter(id__in=ids).delete()[0]
+        return deleted
+
+    def tick_schedule(self, now=None) -> int:
+        """
+        Enqueue every TASK_SCHEDULE entry that is due and return how many fired.
+
+        Each entry's next run time is advanced with a conditional UPDATE, so
+        when several workers run the scheduler only one of them enqueues.
+        """
+        now = now or timezone.now()
+        fired = 0
+        for entry_name, entry in getattr(settings, "TASK_SCHEDULE", {}).items():
+            cron = CronSchedule(entry["cron"])
+            run, _ = ScheduledRun.objects.get_or_create(
+                name=entry_name, defaults={"next_run_at": cron.next_after(now)},
+            )
+            if run.next_run_at > now:
+                continue
+            claimed = ScheduledRun.objects.filter(
+                name=entry_name, next_run_at=run.next_run_at,
+            ).update(next_run_at=cron.next_after(now))
+            if not claimed:
+                continue
+            definition = get_task(entry["task"])
+            if definition is None:
+                logger.error("Schedule %s names unknown task %s", entry_name, entry["task"])
+                continue
+            definition.enqueue(*entry.get("args", ()), unique=True, **entry.get("kwargs", {}))
+            fired += 1
+        return fired
+
+    def run_once(self) -> bool:
+        """Run housekeeping and at most one task; return whether a task ran."""
+        if self.beat and time.monotonic() - self._last_tick > 5:
+            self.tick_schedule()
+            self._last_tick = time.monotonic()
+        if time.monotonic() - self._last_reap > 60:
+            self.reap_stale()
+            self._last_reap = time.monotonic()
+
+        task = self.claim()
+        if task is None:
+            return False
+        self.execute(task)
+        return True
+
+    def run(self, burst=False) -> None:
+        """Process tasks until stopped; with burst=True, exit once the queue is empty."""
+        logger.info("Worker %s started", self.worker_id)
+        try:
+            while not self.stopping:
+                if not self.run_once():
+                    if burst:
+                        break
+                    time.sleep(self.poll_interval)
+        finally:
+            connection.close()
+        logger.info("Worker %s stopped", self.worker_id)